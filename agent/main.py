@@ -7,12 +7,15 @@ Endpoints:
 """
 
 import os
+import io
+import csv
 import json
 import uuid
 import time
 import asyncio
 import re
 import sys
+import secrets
 from typing import Optional, List
 from textwrap import dedent
 from dotenv import load_dotenv
@@ -26,15 +29,26 @@ from pydantic_ai import Agent, RunContext
 from pydantic_ai.ag_ui import StateDeps
 from pydantic_ai.models.google import GoogleModel
 
-from tools.job_search import search_jobs, get_available_categories, get_available_countries, get_job_by_id
+from tools.job_search import (
+    search_jobs_page_async, get_job_by_id_async, get_category_counts_async, get_country_counts_async,
+    search_cache_stats, iter_active_jobs, PROJECTIONS, DEFAULT_SIMILARITY_THRESHOLD
+)
+from tools.semantic_search import semantic_search_jobs_async
+from tools.salary import to_usd
+from tools.migrations import run_migrations
+from tools.job_archive import archive_periodically, ARCHIVE_INTERVAL_SECONDS
 from tools.company_lookup import lookup_company
+from tools.db_pool import pool_stats, close_pool, close_async_pool
+from tools.prepared import prepared_stats
+from tools.deadline import deadline, timed_tool, REQUEST_DEADLINE_SECONDS
+from tools.neon_http import close_neon_client
 from tools.user_context import (
     get_user_profile, save_user_profile,
     get_user_job_interests, save_job_interest,
     get_conversation_memory, search_user_memories,
     get_full_user_context,
     # Profile items (skills, role, location coaching)
-    ensure_profile_items_table, get_profile_items,
+    get_profile_items,
     save_profile_item, delete_profile_item,
     get_profile_completeness as get_profile_completeness_db
 )
@@ -142,6 +156,7 @@ class PageContext(BaseModel):
 class AppState(BaseModel):
     jobs: list[Job] = Field(default_factory=list)
     search_query: str = ""
+    jobs_cursor: Optional[str] = None  # opaque cursor for "show more" on the last search
     user: Optional[UserProfile] = None
     page: Optional[PageContext] = None
 
@@ -169,6 +184,8 @@ agent = Agent(
         | "Remember when I said..." | recall_past_conversations |
         | "Tell me about [company]" | lookup_esports_company |
         | "Find/show jobs" | search_esports_jobs |
+        | "Show me more" (after a search) | search_esports_jobs(show_more=True) |
+        | "Only the UK ones" (after a search) | search_esports_jobs again using its facets |
         | "Save this job" | save_job_to_favorites |
         | "I know Python" / skills | save_user_skill (→ Repo) |
         | "Looking for CTO roles" | save_role_preference (→ Repo) |
@@ -264,6 +281,11 @@ agent = Agent(
         - Highlight jobs matching their skills
         - Suggest roles aligned with their career goals
 
+        ## SLOW DATABASE
+        If a tool result has "timed_out": true, say in one short sentence that the
+        jobs database is slow right now and offer to try again. Don't retry more
+        than once in the same turn, and never pretend the search found nothing.
+
         ## Your Personality
         - Enthusiastic about esports! Use emojis sparingly: 🎮 🏆
         - Be specific with real data from tools
@@ -275,16 +297,54 @@ agent = Agent(
 
 
 @agent.tool
-def search_esports_jobs(ctx: RunContext[StateDeps[AppState]], query: str = None, category: str = None, country: str = None) -> dict:
+@timed_tool
+async def search_esports_jobs(ctx: RunContext[StateDeps[AppState]], query: str = None, category: str = None, country: str = None, show_more: bool = False,
+                              min_salary: int = None, salary_currency: str = "USD", highest_paid_first: bool = False,
+                              game: str = None, seniority: str = None, remote: bool = None) -> dict:
     """Search for esports jobs. Use this when user asks for jobs or positions.
 
+    New searches also return `facets`: job counts per category, country and type
+    for the same filters. Use them to suggest or apply a narrower filter directly
+    instead of calling get_categories/get_countries first.
+
     Args:
-        query: Free text search (title, company, skills)
+        query: Free text search (title, company, skills) - tolerates typos like "valorent"
         category: Job category: coaching, marketing, production, management, content, operations
-        country: Country filter
+        country: Country, city or region (e.g. UK, London, Berlin, Europe, APAC)
+        show_more: True when the user asks for more results from the previous search (other args are ignored)
+        min_salary: Minimum annual salary (e.g. 60000 for "at least 60k")
+        salary_currency: Currency of min_salary, e.g. USD, GBP, EUR
+        highest_paid_first: Sort by salary instead of relevance
+        game: Game title the job is about (e.g. CS2, Counter-Strike, Valorant, League of Legends)
+        seniority: intern, entry, mid, senior, lead or executive ("junior" and "graduate" mean entry)
+        remote: True for remote jobs only, False to exclude remote jobs
     """
-    print(f"[Tool] Searching: query={query}, category={category}, country={country}", file=sys.stderr)
-    results = search_jobs(query=query, category=category, country=country, limit=5)
+    state = ctx.deps.state
+    print(f"[Tool] Searching: query={query}, category={category}, country={country}, show_more={show_more}", file=sys.stderr)
+
+    if show_more:
+        if not state.jobs_cursor:
+            return {"jobs": [], "count": 0, "has_more": False, "message": "No more jobs for this search."}
+        try:
+            page = await search_jobs_page_async(cursor=state.jobs_cursor, limit=5, projection="card")
+        except ValueError:
+            state.jobs_cursor = None
+            return {"jobs": [], "count": 0, "has_more": False, "message": "That search has expired - please search again."}
+    else:
+        page = await search_jobs_page_async(
+            query=query, category=category, country=country, limit=5,
+            similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD, include_facets=True, projection="card",
+            dedupe=True, salary_min=to_usd(min_salary, salary_currency),
+            sort="salary" if highest_paid_first else "relevance",
+            game=game, seniority=seniority, remote=remote
+        )
+    results = page.jobs
+
+    related = False
+    if not results and query and not show_more:
+        # No keyword match - look for jobs that mean the same thing ("shoutcaster" -> broadcast talent)
+        results = await semantic_search_jobs_async(query, category, country, limit=5, projection="card")
+        related = bool(results)
 
     # Update state
     jobs = [Job(
@@ -296,18 +356,30 @@ def search_esports_jobs(ctx: RunContext[StateDeps[AppState]], query: str = None,
         salary=job.salary,
         url=job.url
     ) for job in results]
-    ctx.deps.state.jobs = jobs
-    ctx.deps.state.search_query = query or category or "esports jobs"
+    state.jobs_cursor = page.next_cursor
+    if show_more:
+        state.jobs = state.jobs + jobs
+    else:
+        state.jobs = jobs
+        state.search_query = query or category or "esports jobs"
 
-    return {
+    result = {
         "jobs": [{"id": j.id, "title": j.title, "company": j.company, "location": j.location, "type": j.type, "salary": j.salary, "url": j.url} for j in jobs],
         "count": len(jobs),
-        "search_query": query or category or country or "esports jobs",
+        "has_more": page.next_cursor is not None,
+        "next_cursor": page.next_cursor,
+        "search_query": state.search_query if show_more else (query or category or country or "esports jobs"),
         "message": f"Found {len(jobs)} esports jobs!" if jobs else "No jobs found."
     }
+    if related:
+        result["message"] = f"No exact matches, but found {len(jobs)} closely related esports jobs."
+    if page.facets is not None:
+        result["facets"] = page.facets
+    return result
 
 
 @agent.tool
+@timed_tool
 def lookup_esports_company(ctx: RunContext[StateDeps[AppState]], company_name: str) -> dict:
     """Get information about an esports company.
 
@@ -335,20 +407,23 @@ def lookup_esports_company(ctx: RunContext[StateDeps[AppState]], company_name: s
 
 
 @agent.tool
-def get_categories(ctx: RunContext[StateDeps[AppState]]) -> dict:
-    """Get list of available job categories in esports."""
-    categories = get_available_categories()
-    return {"categories": categories, "count": len(categories)}
+@timed_tool
+async def get_categories(ctx: RunContext[StateDeps[AppState]]) -> dict:
+    """Get list of available job categories in esports, with active job counts."""
+    counts = await get_category_counts_async()
+    return {"categories": list(counts), "job_counts": counts, "count": len(counts)}
 
 
 @agent.tool
-def get_countries(ctx: RunContext[StateDeps[AppState]]) -> dict:
-    """Get list of countries with available esports jobs."""
-    countries = get_available_countries()
-    return {"countries": countries, "count": len(countries)}
+@timed_tool
+async def get_countries(ctx: RunContext[StateDeps[AppState]]) -> dict:
+    """Get list of countries with available esports jobs, with active job counts."""
+    counts = await get_country_counts_async()
+    return {"countries": list(counts), "job_counts": counts, "count": len(counts)}
 
 
 @agent.tool
+@timed_tool
 def get_my_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get the current user's profile info (name, email, id).
 
@@ -386,6 +461,7 @@ def get_my_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
+@timed_tool
 def get_current_page(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get information about the page the user is currently viewing.
 
@@ -416,6 +492,7 @@ def get_current_page(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
+@timed_tool
 def get_my_full_context(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get complete user context including profile, job interests, and conversation history.
 
@@ -431,6 +508,7 @@ def get_my_full_context(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
+@timed_tool
 def update_my_skills(ctx: RunContext[StateDeps[AppState]], skills: list[str]) -> dict:
     """Update the user's skills profile.
 
@@ -450,6 +528,7 @@ def update_my_skills(ctx: RunContext[StateDeps[AppState]], skills: list[str]) ->
 
 
 @agent.tool
+@timed_tool
 def save_job_to_favorites(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
     """Save a job to user's favorites/interests.
 
@@ -466,6 +545,7 @@ def save_job_to_favorites(ctx: RunContext[StateDeps[AppState]], job_id: str) ->
 
 
 @agent.tool
+@timed_tool
 def get_my_saved_jobs(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get jobs the user has saved or shown interest in.
 
@@ -481,6 +561,7 @@ def get_my_saved_jobs(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
+@timed_tool
 def recall_past_conversations(ctx: RunContext[StateDeps[AppState]], topic: str = None) -> dict:
     """Search past conversations for relevant context.
 
@@ -506,6 +587,7 @@ def recall_past_conversations(ctx: RunContext[StateDeps[AppState]], topic: str =
 # =====
 
 @agent.tool
+@timed_tool
 def save_user_skill(ctx: RunContext[StateDeps[AppState]], skill: str, proficiency: str = "intermediate") -> dict:
     """Save a skill to user's profile.
 
@@ -540,6 +622,7 @@ def save_user_skill(ctx: RunContext[StateDeps[AppState]], skill: str, proficienc
 
 
 @agent.tool
+@timed_tool
 def save_role_preference(ctx: RunContext[StateDeps[AppState]], role: str) -> dict:
     """Save user's target job role. Replaces any previous role.
 
@@ -571,6 +654,7 @@ def save_role_preference(ctx: RunContext[StateDeps[AppState]], role: str) -> dic
 
 
 @agent.tool
+@timed_tool
 def save_location_preference(ctx: RunContext[StateDeps[AppState]], location: str, remote_ok: bool = True) -> dict:
     """Save user's preferred work location. Replaces any previous location.
 
@@ -606,6 +690,7 @@ def save_location_preference(ctx: RunContext[StateDeps[AppState]], location: str
 
 
 @agent.tool
+@timed_tool
 def save_experience_level(ctx: RunContext[StateDeps[AppState]], years: int) -> dict:
     """Save user's years of experience.
 
@@ -639,6 +724,7 @@ def save_experience_level(ctx: RunContext[StateDeps[AppState]], years: int) -> d
 # =====
 
 @agent.tool
+@timed_tool
 def save_career_mission(ctx: RunContext[StateDeps[AppState]], mission: str) -> dict:
     """Save user's career mission - their 'why'. This goes to Trinity character.
 
@@ -672,6 +758,7 @@ def save_career_mission(ctx: RunContext[StateDeps[AppState]], mission: str) -> d
 
 
 @agent.tool
+@timed_tool
 def save_user_values(ctx: RunContext[StateDeps[AppState]], value: str) -> dict:
     """Save a core value to user's profile. This goes to Trinity character.
 
@@ -705,6 +792,7 @@ def save_user_values(ctx: RunContext[StateDeps[AppState]], value: str) -> dict:
 
 
 @agent.tool
+@timed_tool
 def save_long_term_vision(ctx: RunContext[StateDeps[AppState]], vision: str) -> dict:
     """Save user's long-term career vision (5-10 years). This goes to Trinity character.
 
@@ -738,6 +826,7 @@ def save_long_term_vision(ctx: RunContext[StateDeps[AppState]], vision: str) ->
 
 
 @agent.tool
+@timed_tool
 def save_career_timeline(ctx: RunContext[StateDeps[AppState]], milestone: str, year: str = None) -> dict:
     """Save a career milestone to user's timeline. This goes to Velo character.
 
@@ -776,6 +865,7 @@ def save_career_timeline(ctx: RunContext[StateDeps[AppState]], milestone: str, y
 
 
 @agent.tool
+@timed_tool
 def check_profile_completeness(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Check how complete the user's profile is.
 
@@ -793,6 +883,7 @@ def check_profile_completeness(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
+@timed_tool
 def get_user_skills_and_preferences(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get all of user's saved skills, role, and location preferences.
 
@@ -809,6 +900,7 @@ def get_user_skills_and_preferences(ctx: RunContext[StateDeps[AppState]]) -> dic
 
 
 @agent.tool
+@timed_tool
 def show_user_profile_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Render user's profile as a visual graph.
 
@@ -886,7 +978,8 @@ def show_user_profile_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
-def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
+@timed_tool
+async def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
     """Assess how well the user's skills match a specific job's requirements.
 
     Returns a match score, matched skills, missing skills, and recommendations.
@@ -902,12 +995,12 @@ def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
     print(f"[Tool] Assessing job fit: job={job_id}, user={user_id}", file=sys.stderr)
 
     # Get job details
-    job = get_job_by_id(job_id)
+    job = await get_job_by_id_async(job_id)
     if not job:
         return {"success": False, "message": f"Job {job_id} not found"}
 
-    # Get user's skills
-    profile = get_profile_items(user_id)
+    # Get user's skills (profile tools are still sync - keep them off the event loop)
+    profile = await asyncio.to_thread(get_profile_items, user_id)
     if not profile.get("found"):
         return {
             "success": False,
@@ -1003,6 +1096,7 @@ def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
 
 
 @agent.tool
+@timed_tool
 def check_character_completion(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Check completion status for each profile character (Repo, Trinity, Velo, Reach).
 
@@ -1170,22 +1264,48 @@ async def extract_user_middleware(request: Request, call_next):
         except Exception as e:
             print(f"[Middleware] Error extracting user: {e}", file=sys.stderr)
 
+        # Agent turns: all database work in the request shares one deadline
+        # (each tool also gets its own, shorter one - see tools/deadline.py)
+        with deadline(REQUEST_DEADLINE_SECONDS):
+            return await call_next(request)
+
     return await call_next(request)
 
 
-# Startup event - ensure tables exist
+# Startup event - bring the schema up to date
+_archive_task: Optional[asyncio.Task] = None
+
+
 @main_app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on startup."""
-    print("[Startup] Ensuring profile_items table exists...", file=sys.stderr)
-    ensure_profile_items_table()
+    """Apply pending migrations (a single version check when the schema is current) and schedule archiving."""
+    global _archive_task
+    print("[Startup] Checking schema migrations...", file=sys.stderr)
+    run_migrations()
+    if ARCHIVE_INTERVAL_SECONDS > 0:
+        _archive_task = asyncio.create_task(archive_periodically())
     print("[Startup] Ready!", file=sys.stderr)
 
 
+@main_app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the archive schedule and close pooled database connections."""
+    if _archive_task is not None:
+        _archive_task.cancel()
+    close_pool()
+    await close_async_pool()
+    await close_neon_client()
+
+
 # Health check
 @main_app.get("/health")
 async def health():
-    return {"status": "ok", "agent": "mvp-actor", "version": "2.0"}
+    return {
+        "status": "ok", "agent": "mvp-actor", "version": "2.0",
+        "db_pool": pool_stats(),
+        "prepared_statements": prepared_stats(),
+        "search_cache": search_cache_stats(),
+    }
 
 
 @main_app.get("/")
@@ -1193,10 +1313,78 @@ async def root():
     return {
         "status": "ok",
         "agent": "mvp-actor",
-        "endpoints": ["/agui (AG-UI for CopilotKit)", "/chat/completions (CLM for Hume)", "/health"]
+        "endpoints": ["/agui (AG-UI for CopilotKit)", "/chat/completions (CLM for Hume)", "/health",
+                      "/jobs/export (JSONL/CSV feed of active jobs, admin key)"]
     }
 
 
+# =====
+# Jobs export (feeds, sitemaps, analytics)
+# =====
+EXPORT_CHUNK_ROWS = 500
+# Bearer key for /jobs/export; the endpoint is disabled while it is unset
+EXPORT_API_KEY = os.getenv("EXPORT_API_KEY", "")
+
+
+def _check_export_key(authorization: Optional[str]):
+    """Reject export requests without the admin key."""
+    if not EXPORT_API_KEY:
+        raise HTTPException(status_code=403, detail="Export is disabled (EXPORT_API_KEY not set)")
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing authorization")
+    token = authorization[len("Bearer "):]
+    if not secrets.compare_digest(token.encode(), EXPORT_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid authorization")
+
+
+def _export_chunks(format: str, projection: str):
+    """Serialize iter_active_jobs() as JSONL or CSV, a few hundred rows per chunk.
+
+    A plain generator: Starlette runs it in a worker thread, so the
+    server-side cursor never blocks the event loop.
+    """
+    buffer = io.StringIO()
+    writer = None
+    rows = 0
+    for job in iter_active_jobs(projection=projection):
+        data = job.model_dump()
+        if format == "csv":
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(data))
+                writer.writeheader()
+            if isinstance(data.get("skills"), list):
+                data["skills"] = "; ".join(data["skills"])
+            writer.writerow(data)
+        else:
+            buffer.write(json.dumps(data) + "\n")
+        rows += 1
+        if rows % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+    print(f"[Export] Streamed {rows} jobs as {format}", file=sys.stderr)
+
+
+@main_app.get("/jobs/export")
+async def export_jobs(format: str = "jsonl", projection: str = "full",
+                      authorization: Optional[str] = Header(None)):
+    """Stream all active jobs as JSONL (default) or CSV. Needs Authorization: Bearer <EXPORT_API_KEY>."""
+    _check_export_key(authorization)
+    if format not in ("jsonl", "csv"):
+        raise HTTPException(status_code=400, detail="format must be jsonl or csv")
+    if projection not in PROJECTIONS:
+        raise HTTPException(status_code=400, detail=f"projection must be one of {', '.join(PROJECTIONS)}")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_chunks(format, projection),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="jobs.{format}"'}
+    )
+
+
 # =====
 # CLM Endpoint for Hume Voice
 # =====
@@ -0,0 +1,113 @@
+"""
+Shared fixtures.
+
+Database tests run against a throwaway Postgres (pg_trgm available) named by
+TEST_DATABASE_URL, e.g.
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/esports_test python -m pytest -q
+
+Its public schema is dropped and rebuilt for every test: the jobs and
+user_job_interests tables as they exist in Neon, then every migration.
+Without TEST_DATABASE_URL those tests are skipped.
+"""
+
+import os
+import sys
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+# Read at import time by the tools modules, so set before any test imports them
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or ""
+os.environ.pop("DATABASE_READ_URL", None)
+
+# The tables the app finds in Neon (created outside this repo)
+BASE_SCHEMA = """
+    CREATE TABLE jobs (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        company TEXT,
+        location TEXT,
+        country TEXT,
+        type TEXT,
+        salary TEXT,
+        description TEXT,
+        skills TEXT[],
+        category TEXT,
+        external_url TEXT,
+        posted_date TIMESTAMPTZ,
+        is_active BOOLEAN DEFAULT true,
+        created_at TIMESTAMPTZ DEFAULT NOW()
+    );
+    CREATE TABLE user_job_interests (
+        id SERIAL PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        job_id TEXT NOT NULL,
+        interest_type TEXT DEFAULT 'viewed',
+        created_at TIMESTAMPTZ DEFAULT NOW()
+    );
+"""
+
+JOB_DEFAULTS = {
+    "title": "Esports Coordinator", "company": "Fnatic", "location": "London", "country": "United Kingdom",
+    "type": "Full-time", "salary": None, "description": "", "skills": [], "category": "operations",
+    "external_url": "", "is_active": True,
+}
+
+
+def _reset_process_state():
+    from tools.db_pool import close_pool
+    from tools.job_search import notify_jobs_changed
+
+    close_pool()
+    notify_jobs_changed()
+
+
+@pytest.fixture
+def db():
+    """A psycopg2 connection (autocommit) to a freshly migrated test database."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import psycopg2
+    from tools.migrations import run_migrations, latest_version
+
+    _reset_process_state()
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+        cur.execute(BASE_SCHEMA)
+    assert run_migrations() == latest_version()
+    try:
+        yield conn
+    finally:
+        conn.close()
+        _reset_process_state()
+
+
+def insert_jobs(conn, *jobs: dict):
+    """Insert jobs (dicts of column overrides; id required). posted_date defaults to one day apart."""
+    now = datetime.now(timezone.utc)
+    with conn.cursor() as cur:
+        for i, job in enumerate(jobs):
+            row = {**JOB_DEFAULTS, "posted_date": now - timedelta(days=i), **job}
+            columns = ", ".join(row)
+            cur.execute(f"INSERT INTO jobs ({columns}) VALUES ({', '.join(['%s'] * len(row))})",
+                        list(row.values()))
+
+
+def run_async(coro):
+    """Run coro on a fresh event loop, closing the async pools (bound to that loop) afterwards."""
+    from tools.db_pool import close_async_pool
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_async_pool()
+
+    return asyncio.run(main())
@@ -0,0 +1,115 @@
+import time
+import threading
+
+from conftest import insert_jobs, run_async
+
+from tools.cache import RefreshingCache, LRUCache
+from tools.job_search import (
+    get_category_counts, get_category_counts_async, get_available_countries, notify_jobs_changed,
+    search_jobs_page, search_jobs_page_async, search_cache_stats,
+)
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_refreshing_cache_serves_stale_while_reloading():
+    loads = []
+    release = threading.Event()
+
+    def loader():
+        loads.append(1)
+        if len(loads) > 1:
+            release.wait(2)
+        return len(loads)
+
+    cache = RefreshingCache("test", loader, ttl=0.05)
+    assert cache.get() == 1
+    assert cache.get() == 1 and len(loads) == 1
+
+    time.sleep(0.06)
+    # Expired: the stale value comes back at once and one background reload starts
+    assert cache.get() == 1
+    assert cache.get() == 1
+    release.set()
+    _wait_for(lambda: cache.stats()["refreshes"] == 2)
+    assert cache.get() == 2
+    assert len(loads) == 2
+
+
+def test_invalidate_reloads_in_the_background():
+    values = iter([1, 2])
+    cache = RefreshingCache("test", lambda: next(values), ttl=60)
+    assert cache.get() == 1
+    cache.invalidate()
+    assert cache.get() == 1
+    _wait_for(lambda: cache.stats()["refreshes"] == 2)
+    assert cache.get() == 2
+
+
+def test_vocabularies_count_active_jobs_and_follow_changes(db):
+    insert_jobs(db, {"id": "job-1", "category": "coaching", "country": "Germany"},
+                {"id": "job-2", "category": "coaching", "country": "Germany"},
+                {"id": "job-3", "category": "marketing", "country": "France"},
+                {"id": "job-4", "category": "content", "is_active": False})
+
+    # Earlier tests may have left a (now invalidated) vocabulary behind
+    _wait_for(lambda: get_category_counts() == {"coaching": 2, "marketing": 1})
+    assert list(get_category_counts()) == ["coaching", "marketing"]  # most common first
+    assert get_available_countries() == ["Germany", "France"]
+
+    insert_jobs(db, {"id": "job-5", "category": "marketing"}, {"id": "job-6", "category": "marketing"})
+    assert get_category_counts()["marketing"] == 1  # cached
+    notify_jobs_changed()
+    _wait_for(lambda: get_category_counts()["marketing"] == 3)
+    assert run_async(get_category_counts_async()) == {"marketing": 3, "coaching": 2}
+
+
+def test_lru_cache_evicts_least_recently_used_and_expires():
+    cache = LRUCache("test", max_size=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts b, the least recently used
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["expired"] == 1
+
+
+def _ids(page):
+    return [job.id for job in page.jobs]
+
+
+def test_equivalent_searches_share_a_cache_entry(db):
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach", "country": "United Kingdom"},
+                {"id": "job-2", "title": "Valorant Coach", "country": "Germany", "location": "Berlin"})
+
+    hits = search_cache_stats()["hits"]
+    assert _ids(search_jobs_page(query="Valorant  Coach", country="UK")) == ["job-1"]
+    assert _ids(search_jobs_page(query="valorant coach", country="united kingdom")) == ["job-1"]
+    assert _ids(run_async(search_jobs_page_async(query=" VALORANT coach ", country="Britain"))) == ["job-1"]
+    assert search_cache_stats()["hits"] == hits + 2
+
+    # Served from the cache until the jobs table is reported changed
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET is_active = false WHERE id = 'job-1'")
+    assert _ids(search_jobs_page(query="valorant coach", country="uk")) == ["job-1"]
+    notify_jobs_changed()
+    assert _ids(search_jobs_page(query="valorant coach", country="uk")) == []
+
+
+def test_empty_pages_and_cursor_pages_are_not_cached(db):
+    assert search_jobs_page(query="valorant").jobs == []
+    insert_jobs(db, *({"id": f"job-{i}", "title": "Valorant Coach"} for i in range(3)))
+    assert len(search_jobs_page(query="valorant").jobs) == 3
+
+    first = search_jobs_page(query="valorant", limit=2)
+    hits = search_cache_stats()["hits"]
+    search_jobs_page(cursor=first.next_cursor, limit=2)
+    search_jobs_page(cursor=first.next_cursor, limit=2)
+    assert search_cache_stats()["hits"] == hits
@@ -0,0 +1,61 @@
+from tools import db_indexes
+from tools.db_indexes import IndexDef, ensure_indexes, seq_scan_report
+
+
+def _report(**kwargs):
+    return {row["query"]: row for row in seq_scan_report(**kwargs)}
+
+
+def _index_versions(db):
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT v.name, v.version, i.indisvalid
+            FROM db_index_versions v
+            JOIN pg_class c ON c.relname = v.name
+            JOIN pg_index i ON i.indexrelid = c.oid
+        """)
+        return {name: (version, valid) for name, version, valid in cur.fetchall()}
+
+
+def test_ensure_indexes_builds_each_version_once(db, monkeypatch):
+    versions = _index_versions(db)
+    assert versions["idx_jobs_category_lower"] == (1, True)
+    assert "idx_messages_recipient_unread" not in versions  # no messages table here
+
+    bumped = [IndexDef(i.name, i.table, "(LOWER(category), id) WHERE is_active = true", 2)
+              if i.name == "idx_jobs_category_lower" else i for i in db_indexes.INDEXES]
+    monkeypatch.setattr(db_indexes, "INDEXES", bumped)
+    assert ensure_indexes()
+    assert _index_versions(db)["idx_jobs_category_lower"] == (2, True)
+    with db.cursor() as cur:
+        cur.execute("SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_jobs_category_lower'")
+        assert "id" in cur.fetchone()[0].split("(", 1)[1]
+
+
+def test_report_uses_the_index_set_on_a_large_table(db):
+    with db.cursor() as cur:
+        cur.execute("""
+            INSERT INTO jobs (id, title, category, type, is_active, posted_date)
+            SELECT 'job-' || n, 'Job ' || n, 'category-' || (n % 200),
+                   CASE WHEN n % 100 = 0 THEN 'Freelance' ELSE 'Full-time' END,
+                   n % 10 <> 0, NOW() - n * interval '1 minute'
+            FROM generate_series(1, 20000) AS n
+        """)
+        cur.execute("UPDATE jobs SET category = 'marketing' WHERE id IN ('job-1', 'job-2', 'job-3')")
+
+    report = _report(analyze=True)
+    for query in ("search by category", "search by type", "recent active jobs"):
+        assert report[query]["seq_scans"] == [], query
+        assert report[query]["indexes"], query
+        assert report[query]["ok"], query
+    assert "error" in report["unread messages"]
+
+
+def test_report_flags_seq_scans_only_above_min_rows(db):
+    with db.cursor() as cur:
+        cur.execute("INSERT INTO jobs (id, title, category) VALUES ('job-1', 'Analyst', 'marketing')")
+
+    small = _report(analyze=True)["search by category"]
+    assert small["seq_scans"] == [{"table": "jobs", "rows": 1}]
+    assert small["ok"]
+    assert not _report(analyze=True, min_rows=1)["search by category"]["ok"]
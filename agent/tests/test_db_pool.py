@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from conftest import TEST_DATABASE_URL, run_async
+
+from tools.db_pool import (
+    ConnectionPool, PoolTimeout, get_connection, get_async_connection, get_async_pool, direct_dsn,
+)
+from tools.deadline import deadline, DeadlineExceeded
+
+
+def test_async_checkouts_reuse_pooled_connections(db):
+    async def backend_pids():
+        await (await get_async_pool()).wait()  # min_size connections open, so nothing waits and grows the pool
+        pids = []
+        for _ in range(5):
+            async with get_async_connection() as conn:
+                cur = await conn.execute("SELECT pg_backend_pid()")
+                pids.append((await cur.fetchone())[0])
+        return pids, (await get_async_pool()).get_stats().get("connections_num")
+
+    pids, opened = run_async(backend_pids())
+    assert len(set(pids)) == 1
+    assert opened == 1
+
+
+def test_async_checkout_commits_or_rolls_back(db):
+    async def write(fail):
+        async with get_async_connection() as conn:
+            await conn.execute("INSERT INTO user_job_interests (user_id, job_id) VALUES ('u1', %s)",
+                               ("rolled-back" if fail else "committed",))
+            if fail:
+                raise RuntimeError("boom")
+
+    run_async(write(False))
+    with pytest.raises(RuntimeError):
+        run_async(write(True))
+    with db.cursor() as cur:
+        cur.execute("SELECT job_id FROM user_job_interests")
+        assert cur.fetchall() == [("committed",)]
+
+
+def test_deadline_cancels_slow_statements(db):
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with deadline(0.3):
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_sleep(5)")
+    assert time.monotonic() - started < 2
+
+    # The connection went back to the pool usable, without the timeout
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT current_setting('statement_timeout')")
+            assert cur.fetchone()[0] == "0"
+
+
+def test_deadline_cancels_slow_async_statements(db):
+    async def slow():
+        with deadline(0.3):
+            async with get_async_connection() as conn:
+                await conn.execute("SELECT pg_sleep(5)")
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        run_async(slow())
+    assert time.monotonic() - started < 2
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@ep-cool-123-pooler.eu-central-1.aws.neon.tech/db?sslmode=require",
+     "postgresql://u:p@ep-cool-123.eu-central-1.aws.neon.tech/db?sslmode=require"),
+    ("postgresql://u:p@localhost/db", "postgresql://u:p@localhost/db"),
+])
+def test_direct_dsn(url, expected):
+    assert direct_dsn(url) == expected
+
+
+@pytest.fixture
+def pool(db):
+    pool = ConnectionPool(TEST_DATABASE_URL, min_size=1, max_size=2, timeout=0.2, health_check_after=0)
+    yield pool
+    pool.close()
+
+
+def _pid(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_backend_pid()")
+        return cur.fetchone()[0]
+
+
+def test_pool_reuses_connections_and_bounds_checkouts(pool):
+    with pool.connection() as conn:
+        pid = _pid(conn)
+    with pool.connection() as conn:
+        assert _pid(conn) == pid
+
+    first, second = pool.getconn(), pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+    stats = pool.stats()
+    assert (stats["created"], stats["peak_in_use"], stats["timeouts"], stats["in_use"]) == (2, 2, 1, 0)
+
+
+def test_pool_rolls_back_and_replaces_broken_connections(pool, db):
+    with pool.connection() as conn:
+        pid = _pid(conn)
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO jobs (id, title) VALUES ('job-1', 'Uncommitted')")
+    with db.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM jobs")
+        assert cur.fetchone()[0] == 0  # returned connections are rolled back
+
+        # The server drops the idle connection; the checkout health check notices
+        cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+    with pool.connection() as conn:
+        assert _pid(conn) != pid
+    assert pool.stats()["failed_health_checks"] == 1
@@ -0,0 +1,69 @@
+from conftest import insert_jobs
+
+from tools.job_search import search_jobs_page_sync
+from tools.dedup import backfill_signatures
+
+
+def _search_ids(**kwargs):
+    return sorted(job.id for job in search_jobs_page_sync(limit=50, **kwargs).jobs)
+
+
+def _cluster(db, cluster_id, *job_ids):
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET dedup_cluster_id = %s WHERE id = ANY(%s::text[])", (cluster_id, list(job_ids)))
+
+
+def test_dedupe_picks_the_representative_among_filtered_jobs(db):
+    insert_jobs(db,
+                {"id": "job-001", "location": "Berlin", "country": "Germany"},
+                {"id": "job-003", "location": "London", "country": "United Kingdom"},
+                {"id": "job-009", "location": "London", "country": "United Kingdom"},
+                {"id": "job-020", "location": "Paris", "country": "France"})
+    _cluster(db, "job-001", "job-001", "job-003", "job-009")
+
+    assert _search_ids(dedupe=True) == ["job-001", "job-020"]
+    assert _search_ids(country="London", dedupe=True) == ["job-003"]
+    assert _search_ids(country="London") == ["job-003", "job-009"]
+    assert _search_ids(country="Berlin", dedupe=True) == ["job-001"]
+
+
+def test_dedupe_keeps_the_copy_with_a_salary(db):
+    insert_jobs(db, {"id": "job-101", "title": "Shoutcaster"}, {"id": "job-102", "title": "Shoutcaster"})
+    _cluster(db, "job-101", "job-101", "job-102")
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET salary_min_usd = 60000, salary_max_usd = 70000 WHERE id = 'job-102'")
+
+    assert _search_ids(salary_min=50000, dedupe=True) == ["job-102"]
+    assert _search_ids(query="shoutcaster", dedupe=True) == ["job-101"]
+
+
+def test_dedupe_with_facets_counts_one_job_per_cluster(db):
+    insert_jobs(db, {"id": "job-1", "category": "coaching"}, {"id": "job-2", "category": "coaching"},
+                {"id": "job-3", "category": "marketing"})
+    _cluster(db, "job-1", "job-1", "job-2")
+
+    page = search_jobs_page_sync(limit=50, dedupe=True, include_facets=True)
+    assert sorted(job.id for job in page.jobs) == ["job-1", "job-3"]
+    assert page.facets["category"] == {"coaching": 1, "marketing": 1}
+
+
+def _clusters(db):
+    with db.cursor() as cur:
+        cur.execute("SELECT id, dedup_cluster_id FROM jobs ORDER BY id")
+        return dict(cur.fetchall())
+
+
+def test_an_edited_posting_leaves_its_cluster(db):
+    caster = "Shoutcaster for our Valorant league, three nights a week, studio based in Berlin with travel to finals"
+    analyst = "Performance analyst for the CS2 academy roster: demo review, opponent scouting and practice plans"
+    insert_jobs(db, {"id": "job-1", "description": caster}, {"id": "job-2", "description": caster + "."},
+                {"id": "job-3", "description": analyst})
+    backfill_signatures()
+    assert _clusters(db) == {"job-1": "job-1", "job-2": "job-1", "job-3": "job-3"}
+
+    # job-1 is re-posted as the analyst role: it joins job-3, and job-2 is left on its own
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET description = %s WHERE id = 'job-1'", (analyst,))
+    assert backfill_signatures() == 1
+    assert _clusters(db) == {"job-1": "job-1", "job-2": "job-2", "job-3": "job-1"}
+    assert _search_ids(dedupe=True) == ["job-1", "job-2"]
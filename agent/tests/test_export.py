@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+
+from conftest import insert_jobs
+
+import tools.job_search
+from tools.db_pool import pool_stats, direct_connection
+from tools.job_search import iter_active_jobs, JobSummary
+
+
+def test_export_streams_every_active_job_in_id_order(db):
+    insert_jobs(db, *({"id": f"job-{i:02d}", "is_active": i % 4 != 0} for i in range(10)))
+
+    jobs = list(iter_active_jobs(batch_size=3))
+    assert [job.id for job in jobs] == [f"job-{i:02d}" for i in range(10) if i % 4 != 0]
+    assert jobs[0].description == ""
+
+    summaries = list(iter_active_jobs(batch_size=3, projection="summary"))
+    assert {type(job) for job in summaries} == {JobSummary}
+
+
+def test_export_streams_from_its_own_connection(db, monkeypatch):
+    insert_jobs(db, *({"id": f"job-{i:02d}"} for i in range(10)))
+    opened = []
+
+    @contextmanager
+    def recording_connection(replica=False):
+        with direct_connection(replica) as conn:
+            opened.append(conn)
+            yield conn
+
+    monkeypatch.setattr(tools.job_search, "direct_connection", recording_connection)
+
+    export = iter_active_jobs(batch_size=2)
+    assert next(export).id == "job-00"
+    # A long stream must not hold one of the shared pool's connections
+    assert pool_stats().get("in_use", 0) == 0
+    assert len(opened) == 1 and not opened[0].closed
+    export.close()
+    assert opened[0].closed
+    assert len(list(iter_active_jobs())) == 10
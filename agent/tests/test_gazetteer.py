@@ -0,0 +1,106 @@
+import pytest
+
+from conftest import insert_jobs
+
+from tools.gazetteer import resolve_location, normalize_job_location
+from tools.job_search import LOCATION_RULES, search_jobs_page_sync
+from tools.derived_rules import refresh_rules
+
+
+@pytest.mark.parametrize("text, codes, city_slug", [
+    ("UK", ("gb",), None),
+    ("  great   Britain ", ("gb",), None),
+    ("deutschland", ("de",), None),
+    ("NYC", ("us",), "us-new-york"),
+    ("São Paulo", ("br",), "br-sao-paulo"),
+    ("sao paulo", ("br",), "br-sao-paulo"),
+    ("DACH", ("at", "ch", "de"), None),
+])
+def test_resolve_location(text, codes, city_slug):
+    place = resolve_location(text)
+    assert (place.country_codes, place.city_slug) == (codes, city_slug)
+    assert resolve_location(place.key) == place
+
+
+def test_unknown_locations_do_not_resolve():
+    assert resolve_location("Atlantis") is None
+    assert resolve_location("") is None
+
+
+@pytest.mark.parametrize("location, country, expected", [
+    ("London", "United Kingdom", ("gb", "gb-london")),
+    ("Remote (US)", None, ("us", None)),
+    ("Berlin, Germany", None, ("de", "de-berlin")),
+    # A city in another country than the country column is not trusted
+    ("London", "Canada", ("ca", None)),
+    ("Remote", "Europe", (None, None)),
+])
+def test_normalize_job_location(location, country, expected):
+    assert normalize_job_location(location, country) == expected
+
+
+def _ids(**kwargs):
+    return sorted(job.id for job in search_jobs_page_sync(limit=50, **kwargs).jobs)
+
+
+def test_location_filters_use_the_normalized_columns(db):
+    # Plain inserts - the trigger derives the columns, no loader involved
+    insert_jobs(db, {"id": "job-london", "location": "London", "country": "UK"},
+                {"id": "job-manchester", "location": "Manchester", "country": "England"},
+                {"id": "job-berlin", "location": "Berlin", "country": "Deutschland"},
+                {"id": "job-austin", "location": "Austin, TX", "country": "USA"},
+                {"id": "job-moon", "location": "Moon Base", "country": "Lunar Colony"})
+
+    assert _ids(country="United Kingdom") == ["job-london", "job-manchester"]
+    assert _ids(country="UK") == ["job-london", "job-manchester"]
+    assert _ids(country="london") == ["job-london"]
+    assert _ids(country="Europe") == ["job-berlin", "job-london", "job-manchester"]
+    assert _ids(country="dach") == ["job-berlin"]
+    assert _ids(country="america") == ["job-austin"]
+    # Unknown places fall back to a substring match on the raw country
+    assert _ids(country="lunar") == ["job-moon"]
+
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET location = 'Munich', country = 'Germany' WHERE id = 'job-london'")
+    assert _ids(country="germany") == ["job-berlin", "job-london"]
+
+
+@pytest.mark.parametrize("location, country", [
+    ("London", "United Kingdom"), ("Remote (US)", None), ("Berlin, Germany", None), ("London", "Canada"),
+    ("Remote", "Europe"), ("São Paulo", "Brasil"), ("Austin, TX / Remote", "U.S.A."), ("Paris or London", None),
+    ("  NYC  ", ""), ("Toronto – Hybrid", "canada"), (None, "Deutschland"), ("Moon Base", "Lunar Colony"),
+    ("Hybrid | Stockholm and Remote", None), ("St. Petersburg", None),
+])
+def test_sql_location_matches_python(db, location, country):
+    with db.cursor() as cur:
+        cur.execute("SELECT country_code, city_slug FROM job_location(%s, %s)", (location, country))
+        assert cur.fetchone() == normalize_job_location(location, country)
+
+
+def test_changed_gazetteer_rederives_jobs(db):
+    insert_jobs(db, {"id": "job-1", "location": "Atlantis", "country": None})
+    assert refresh_rules(LOCATION_RULES) == 0  # loaded by the migration; nothing to re-derive
+    assert refresh_rules(LOCATION_RULES) == 0
+
+    atlantis = ["atlantis", ["gr"], "gr-atlantis"]
+    rules = LOCATION_RULES._replace(data=LOCATION_RULES.data + [atlantis])
+    assert refresh_rules(rules) == 1
+    with db.cursor() as cur:
+        cur.execute("SELECT country_code, city_slug FROM jobs")
+        assert cur.fetchall() == [("gr", "gr-atlantis")]
+
+
+def test_sql_location_matches_python_for_every_gazetteer_name(db):
+    from tools.gazetteer import GAZETTEER
+
+    names = list(GAZETTEER)
+    pairs = [(name.upper(), None) for name in names] + [(f"{a}, {b}", c) for a, b, c in
+                                                        zip(names, reversed(names), names[::3])]
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT d.country_code, d.city_slug
+            FROM unnest(%s::text[], %s::text[]) WITH ORDINALITY AS p(location, country, n)
+            CROSS JOIN LATERAL job_location(p.location, p.country) d
+            ORDER BY p.n
+        """, ([p[0] for p in pairs], [p[1] for p in pairs]))
+        assert cur.fetchall() == [normalize_job_location(*p) for p in pairs]
@@ -0,0 +1,82 @@
+import asyncio
+
+import psycopg2
+
+from conftest import TEST_DATABASE_URL, insert_jobs
+
+from tools import job_archive
+from tools.job_archive import archive_inactive_jobs, archive_periodically, ARCHIVE_LOCK_KEY
+from tools.job_search import get_job_by_id
+from tools.user_context import get_user_job_interests
+
+
+def _ids(db, table):
+    with db.cursor() as cur:
+        cur.execute(f"SELECT id FROM {table} ORDER BY id")
+        return [row[0] for row in cur.fetchall()]
+
+
+def _seed(db):
+    insert_jobs(db, {"id": "job-live"}, {"id": "job-recent", "is_active": False},
+                {"id": "job-old-1", "title": "Retired Coach", "is_active": False},
+                {"id": "job-old-2", "is_active": False})
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET updated_at = NOW() - interval '40 days' WHERE id LIKE 'job-old-%'")
+        cur.execute("INSERT INTO job_lsh_buckets (band, bucket, job_id) VALUES (0, 1, 'job-old-1'), (0, 1, 'job-live')")
+
+
+def test_archives_only_long_inactive_jobs(db):
+    _seed(db)
+
+    result = archive_inactive_jobs(older_than_days=30, batch_size=1)
+    assert (result["archived"], result["batches"]) == (2, 2)
+    assert _ids(db, "jobs") == ["job-live", "job-recent"]
+    assert _ids(db, "jobs_archive") == ["job-old-1", "job-old-2"]
+    with db.cursor() as cur:
+        cur.execute("SELECT job_id FROM job_lsh_buckets")
+        assert cur.fetchall() == [("job-live",)]
+
+    assert archive_inactive_jobs(older_than_days=30)["archived"] == 0
+
+
+def test_archived_jobs_stay_readable(db):
+    _seed(db)
+    with db.cursor() as cur:
+        cur.execute("INSERT INTO user_job_interests (user_id, job_id, interest_type) VALUES ('user-1', 'job-old-1', 'saved')")
+    archive_inactive_jobs(older_than_days=30)
+
+    assert get_job_by_id("job-old-1").title == "Retired Coach"
+    interests = get_user_job_interests("user-1")["interests"]
+    assert [(i["job_id"], i["title"]) for i in interests] == [("job-old-1", "Retired Coach")]
+
+
+def test_concurrent_run_is_skipped(db):
+    _seed(db)
+    holder = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        with holder.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (ARCHIVE_LOCK_KEY,))
+        result = archive_inactive_jobs(older_than_days=30)
+        assert result["skipped"] and result["archived"] == 0
+        assert "job-old-1" in _ids(db, "jobs")
+    finally:
+        holder.close()
+
+    assert archive_inactive_jobs(older_than_days=30)["archived"] == 2
+
+
+def test_schedule_waits_an_interval_before_each_run(monkeypatch):
+    runs = []
+    monkeypatch.setattr(job_archive, "archive_inactive_jobs", lambda: runs.append(1))
+
+    async def scenario():
+        task = asyncio.create_task(archive_periodically(0.2))
+        await asyncio.sleep(0.1)
+        before = len(runs)
+        await asyncio.sleep(0.4)
+        task.cancel()
+        return before, len(runs)
+
+    before, after = asyncio.run(scenario())
+    assert before == 0  # nothing runs at boot
+    assert after >= 1
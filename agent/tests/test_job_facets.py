@@ -0,0 +1,86 @@
+import pytest
+
+from conftest import insert_jobs
+
+from tools.job_facets import FACET_RULES, extract_seniority, extract_games, resolve_game, resolve_seniority
+from tools.derived_rules import refresh_rules
+
+
+@pytest.mark.parametrize("title, level", [
+    ("Lead Generation Specialist", None),
+    ("Lead Gen Executive - Esports Sponsorships", None),
+    ("Lead-Gen Coordinator", None),
+    ("Senior Lead Generation Manager", "senior"),
+    ("Lead Producer", "lead"),
+    ("Team Lead, Community", "lead"),
+    ("Esports Lead", "lead"),
+    ("Leading Esports Org - Video Editor", None),
+    ("Head of Partnerships", "executive"),
+    ("Junior Video Editor", "entry"),
+    ("Marketing Intern", "intern"),
+])
+def test_seniority_from_title(title, level):
+    assert extract_seniority(title) == level
+
+
+def test_seniority_falls_back_to_description():
+    assert extract_seniority("Video Editor", "Entry-level role, no experience required") == "entry"
+    assert extract_seniority("Lead Generation Specialist", "Own lead generation for 5+ years") == "senior"
+
+
+def test_games_and_query_resolution():
+    assert extract_games("Counter-Strike and Valorant analyst") == ["cs2", "valorant"]
+    assert resolve_game("LoL") == "league-of-legends"
+    assert resolve_seniority("Entry-level") == "entry"
+
+
+def _ids(**kwargs):
+    from tools.job_search import search_jobs_page_sync
+
+    return sorted(job.id for job in search_jobs_page_sync(limit=50, **kwargs).jobs)
+
+
+def test_facet_filters_find_directly_inserted_jobs(db):
+    # Plain inserts - the trigger tags the jobs, no loader involved
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach", "location": "Remote"},
+                {"id": "job-2", "title": "Lead Generation Specialist", "description": "VCT partnerships"},
+                {"id": "job-3", "title": "Lead Producer", "skills": ["Counter-Strike"]})
+
+    assert _ids(game="valorant") == ["job-1", "job-2"]
+    assert _ids(game="counter strike") == ["job-3"]
+    assert _ids(seniority="lead") == ["job-3"]
+    assert _ids(remote=True) == ["job-1"]
+
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET title = 'Senior Valorant Coach', location = 'London' WHERE id = 'job-1'")
+    assert _ids(seniority="senior") == ["job-1"]
+    assert _ids(remote=False) == ["job-1", "job-2", "job-3"]
+
+
+@pytest.mark.parametrize("title, description, skills", [
+    ("Lead Generation Specialist", "Own lead generation for 5+ years", None),
+    ("Senior Lead Generation Manager", "", ["CS:GO", "Dota"]),
+    ("Video Editor", "Entry-level role, no experience required. LCK and LEC coverage", []),
+    ("Head of Esports (Overwatch 2 / OWL)", "Rainbow Six, R6S and FIFA", ["Apex"]),
+    ("Marketing Intern - Mobile Legends: Bang Bang", None, ["MLBB"]),
+    ("Leading Esports Org - Video Editor", "counter strike, valorant and league of legends", None),
+])
+def test_sql_facets_match_python(db, title, description, skills):
+    with db.cursor() as cur:
+        cur.execute("SELECT games, seniority FROM job_facets(%s, %s, %s, NULL, NULL)", (title, description, skills))
+        text = " ".join(skills or [])
+        assert cur.fetchone() == (extract_games(title, text, description), extract_seniority(title, description))
+
+
+def test_changed_rules_retag_jobs(db):
+    insert_jobs(db, {"id": "job-1", "title": "Lead Generation Specialist"}, {"id": "job-2", "title": "Lead Producer"})
+    assert refresh_rules(FACET_RULES) == 0
+
+    # Rules that forgot to strip "lead generation" tag job-1 too ...
+    rules = FACET_RULES._replace(data=[r for r in FACET_RULES.data if r[0] != "not_seniority"] +
+                                 [["not_seniority", 0, None, "^$"]])
+    assert refresh_rules(rules) == 1
+    assert _ids(seniority="lead") == ["job-1", "job-2"]
+    # ... until the fixed ones are loaded again
+    assert refresh_rules(FACET_RULES) == 1
+    assert _ids(seniority="lead") == ["job-2"]
@@ -0,0 +1,44 @@
+from conftest import insert_jobs
+
+from tools.job_index import JobIndex
+
+
+def _ids(index, **kwargs):
+    return [job.id for job in index.search(limit=50, **kwargs)]
+
+
+def test_incremental_refresh_sees_deactivation_outside_the_loader(db):
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach"},
+                {"id": "job-2", "title": "Valorant Analyst"})
+    index = JobIndex()
+    index.refresh()
+    assert sorted(_ids(index, query="valorant")) == ["job-1", "job-2"]
+
+    # A plain UPDATE that never mentions updated_at - the trigger bumps it
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET is_active = false WHERE id = 'job-2'")
+        cur.execute("UPDATE jobs SET title = 'Valorant Head Coach' WHERE id = 'job-1'")
+    assert index.refresh() == 2
+    assert _ids(index, query="valorant") == ["job-1"]
+    assert index.docs["job-1"].title == "Valorant Head Coach"
+
+
+def test_trigger_keeps_explicit_updated_at(db):
+    insert_jobs(db, {"id": "job-1"})
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET is_active = false, updated_at = NOW() - interval '40 days' WHERE id = 'job-1'")
+        cur.execute("SELECT updated_at < NOW() - interval '39 days' FROM jobs WHERE id = 'job-1'")
+        assert cur.fetchone()[0]
+
+
+def test_full_refresh_drops_deleted_jobs(db):
+    insert_jobs(db, {"id": "job-1"}, {"id": "job-2"})
+    index = JobIndex()
+    index.refresh()
+    with db.cursor() as cur:
+        cur.execute("DELETE FROM jobs WHERE id = 'job-2'")
+
+    index.refresh()
+    assert "job-2" in index.docs  # a delete leaves no row for the watermark to find
+    index.refresh(full=True)
+    assert sorted(index.docs) == ["job-1"]
@@ -0,0 +1,76 @@
+import io
+import json
+
+import pytest
+
+from tools.job_loader import load_jobs, FeedError
+
+
+def _feed(*jobs):
+    return io.StringIO("".join(json.dumps(job) + "\n" for job in jobs))
+
+
+def _rows(db):
+    with db.cursor() as cur:
+        cur.execute("SELECT id, title, is_active, country_code, seniority FROM jobs ORDER BY id")
+        return cur.fetchall()
+
+
+FEED = [
+    {"id": "job-1", "title": "Senior Valorant Coach", "location": "Berlin", "country": "Germany"},
+    {"id": "job-2", "title": "Community Manager", "location": "London", "country": "United Kingdom",
+     "skills": "discord; twitter"},
+]
+
+
+def test_load_reload_and_deactivate(db):
+    stats = load_jobs(_feed(*FEED))
+    assert (stats["read"], stats["inserted"], stats["updated"]) == (2, 2, 0)
+    # Derived columns are filled by the load itself
+    assert _rows(db) == [("job-1", "Senior Valorant Coach", True, "de", "senior"),
+                         ("job-2", "Community Manager", True, "gb", None)]
+
+    stats = load_jobs(_feed(*FEED))
+    assert (stats["inserted"], stats["updated"], stats["unchanged"], stats["deactivated"]) == (0, 0, 2, 0)
+
+    stats = load_jobs(_feed({**FEED[0], "title": "Lead Valorant Coach"}))
+    assert (stats["updated"], stats["deactivated"]) == (1, 1)
+    assert _rows(db) == [("job-1", "Lead Valorant Coach", True, "de", "lead"),
+                         ("job-2", "Community Manager", False, "gb", None)]
+
+
+def test_source_scopes_deactivation(db):
+    load_jobs(_feed(FEED[0]), source="board-a")
+    load_jobs(_feed(FEED[1]), source="board-b")
+    assert [row[2] for row in _rows(db)] == [True, True]
+
+
+def test_empty_feed_deactivates_nothing(db):
+    load_jobs(_feed(*FEED))
+    with pytest.raises(FeedError):
+        load_jobs(_feed())
+    assert [row[2] for row in _rows(db)] == [True, True]
+
+
+def test_csv_feed_with_aliases_and_awkward_text(db):
+    feed = io.StringIO(
+        "id,title,job_type,url,skills,description,date_posted\n"
+        '7,Caster,Part-time,https://example.com/7,"commentary; obs",'
+        '"Tabs\tand\nnewlines, \\backslashes",2026-09-01T10:00:00Z\n'
+        "7,Caster,Part-time,https://example.com/7,commentary,,2026-09-01T10:00:00Z\n"
+    )
+    stats = load_jobs(feed, format="csv")
+    # A job listed twice is upserted once
+    assert (stats["read"], stats["inserted"]) == (2, 1)
+
+    with db.cursor() as cur:
+        cur.execute("SELECT id, type, external_url, skills, description, posted_date::date::text FROM jobs")
+        assert cur.fetchall() == [("7", "Part-time", "https://example.com/7", ["commentary", "obs"],
+                                   "Tabs\tand\nnewlines, \\backslashes", "2026-09-01")]
+
+
+def test_feed_without_ids_changes_nothing(db):
+    load_jobs(_feed(*FEED))
+    with pytest.raises(FeedError):
+        load_jobs(_feed({"id": "job-3", "title": "Analyst"}, {"title": "No id"}))
+    assert [row[0] for row in _rows(db)] == ["job-1", "job-2"]
@@ -0,0 +1,18 @@
+from conftest import insert_jobs, run_async
+
+from tools.job_search import get_jobs_by_ids, get_jobs_by_ids_async, get_job_by_id
+
+
+def test_get_jobs_by_ids_keeps_order_and_skips_unknown(db):
+    insert_jobs(db, {"id": "job-1"}, {"id": "job-2"}, {"id": "job-3"})
+
+    ids = ["job-3", "missing", "job-1", "job-3"]
+    assert [job.id for job in get_jobs_by_ids(ids)] == ["job-3", "job-1", "job-3"]
+    assert [job.id for job in run_async(get_jobs_by_ids_async(ids))] == ["job-3", "job-1", "job-3"]
+    assert get_job_by_id("missing") is None
+
+
+def test_get_jobs_by_ids_accepts_non_string_ids(db):
+    insert_jobs(db, {"id": "42"})
+
+    assert [job.id for job in get_jobs_by_ids([42])] == ["42"]
@@ -0,0 +1,91 @@
+import pytest
+
+from conftest import insert_jobs, run_async
+
+from tools import job_index
+from tools.job_search import (
+    search_jobs_sync, search_jobs_page, search_jobs_page_sync, search_jobs_page_async,
+    JobSearchResult, JobCard, JobSummary, _decode_cursor,
+)
+
+
+def _ids(**kwargs):
+    return [job.id for job in search_jobs_sync(limit=20, **kwargs)]
+
+
+def test_title_matches_outrank_description_matches(db):
+    # job-desc is newer, so only the rank can put job-title first
+    insert_jobs(db, {"id": "job-desc", "title": "Social Media Manager", "description": "Work with our Valorant roster"},
+                {"id": "job-company", "title": "Analyst", "company": "Valorant Champions Tour"},
+                {"id": "job-title", "title": "Valorant Coach"},
+                {"id": "job-other", "title": "Dota 2 Coach"})
+
+    assert _ids(query="valorant") == ["job-title", "job-company", "job-desc"]
+    assert _ids(query="valorant", sort="recent") == ["job-desc", "job-company", "job-title"]
+
+
+def test_query_is_stemmed_and_uses_web_search_syntax(db):
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach"}, {"id": "job-2", "title": "Dota 2 Coach"},
+                {"id": "job-3", "title": "Head of Coaching"})
+
+    assert sorted(_ids(query="coaches")) == ["job-1", "job-2", "job-3"]
+    assert sorted(_ids(query="coach -valorant")) == ["job-2", "job-3"]
+    assert _ids(query='"head of coaching"') == ["job-3"]
+
+
+def test_search_vector_follows_updates(db):
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach"})
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET title = 'League of Legends Coach' WHERE id = 'job-1'")
+
+    assert _ids(query="valorant") == []
+    assert _ids(query="league") == ["job-1"]
+
+
+def test_similarity_threshold_tolerates_typos(db):
+    insert_jobs(db, {"id": "job-title", "title": "Valorant Coach", "company": "Team Liquid"},
+                {"id": "job-company", "title": "Content Creator", "company": "Fnatic"},
+                {"id": "job-other", "title": "Dota 2 Analyst", "company": "OG"})
+
+    assert _ids(query="valarant") == []
+    assert _ids(query="valarant", similarity_threshold=0.4) == ["job-title"]
+    assert _ids(query="fnatik", similarity_threshold=0.4) == ["job-company"]
+    # A strict threshold rejects the same typo
+    assert _ids(query="valarant", similarity_threshold=0.9) == []
+
+
+def test_fuzzy_mode_keeps_exact_matches_first(db):
+    insert_jobs(db, {"id": "job-fuzzy", "title": "Valarant Scout"}, {"id": "job-exact", "title": "Valorant Coach"})
+
+    assert _ids(query="valorant", similarity_threshold=0.4) == ["job-exact", "job-fuzzy"]
+
+
+@pytest.mark.parametrize("projection, model", [("full", JobSearchResult), ("card", JobCard), ("summary", JobSummary)])
+def test_projection_picks_the_model_and_its_columns(db, projection, model):
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach", "description": "Long text", "salary": None,
+                     "skills": ["vod review"], "external_url": "https://example.com/job-1"})
+
+    for page in (search_jobs_page_sync(query="valorant", projection=projection),
+                 run_async(search_jobs_page_async(query="valorant", projection=projection))):
+        job = page.jobs[0]
+        assert type(job) is model
+        assert set(job.model_dump()) == set(model.model_fields)
+        assert (job.id, job.title, job.company) == ("job-1", "Valorant Coach", "Fnatic")
+        if model is not JobSummary:
+            assert (job.salary, job.url) == ("Competitive", "https://example.com/job-1")
+
+
+def test_index_pages_are_projected_too(db, monkeypatch):
+    monkeypatch.setattr(job_index, "JOB_INDEX_ENABLED", True)
+    monkeypatch.setattr(job_index, "_index", None)
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach"}, {"id": "job-2", "title": "Valorant Analyst"})
+
+    first = search_jobs_page(query="valorant", limit=1, projection="summary")
+    assert _decode_cursor(first.next_cursor)["s"] == "index"
+    following = search_jobs_page(cursor=first.next_cursor, limit=1, projection="summary")
+    assert [type(job) for job in first.jobs + following.jobs] == [JobSummary, JobSummary]
+
+
+def test_unknown_projection_is_rejected(db):
+    with pytest.raises(ValueError):
+        search_jobs_page_sync(query="valorant", projection="everything")
@@ -0,0 +1,75 @@
+import threading
+
+from conftest import BASE_SCHEMA
+
+from tools import migrations
+from tools.migrations import Migration, run_migrations, latest_version
+
+
+def _versions(db):
+    with db.cursor() as cur:
+        cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+        return [row[0] for row in cur.fetchall()]
+
+
+def _reset_schema(db):
+    with db.cursor() as cur:
+        cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+        cur.execute(BASE_SCHEMA)
+
+
+def test_current_schema_takes_the_fast_path(db, monkeypatch):
+    def fail(conn):
+        raise AssertionError("migrations re-applied")
+
+    monkeypatch.setattr(migrations, "_apply_pending", fail)
+    assert run_migrations() == latest_version()
+
+
+def test_concurrent_workers_apply_each_migration_once(db):
+    _reset_schema(db)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(run_migrations())) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [latest_version()] * 3
+    assert _versions(db) == [m.version for m in migrations.MIGRATIONS]
+
+
+def test_failed_migration_is_not_recorded(db, monkeypatch):
+    broken = Migration(latest_version() + 1, "broken", "ALTER TABLE no_such_table ADD COLUMN x INT")
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [broken])
+
+    assert run_migrations() is None
+    assert _versions(db)[-1] == broken.version - 1
+
+
+def _derived(db, job_id):
+    with db.cursor() as cur:
+        cur.execute("SELECT country_code, salary_min_usd, seniority, dedup_hash FROM jobs WHERE id = %s", (job_id,))
+        return cur.fetchone()
+
+
+def test_existing_jobs_are_derived_by_the_refresh_step_not_at_startup(db, monkeypatch):
+    from tools.job_loader import refresh_derived_columns
+
+    _reset_schema(db)
+    with db.cursor() as cur:
+        cur.execute("""INSERT INTO jobs (id, title, location, country, salary)
+                       VALUES ('job-1', 'Senior Valorant Coach', 'Berlin', 'Germany', '$50,000 - $60,000')""")
+    assert run_migrations() == latest_version()
+    assert _derived(db, "job-1") == (None, None, None, None)
+
+    # Rows written after the migrations are derived by the triggers
+    with db.cursor() as cur:
+        cur.execute("""INSERT INTO jobs (id, title, location, country, salary)
+                       VALUES ('job-2', 'Junior Analyst', 'Paris', 'France', '€40k per year')""")
+    assert _derived(db, "job-2")[:3] == ("fr", 43200, "entry")
+
+    refresh_derived_columns()
+    country_code, salary_min_usd, seniority, dedup_hash = _derived(db, "job-1")
+    assert (country_code, salary_min_usd, seniority) == ("de", 50000, "senior")
+    assert dedup_hash
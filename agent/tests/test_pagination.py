@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import insert_jobs, run_async
+
+from tools import job_index
+from tools.job_search import search_jobs_page, search_jobs_page_sync, search_jobs_page_async, _decode_cursor
+
+
+def _walk(first_page, next_page):
+    """Every job id across all pages, following next_cursor."""
+    ids = [job.id for job in first_page.jobs]
+    cursor = first_page.next_cursor
+    pages = 1
+    while cursor:
+        page = next_page(cursor)
+        ids += [job.id for job in page.jobs]
+        cursor = page.next_cursor
+        pages += 1
+        assert pages < 50, "pagination does not terminate"
+    return ids
+
+
+def test_sql_keyset_walks_every_job_once(db):
+    insert_jobs(db, *({"id": f"job-{i:02d}", "title": f"Community Manager {i}"} for i in range(12)))
+
+    first = search_jobs_page_sync(sort="recent", limit=5)
+    ids = _walk(first, lambda cursor: search_jobs_page_sync(cursor=cursor, limit=5))
+    # posted_date descends with the insert order
+    assert ids == [f"job-{i:02d}" for i in range(12)]
+
+
+@pytest.fixture
+def index_enabled(monkeypatch):
+    monkeypatch.setattr(job_index, "JOB_INDEX_ENABLED", True)
+    monkeypatch.setattr(job_index, "_index", None)
+
+
+def test_sync_path_continues_an_index_cursor(db, index_enabled):
+    insert_jobs(db, *({"id": f"job-{i}", "title": "Valorant Analyst"} for i in range(5)))
+
+    first = search_jobs_page(query="valorant", limit=2)
+    assert _decode_cursor(first.next_cursor)["s"] == "index"
+
+    ids = _walk(first, lambda cursor: search_jobs_page_sync(cursor=cursor, limit=2))
+    assert sorted(ids) == [f"job-{i}" for i in range(5)]
+    assert len(ids) == 5
+
+
+def _search_async(**kwargs):
+    return run_async(search_jobs_page_async(**kwargs))
+
+
+@pytest.mark.parametrize("search", [search_jobs_page_sync, _search_async])
+def test_relevance_pages_past_equal_ranks(db, search):
+    # Identical titles rank equally, so every boundary falls inside a tie on rank
+    insert_jobs(db, *({"id": f"job-{i:02d}", "title": "Community Manager"} for i in range(12)))
+    insert_jobs(db, {"id": "job-top", "title": "Community Manager, Community Events"})
+
+    for kwargs in ({}, {"similarity_threshold": 0.4}):
+        first = search(query="community manager", limit=5, **kwargs)
+        ids = _walk(first, lambda cursor: search(cursor=cursor, limit=5))
+        assert len(ids) == 13, kwargs
+        assert sorted(ids) == sorted([f"job-{i:02d}" for i in range(12)] + ["job-top"])
+        assert ids[0] == "job-top"
@@ -0,0 +1,80 @@
+import psycopg2
+import pytest
+
+from conftest import TEST_DATABASE_URL, insert_jobs
+
+from tools import prepared
+from tools.prepared import execute, to_server_params, statement_name
+from tools.job_search import get_jobs_by_ids, search_jobs_sync
+
+LOOKUP_SQL = "SELECT title FROM jobs WHERE id = %s AND title NOT LIKE '%%draft%%'"
+
+
+def _prepared_statements(cur):
+    cur.execute("SELECT name FROM pg_prepared_statements ORDER BY name")
+    return [row[0] for row in cur.fetchall()]
+
+
+@pytest.fixture
+def conn(db):
+    insert_jobs(db, {"id": "job-1", "title": "Valorant Coach"}, {"id": "job-2", "title": "Dota 2 Coach"})
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    conn.autocommit = True
+    yield conn
+    conn.close()
+
+
+def test_to_server_params():
+    assert to_server_params(LOOKUP_SQL) == ("SELECT title FROM jobs WHERE id = $1 AND title NOT LIKE '%draft%'", 1)
+    assert statement_name("SELECT  1\n") == statement_name("SELECT 1")
+
+
+def test_each_shape_is_prepared_once_per_connection(conn):
+    with conn.cursor() as cur:
+        for job_id, title in (("job-1", "Valorant Coach"), ("job-2", "Dota 2 Coach"), ("job-1", "Valorant Coach")):
+            execute(cur, LOOKUP_SQL, [job_id])
+            assert cur.fetchone() == (title,)
+        assert _prepared_statements(cur) == [statement_name(LOOKUP_SQL)]
+
+        with pytest.raises(ValueError):
+            execute(cur, "SELECT %s, %s", [1])
+
+
+def test_least_recently_used_statements_are_deallocated(conn, monkeypatch):
+    monkeypatch.setattr(prepared, "PREPARED_MAX_PER_CONNECTION", 2)
+    shapes = [f"SELECT {n} + %s" for n in range(3)]
+    with conn.cursor() as cur:
+        execute(cur, shapes[0], [1])
+        execute(cur, shapes[1], [1])
+        execute(cur, shapes[0], [1])  # shapes[1] is now the least recently used
+        execute(cur, shapes[2], [1])
+        assert cur.fetchone() == (3,)
+        assert _prepared_statements(cur) == sorted(statement_name(s) for s in (shapes[0], shapes[2]))
+
+
+def test_lost_statements_are_prepared_again(conn):
+    with conn.cursor() as cur:
+        execute(cur, LOOKUP_SQL, ["job-1"])
+        cur.execute("DEALLOCATE ALL")
+        with pytest.raises(psycopg2.Error):
+            execute(cur, LOOKUP_SQL, ["job-1"])
+        execute(cur, LOOKUP_SQL, ["job-1"])
+        assert cur.fetchone() == ("Valorant Coach",)
+
+
+def test_disabled_runs_plain_statements(conn, monkeypatch):
+    monkeypatch.setattr(prepared, "PREPARED_ENABLED", False)
+    with conn.cursor() as cur:
+        execute(cur, LOOKUP_SQL, ["job-2"])
+        assert cur.fetchone() == ("Dota 2 Coach",)
+        assert _prepared_statements(cur) == []
+
+
+def test_hot_queries_run_prepared_on_pooled_connections(conn):
+    before = prepared.prepared_stats()
+    for _ in range(3):
+        assert [job.id for job in get_jobs_by_ids(["job-2", "job-1"])] == ["job-2", "job-1"]
+        assert [job.id for job in search_jobs_sync(query="valarant", similarity_threshold=0.4)] == ["job-1"]
+    after = prepared.prepared_stats()
+    assert after["prepared"] - before["prepared"] == 2
+    assert after["executed"] - before["executed"] == 6
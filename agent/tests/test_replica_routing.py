@@ -0,0 +1,65 @@
+import pytest
+
+from conftest import TEST_DATABASE_URL, run_async
+
+from tools import db_pool
+from tools.db_pool import get_connection, get_async_connection, mark_user_write, close_pool
+
+
+def _server(**kwargs):
+    """Which pool served the checkout: the application_name its URL set."""
+    with get_connection(**kwargs) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SHOW application_name")
+            return cur.fetchone()[0]
+
+
+def _server_async(**kwargs):
+    async def show():
+        async with get_async_connection(**kwargs) as conn:
+            cur = await conn.execute("SHOW application_name")
+            return (await cur.fetchone())[0]
+    return run_async(show())
+
+
+@pytest.fixture
+def replica(db, monkeypatch):
+    """The test database again, told apart by application_name."""
+    monkeypatch.setenv("DATABASE_URL", f"{TEST_DATABASE_URL}&application_name=primary")
+    monkeypatch.setenv("DATABASE_READ_URL", f"{TEST_DATABASE_URL}&application_name=replica")
+    monkeypatch.setattr(db_pool, "_last_writes", {})
+    close_pool()
+    yield
+    close_pool()
+
+
+@pytest.mark.parametrize("server", [_server, _server_async])
+def test_reads_go_to_the_replica_and_writes_to_the_primary(replica, server):
+    assert server(read_only=True) == "replica"
+    assert server(read_only=True, user_id="user-1") == "replica"
+    assert server() == "primary"
+
+
+@pytest.mark.parametrize("server", [_server, _server_async])
+def test_a_users_reads_follow_their_writes(replica, monkeypatch, server):
+    mark_user_write("user-1")
+    assert server(read_only=True, user_id="user-1") == "primary"
+    assert server(read_only=True, user_id="user-2") == "replica"
+
+    monkeypatch.setattr(db_pool, "READ_YOUR_WRITES_SECONDS", 0)
+    assert server(read_only=True, user_id="user-1") == "replica"
+
+
+@pytest.mark.parametrize("server", [_server, _server_async])
+def test_unreachable_replica_falls_back_to_the_primary(replica, monkeypatch, server):
+    monkeypatch.setenv("DATABASE_READ_URL", "postgresql://postgres@/esports_test?host=/nonexistent&port=1")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "1")
+    assert server(read_only=True) == "primary"
+
+
+def test_direct_connections_can_target_the_replica(replica):
+    for replica_requested, expected in ((True, "replica"), (False, "primary")):
+        with db_pool.direct_connection(replica=replica_requested) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SHOW application_name")
+                assert cur.fetchone()[0] == expected
@@ -0,0 +1,95 @@
+import pytest
+
+from conftest import insert_jobs
+
+from tools.salary import SALARY_RULES, USD_RATES
+from tools.derived_rules import refresh_rules
+from tools.job_search import search_jobs_page_sync
+
+
+def _parse(db, text, country_code=None):
+    with db.cursor() as cur:
+        cur.execute("SELECT * FROM parse_salary(%s, %s)", (text, country_code))
+        return cur.fetchone()
+
+
+@pytest.mark.parametrize("text, country_code, expected", [
+    ("£30k-£40k per year", None, ("GBP", "year", 30_000, 40_000, 38_100, 50_800)),
+    ("$25/hr", None, ("USD", "hour", 52_000, 52_000, 52_000, 52_000)),
+    ("€3.500 pro Monat", None, ("EUR", "month", 42_000, 42_000, 45_360, 45_360)),
+    ("Up to 80,000 USD", None, ("USD", "year", None, 80_000, None, 80_000)),
+    ("From $90,000", None, ("USD", "year", 90_000, None, 90_000, None)),
+    ("50-60k per annum", None, (None, "year", 50_000, 60_000, None, None)),
+    # No currency in the text - the job's country supplies it
+    ("3000 per month", "de", ("EUR", "month", 36_000, 36_000, 38_880, 38_880)),
+    ("2000 per month", "de", ("EUR", "month", 24_000, 24_000, 25_920, 25_920)),
+    # Whole symbols, longest first: US$ is not S$
+    ("US$60,000 - US$80,000", None, ("USD", "year", 60_000, 80_000, 60_000, 80_000)),
+    ("30 000 - 40 000 EUR", None, ("EUR", "year", 30_000, 40_000, 32_400, 43_200)),
+    ("S$5,000 per month", None, ("SGD", "month", 60_000, 60_000, 44_400, 44_400)),
+    # The annual cue wins over the working hours
+    ("£28,000 - £32,000 per annum, 37.5 hours per week", None, ("GBP", "year", 28_000, 32_000, 35_560, 40_640)),
+    # Percentages and years are not amounts
+    ("£45,000 pa + 10% bonus", None, ("GBP", "year", 45_000, 45_000, 57_150, 57_150)),
+    ("$100k+ (2024)", None, ("USD", "year", 100_000, None, 100_000, None)),
+    ("Graduate scheme 2025, £27k", None, ("GBP", "year", 27_000, 27_000, 34_290, 34_290)),
+    # The cue next to the amounts, not the first one in the text
+    ("Weekly standups; $40 per hour", None, ("USD", "hour", 83_200, 83_200, 83_200, 83_200)),
+])
+def test_parse_salary(db, text, country_code, expected):
+    assert _parse(db, text, country_code) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "Competitive", "DOE", "Competitive + 25 days holiday", "50-60k",
+                                  "1.2.3", "10%"])
+def test_unparseable_salaries(db, text):
+    assert _parse(db, text, "gb") == (None,) * 6
+
+
+def _ids(**kwargs):
+    return [job.id for job in search_jobs_page_sync(limit=50, **kwargs).jobs]
+
+
+@pytest.fixture
+def salaried_jobs(db):
+    # Plain inserts - the trigger parses the salaries, no loader involved
+    insert_jobs(db, {"id": "job-gbp", "salary": "£30k-£40k per year"},
+                {"id": "job-hourly", "salary": "$25/hr", "country": "United States"},
+                {"id": "job-eur", "salary": "3000 per month", "location": "Berlin", "country": "Germany"},
+                {"id": "job-upto", "salary": "Up to 80,000 USD"},
+                {"id": "job-none", "salary": "Competitive"})
+
+
+def test_salary_range_filters_overlap(salaried_jobs):
+    assert sorted(_ids(salary_min=50_000)) == ["job-gbp", "job-hourly", "job-upto"]
+    assert sorted(_ids(salary_max=40_000)) == ["job-eur", "job-gbp"]
+    assert _ids(salary_min=45_000, salary_max=50_000) == ["job-gbp"]
+    # One-sided salaries count as a point: "up to 80,000" is not under 50,000
+    assert "job-upto" not in _ids(salary_max=50_000)
+
+
+def test_salary_sort_pages_best_paid_first(salaried_jobs):
+    page = search_jobs_page_sync(sort="salary", limit=2)
+    ids = [job.id for job in page.jobs]
+    while page.next_cursor:
+        page = search_jobs_page_sync(cursor=page.next_cursor, limit=2)
+        ids += [job.id for job in page.jobs]
+    # Unparsed salaries sort last
+    assert ids == ["job-upto", "job-hourly", "job-gbp", "job-eur", "job-none"]
+
+
+def test_edited_salary_and_location_are_reparsed(db, salaried_jobs):
+    with db.cursor() as cur:
+        cur.execute("UPDATE jobs SET salary = '£90k' WHERE id = 'job-none'")
+        # The currency of "3000 per month" follows the job's country
+        cur.execute("UPDATE jobs SET location = 'Zurich', country = 'Switzerland' WHERE id = 'job-eur'")
+        cur.execute("SELECT id, salary_currency, salary_max_annual FROM jobs WHERE id IN ('job-none', 'job-eur') "
+                    "ORDER BY id")
+        assert cur.fetchall() == [("job-eur", "CHF", 36_000), ("job-none", "GBP", 90_000)]
+
+
+def test_changed_fx_rates_rederive_usd_columns(salaried_jobs):
+    assert refresh_rules(SALARY_RULES) == 0
+    rules = SALARY_RULES._replace(data={**SALARY_RULES.data, "rates": {**USD_RATES, "GBP": 2.0}})
+    assert refresh_rules(rules) == 1
+    assert _ids(salary_min=70_000, salary_max=70_000) == ["job-gbp"]
@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import insert_jobs, run_async
+
+from tools.job_search import search_jobs_page_sync, search_jobs_page_async
+
+
+def _search_async(**kwargs):
+    return run_async(search_jobs_page_async(**kwargs))
+
+
+@pytest.fixture
+def jobs(db):
+    insert_jobs(db,
+                {"id": "job-1", "title": "Valorant Coach", "category": "coaching", "country": "Germany"},
+                {"id": "job-2", "title": "Valorant Analyst", "category": "coaching", "country": "France",
+                 "type": "Contract"},
+                {"id": "job-3", "title": "Valorant Caster", "category": "content", "country": "Germany"},
+                {"id": "job-4", "title": "Dota 2 Coach", "category": "coaching", "country": "Germany"},
+                {"id": "job-5", "title": "Valorant Coach", "category": "coaching", "is_active": False})
+
+
+@pytest.mark.parametrize("search", [search_jobs_page_sync, _search_async])
+def test_facets_count_the_whole_filtered_result(jobs, search):
+    page = search(query="valorant", limit=1, include_facets=True)
+    assert len(page.jobs) == 1 and page.next_cursor
+    assert page.facets == {
+        "category": {"coaching": 2, "content": 1},
+        "country": {"Germany": 2, "France": 1},
+        "type": {"Full-time": 2, "Contract": 1},
+    }
+
+    # Facets follow the filters (and later pages carry the same counts)
+    coaching = search(query="valorant", category="coaching", limit=1, include_facets=True)
+    assert coaching.facets["country"] == {"France": 1, "Germany": 1}
+    following = search(cursor=coaching.next_cursor, limit=1, include_facets=True)
+    assert [job.id for job in following.jobs] and following.facets == coaching.facets
+
+
+@pytest.mark.parametrize("search", [search_jobs_page_sync, _search_async])
+def test_empty_result_still_has_facets(jobs, search):
+    page = search(query="fortnite", include_facets=True)
+    assert page.jobs == []
+    assert page.facets == {"category": {}, "country": {}, "type": {}}
+    assert search(query="valorant").facets is None
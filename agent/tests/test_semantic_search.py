@@ -0,0 +1,64 @@
+import numpy as np
+
+from conftest import JOB_DEFAULTS, insert_jobs, run_async
+
+from tools import semantic_search
+from tools.semantic_search import SemanticIndex, semantic_search_jobs, semantic_search_jobs_async
+from tools.job_search import JobSearchResult, JobSummary
+
+
+def _job(id, title, **fields):
+    data = {**JOB_DEFAULTS, "salary": "Competitive", "url": "", "id": id, "title": title, **fields}
+    return JobSearchResult(**{name: data[name] for name in JobSearchResult.model_fields})
+
+
+JOBS = [
+    _job("job-talent", "Broadcast Talent", category="content", description="Commentate on live matches"),
+    _job("job-coach", "Valorant Head Coach", category="coaching", country="Germany", location="Berlin"),
+    _job("job-social", "Social Media Manager", category="marketing"),
+    _job("job-dev", "Backend Engineer", category="engineering", country="United States", location="Austin"),
+]
+
+
+def _ids(hits):
+    return [job.id for job, _ in hits]
+
+
+def test_synonyms_bridge_keyword_gaps():
+    index = SemanticIndex(JOBS)
+    assert index.matrix.dtype == np.float32 and index.matrix.flags["C_CONTIGUOUS"]
+    assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0, atol=1e-5)
+
+    # Neither word appears in any job, only in the concept groups
+    assert _ids(index.search("shoutcaster", limit=1)) == ["job-talent"]
+    assert _ids(index.search("discord moderator", limit=1)) == ["job-social"]
+    assert _ids(index.search("performance analyst", limit=1)) == ["job-coach"]
+
+
+def test_scores_are_ordered_and_thresholded():
+    index = SemanticIndex(JOBS)
+    hits = index.search("software developer", limit=4, min_score=0.0)
+    scores = [score for _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+    assert _ids(hits)[0] == "job-dev"
+    assert index.search("zzzz qqqq", limit=4) == []
+
+
+def test_filters_match_the_sql_semantics():
+    index = SemanticIndex(JOBS)
+    assert _ids(index.search("coach", country="DACH", min_score=0.0)) == ["job-coach"]
+    assert _ids(index.search("engineer", country="austin", min_score=0.0)) == ["job-dev"]
+    assert index.search("coach", category="engineering", country="Germany", min_score=0.0) == []
+    assert SemanticIndex([]).search("coach") == []
+
+
+def test_semantic_search_reads_active_jobs(db, monkeypatch):
+    monkeypatch.setattr(semantic_search, "_index", None)
+    insert_jobs(db, {"id": "job-1", "title": "Shoutcaster", "category": "content"},
+                {"id": "job-2", "title": "Esports Commentator", "category": "content", "is_active": False},
+                {"id": "job-3", "title": "Video Editor", "category": "content"})
+
+    assert [job.id for job in semantic_search_jobs("play by play commentator", limit=2)] == ["job-1"]
+    summaries = run_async(semantic_search_jobs_async("caster", projection="summary"))
+    assert [(type(job), job.id) for job in summaries] == [(JobSummary, "job-1")]
+    assert semantic_search_jobs("") == []
@@ -2,10 +2,27 @@
 
 from .job_search import (
     search_jobs,
+    search_jobs_page,
+    search_jobs_async,
+    search_jobs_page_async,
     get_job_by_id,
+    get_jobs_by_ids,
+    get_job_by_id_async,
+    get_jobs_by_ids_async,
     get_available_categories,
     get_available_countries,
+    get_category_counts,
+    get_country_counts,
+    get_category_counts_async,
+    get_country_counts_async,
     JobSearchResult,
+    JobCard,
+    JobSummary,
+    JobSearchPage,
+)
+from .semantic_search import (
+    semantic_search_jobs,
+    semantic_search_jobs_async,
 )
 from .company_lookup import (
     lookup_company,
@@ -16,10 +33,25 @@ from .company_lookup import (
 
 __all__ = [
     "search_jobs",
+    "search_jobs_page",
+    "search_jobs_async",
+    "search_jobs_page_async",
     "get_job_by_id",
+    "get_jobs_by_ids",
+    "get_job_by_id_async",
+    "get_jobs_by_ids_async",
     "get_available_categories",
     "get_available_countries",
+    "get_category_counts",
+    "get_country_counts",
+    "get_category_counts_async",
+    "get_country_counts_async",
     "JobSearchResult",
+    "JobCard",
+    "JobSummary",
+    "JobSearchPage",
+    "semantic_search_jobs",
+    "semantic_search_jobs_async",
     "lookup_company",
     "get_all_companies",
     "search_companies_by_game",
@@ -0,0 +1,150 @@
+"""
+In-process caches for the agent tools.
+
+RefreshingCache holds a single loaded value with a TTL. Once the TTL passes
+the stale value keeps being served while one background thread reloads it
+(stale-while-revalidate), so readers only ever block on the very first load.
+
+LRUCache is a bounded keyed cache (LRU eviction + TTL) for per-argument results.
+"""
+
+import sys
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Callable, Awaitable, Any, Optional
+
+
+class RefreshingCache:
+    """Single-value TTL cache with stale-while-revalidate and explicit invalidation."""
+
+    def __init__(self, name: str, loader: Callable[[], Any], ttl: float = 300.0,
+                 async_loader: Optional[Callable[[], Awaitable[Any]]] = None):
+        self.name = name
+        self.loader = loader
+        self.async_loader = async_loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._refreshing = False
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def _store(self, value):
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic()
+            self._stats["refreshes"] += 1
+        return value
+
+    def _load(self):
+        return self._store(self.loader())
+
+    def _background_refresh(self):
+        try:
+            self._load()
+        except Exception as e:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+            print(f"[Cache] {self.name} refresh error: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _cached(self) -> tuple:
+        """(hit, value) with the hit/stale bookkeeping shared by get() and aget()."""
+        with self._lock:
+            if self._loaded_at is not None:
+                if time.monotonic() - self._loaded_at < self.ttl:
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["stale_hits"] += 1
+                    if not self._refreshing:
+                        self._refreshing = True
+                        threading.Thread(target=self._background_refresh, daemon=True).start()
+                return True, self._value
+            self._stats["misses"] += 1
+            return False, None
+
+    def get(self):
+        """Cached value; reloads synchronously only when nothing has been loaded yet."""
+        hit, value = self._cached()
+        if hit:
+            return value
+        return self._load()
+
+    async def aget(self):
+        """Like get(), but a cold load awaits async_loader instead of blocking the event loop."""
+        hit, value = self._cached()
+        if hit:
+            return value
+        if self.async_loader is None:
+            return await asyncio.to_thread(self._load)
+        return self._store(await self.async_loader())
+
+    def invalidate(self):
+        """Mark the value stale so the next read triggers a background reload."""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._loaded_at = float("-inf")
+
+    def stats(self) -> dict:
+        with self._lock:
+            age = None
+            if self._loaded_at not in (None, float("-inf")):
+                age = round(time.monotonic() - self._loaded_at, 1)
+            return {"name": self.name, "ttl": self.ttl, "age_seconds": age, **self._stats}
+
+
+class LRUCache:
+    """Bounded key/value cache with LRU eviction, a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, name: str, max_size: int = 512, ttl: float = 60.0):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+                **self._stats,
+            }
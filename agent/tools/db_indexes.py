@@ -0,0 +1,230 @@
+"""
+Versioned index set for the hot queries.
+
+Searches filter on expressions (LOWER(category), LOWER(type) ILIKE) and the
+per-user lookups sort by created_at - none of which the plain column indexes
+serve. INDEXES lists the indexes those queries need (expression, partial and
+covering); the recency order of active jobs already has idx_jobs_active_recent
+(JOBS_SEARCH_DDL), which the report checks too. ensure_indexes()
+builds whichever are missing, invalid or defined at an older version, using
+CREATE INDEX CONCURRENTLY so live writes aren't blocked, and records what it
+built in db_index_versions. To change an index, edit its definition and bump
+its version; to drop one, move its name to RETIRED_INDEXES.
+
+seq_scan_report() EXPLAINs each hot query and lists the ones that still plan
+as sequential scans. Plans depend on table statistics, so run it against
+production-sized data (--analyze refreshes the statistics first); a seq scan
+of a table under --min-rows rows is the planner being right, not a gap.
+
+Usage:
+    python -m tools.db_indexes [--analyze] [--min-rows 10000]   # migrate, then print the scan report
+"""
+
+import sys
+import json
+import argparse
+from typing import List, NamedTuple
+
+from .db_pool import get_connection
+from .job_search import _build_search_query, JOB_COLUMNS
+
+
+class IndexDef(NamedTuple):
+    name: str
+    table: str
+    definition: str  # everything after "ON <table>"
+    version: int
+
+
+INDEXES = [
+    # search_jobs(category=...): LOWER(category) = LOWER(%s)
+    IndexDef("idx_jobs_category_lower", "jobs",
+             "(LOWER(category)) WHERE is_active = true", 1),
+    # search_jobs(job_type=...): LOWER(type) ILIKE '%...%' - only trigrams help a leading wildcard
+    IndexDef("idx_jobs_type_lower_trgm", "jobs",
+             "USING GIN (LOWER(type) gin_trgm_ops) WHERE is_active = true", 1),
+    # get_user_job_interests: covering, so the interest rows come from the index alone
+    IndexDef("idx_user_job_interests_user_recent", "user_job_interests",
+             "(user_id, created_at DESC) INCLUDE (job_id, interest_type)", 1),
+    # get_profile_items with and without item_type, already in display order
+    IndexDef("idx_profile_items_user_type_recent", "user_profile_items",
+             "(user_id, item_type, created_at DESC)", 1),
+    # Unread counts / mark-as-read in the messages API (recipient_id, not to_user_id)
+    IndexDef("idx_messages_recipient_unread", "messages",
+             "(recipient_id, conversation_id) WHERE read_at IS NULL", 1),
+]
+
+# Indexes from earlier versions of the set, dropped by ensure_indexes()
+RETIRED_INDEXES: List[str] = []
+
+INDEX_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS db_index_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        applied_at TIMESTAMPTZ DEFAULT NOW()
+    )
+"""
+
+
+def _index_sql(index: IndexDef) -> str:
+    return f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.table} {index.definition}"
+
+
+def ensure_indexes() -> bool:
+    """Build missing, invalid or outdated indexes from INDEXES and drop RETIRED_INDEXES."""
+    try:
+        with get_connection() as conn:
+            if not conn:
+                return False
+
+            # CONCURRENTLY can't run inside a transaction block
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(INDEX_VERSIONS_DDL)
+                    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                    cur.execute("""
+                        SELECT v.name, v.version, COALESCE(i.indisvalid, false)
+                        FROM db_index_versions v
+                        LEFT JOIN pg_class c ON c.relname = v.name AND c.relkind = 'i'
+                        LEFT JOIN pg_index i ON i.indexrelid = c.oid
+                    """)
+                    applied = {name: (version, valid) for name, version, valid in cur.fetchall()}
+
+                    built = 0
+                    for index in INDEXES:
+                        version, valid = applied.get(index.name, (None, False))
+                        if version == index.version and valid:
+                            continue
+                        cur.execute("SELECT to_regclass(%s)", (index.table,))
+                        if cur.fetchone()[0] is None:
+                            print(f"[DB] Skipping {index.name}: no {index.table} table", file=sys.stderr)
+                            continue
+                        # Outdated, or left invalid by an interrupted CONCURRENTLY build
+                        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+                        cur.execute(_index_sql(index))
+                        cur.execute("""
+                            INSERT INTO db_index_versions (name, version) VALUES (%s, %s)
+                            ON CONFLICT (name) DO UPDATE SET version = EXCLUDED.version, applied_at = NOW()
+                        """, (index.name, index.version))
+                        built += 1
+
+                    for name in RETIRED_INDEXES:
+                        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                        cur.execute("DELETE FROM db_index_versions WHERE name = %s", (name,))
+            finally:
+                conn.autocommit = False
+
+        print(f"[DB] Hot-query indexes ready ({built} built)", file=sys.stderr)
+        return True
+    except Exception as e:
+        print(f"[DB] Index setup error: {e}", file=sys.stderr)
+        return False
+
+
+# =====
+# Sequential scan report
+# =====
+
+UNREAD_MESSAGES_SQL = """
+    SELECT conversation_id, COUNT(*)
+    FROM messages
+    WHERE recipient_id = %s AND read_at IS NULL
+    GROUP BY conversation_id
+"""
+
+
+def _hot_queries() -> List[tuple]:
+    """(label, sql, params) for the queries the index set is meant to serve."""
+    from .user_context import JOB_INTERESTS_SQL, PROFILE_ITEMS_SQL, PROFILE_ITEMS_BY_TYPE_SQL
+
+    queries = []
+    for label, kwargs in (("search by category", dict(category="marketing")),
+                          ("search by type", dict(job_type="full")),
+                          ("recent active jobs", dict(sort="recent"))):
+        sql, params = _build_search_query(limit=6, columns=JOB_COLUMNS, **kwargs)
+        queries.append((label, sql, params))
+    queries += [
+        ("job interests", JOB_INTERESTS_SQL, ["sample-user", 10]),
+        ("profile items", PROFILE_ITEMS_SQL, ["sample-user"]),
+        ("profile items by type", PROFILE_ITEMS_BY_TYPE_SQL, ["sample-user", "skill"]),
+        ("unread messages", UNREAD_MESSAGES_SQL, ["sample-user"]),
+    ]
+    return queries
+
+
+# Tables the hot queries read (see _hot_queries)
+HOT_TABLES = ["jobs", "jobs_archive", "user_job_interests", "user_profile_items", "messages"]
+
+# Below this many rows a sequential scan is cheaper than any index and isn't reported as a problem
+SEQ_SCAN_MIN_ROWS = 10_000
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def seq_scan_report(analyze: bool = False, min_rows: int = SEQ_SCAN_MIN_ROWS) -> List[dict]:
+    """EXPLAIN each hot query; report its sequential scans (with table row estimates) and indexes used.
+
+    A query is ok unless it seq-scans a table estimated at min_rows or more
+    (or never analyzed). analyze=True runs ANALYZE on the hot tables first.
+    """
+    report = []
+    with get_connection() as conn:
+        if not conn:
+            return report
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NOT NULL",
+                        (HOT_TABLES,))
+            tables = [row[0] for row in cur.fetchall()]
+            if analyze:
+                for table in tables:
+                    cur.execute(f"ANALYZE {table}")
+            # reltuples is -1 until the table is first analyzed
+            cur.execute("SELECT relname, reltuples::bigint FROM pg_class WHERE oid = ANY(%s::regclass[])",
+                        (tables,))
+            estimates = dict(cur.fetchall())
+
+            for label, sql, params in _hot_queries():
+                try:
+                    cur.execute("SAVEPOINT explain_check")
+                    cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                    plan = cur.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    nodes = list(_plan_nodes(plan[0]["Plan"]))
+                    cur.execute("RELEASE SAVEPOINT explain_check")
+                except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT explain_check")
+                    report.append({"query": label, "error": str(e).strip()})
+                    continue
+
+                scanned = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"})
+                seq_scans = [{"table": t, "rows": estimates.get(t, -1)} for t in scanned]
+                indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+                report.append({"query": label, "seq_scans": seq_scans, "indexes": indexes,
+                               "ok": all(0 <= scan["rows"] < min_rows for scan in seq_scans)})
+        conn.rollback()
+    return report
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Migrate (building the hot-query index set) and report seq scans")
+    parser.add_argument("--analyze", action="store_true", help="ANALYZE the hot tables before planning")
+    parser.add_argument("--min-rows", type=int, default=SEQ_SCAN_MIN_ROWS,
+                        help="Only flag seq scans of tables with at least this many rows")
+    args = parser.parse_args()
+
+    from .migrations import run_migrations, latest_version
+
+    if run_migrations() != latest_version():
+        sys.exit("[DB] Schema is not migrated")
+    for row in seq_scan_report(args.analyze, args.min_rows):
+        print(json.dumps(row))
@@ -0,0 +1,553 @@
+"""
+Database Connection Pool - shared by the job search and user context tools.
+
+One process-wide, bounded pool of psycopg2 connections to Neon so a chat
+turn that calls several tools reuses warm connections instead of paying a
+TLS handshake per query.
+
+- min/max size (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE)
+- idle reaping of connections unused for DB_POOL_MAX_IDLE seconds
+- health check (SELECT 1) on checkout for connections idle a while
+- saturation stats via pool_stats()
+- checkouts honour the request deadline (see deadline.py)
+
+Async tools use a psycopg 3 AsyncConnectionPool with the same settings
+(get_async_connection) so Neon I/O never blocks the event loop.
+
+With DATABASE_READ_URL set (e.g. a Neon read replica), read-only callers
+(get_connection(read_only=True)) are served by a second pool on the replica
+and everything else stays on the primary DATABASE_URL. A user's reads stay on
+the primary for DB_READ_YOUR_WRITES_SECONDS after mark_user_write(user_id),
+so a profile read straight after a save never sees replica lag. The window is
+tracked per process.
+
+Session-level features (advisory locks held across transactions) and
+long-lived streams (exports) need a connection of their own on Neon's direct
+endpoint: direct_connection().
+"""
+
+import os
+import sys
+import time
+import threading
+import asyncio
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional, Dict
+from urllib.parse import urlparse, urlunparse
+
+import psycopg2
+from psycopg2 import extensions
+
+from .deadline import bounded, bounded_async, budget, check, connect_timeout
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe bounded pool of psycopg2 connections."""
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10,
+                 max_idle: float = 300.0, health_check_after: float = 30.0,
+                 timeout: float = 10.0):
+        self.dsn = dsn
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle = []  # [(conn, last_used_monotonic)], most recently used last
+        self._in_use = set()
+        self._connecting = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "reaped": 0,
+            "failed_health_checks": 0,
+            "peak_in_use": 0,
+        }
+
+    # -- internals --
+
+    def _connect(self):
+        timeout = connect_timeout()
+        conn = psycopg2.connect(self.dsn, **({"connect_timeout": timeout} if timeout else {}))
+        with self._cond:
+            self._stats["created"] += 1
+        return conn
+
+    def _size(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._connecting
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _reap_idle(self, now: float) -> list:
+        """Pop connections idle past max_idle, keeping min_size. Caller holds the lock."""
+        reaped = []
+        while self._idle and self._size() > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.max_idle:
+                break
+            self._idle.pop(0)
+            reaped.append(conn)
+        self._stats["reaped"] += len(reaped)
+        return reaped
+
+    def _healthy(self, conn, idle_for: float) -> bool:
+        if conn.closed:
+            return False
+        if idle_for < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    # -- public API --
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a connection, waiting up to `timeout` (default self.timeout) seconds if the pool is saturated."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            to_close = []
+            conn = None
+            idle_for = 0.0
+            create = False
+
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                now = time.monotonic()
+                to_close = self._reap_idle(now)
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    idle_for = now - last_used
+                    self._in_use.add(conn)
+                elif self._size() < self.max_size:
+                    create = True
+                    # Reserve the slot while connecting outside the lock
+                    self._connecting += 1
+                else:
+                    self._waiting += 1
+                    self._stats["waits"] += 1
+                    remaining = deadline - now
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                    self._waiting -= 1
+                    if time.monotonic() >= deadline and not self._idle and self._size() >= self.max_size:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No database connection available within {timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+
+            for stale in to_close:
+                self._discard(stale)
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._connecting -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._connecting -= 1
+                    self._in_use.add(conn)
+                    self._record_checkout()
+                return conn
+
+            if conn is None:
+                continue
+
+            if self._healthy(conn, idle_for):
+                with self._cond:
+                    self._record_checkout()
+                return conn
+
+            # Broken connection - drop it and try again
+            with self._cond:
+                self._in_use.discard(conn)
+                self._stats["failed_health_checks"] += 1
+                self._stats["discarded"] += 1
+                self._cond.notify()
+            self._discard(conn)
+
+    def _record_checkout(self):
+        self._stats["checkouts"] += 1
+        self._stats["peak_in_use"] = max(self._stats["peak_in_use"], len(self._in_use))
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection to the pool, resetting any open transaction."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        discard = discard or conn.closed
+
+        with self._cond:
+            self._in_use.discard(conn)
+            if discard or self._closed:
+                self._stats["discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if discard or self._closed:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager that checks out a connection and always returns it."""
+        with self.lease(self.getconn(timeout)) as conn:
+            yield conn
+
+    @contextmanager
+    def lease(self, conn):
+        """Context manager returning an already checked-out conn, discarding it if it broke."""
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self) -> dict:
+        """Pool size and saturation counters."""
+        with self._cond:
+            in_use = len(self._in_use)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size(),
+                "idle": len(self._idle),
+                "in_use": in_use,
+                "waiting": self._waiting,
+                "saturation": round(in_use / self.max_size, 3),
+                **self._stats,
+            }
+
+    def close(self):
+        """Close all idle connections; in-use ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle = []
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+
+# =====
+# Read-your-writes pinning
+# =====
+
+READ_YOUR_WRITES_SECONDS = _env_float("DB_READ_YOUR_WRITES_SECONDS", 5.0)
+
+_last_writes: Dict[str, float] = {}  # user_id -> monotonic time of their last write
+_last_writes_lock = threading.Lock()
+
+
+def mark_user_write(user_id: Optional[str]):
+    """Record that user_id just wrote to the primary; their reads skip the replica for a while."""
+    if not user_id:
+        return
+    now = time.monotonic()
+    with _last_writes_lock:
+        _last_writes[user_id] = now
+        if len(_last_writes) > 10_000:
+            for uid, at in list(_last_writes.items()):
+                if now - at >= READ_YOUR_WRITES_SECONDS:
+                    del _last_writes[uid]
+
+
+def _pinned_to_primary(user_id: Optional[str]) -> bool:
+    if not user_id:
+        return False
+    with _last_writes_lock:
+        at = _last_writes.get(user_id)
+    return at is not None and time.monotonic() - at < READ_YOUR_WRITES_SECONDS
+
+
+def _use_replica(read_only: bool, user_id: Optional[str]) -> bool:
+    return read_only and bool(os.getenv("DATABASE_READ_URL")) and not _pinned_to_primary(user_id)
+
+
+# =====
+# Process-wide pools
+# =====
+
+_pool: Optional[ConnectionPool] = None
+_read_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _new_pool(db_url: str, name: str) -> ConnectionPool:
+    pool = ConnectionPool(
+        db_url,
+        min_size=_env_int("DB_POOL_MIN_SIZE", 1),
+        max_size=_env_int("DB_POOL_MAX_SIZE", 10),
+        max_idle=_env_float("DB_POOL_MAX_IDLE", 300.0),
+        health_check_after=_env_float("DB_POOL_HEALTH_CHECK_AFTER", 30.0),
+        timeout=_env_float("DB_POOL_TIMEOUT", 10.0),
+    )
+    print(f"[DBPool] Created {name} pool (min={pool.min_size}, max={pool.max_size})", file=sys.stderr)
+    return pool
+
+
+def get_pool() -> Optional[ConnectionPool]:
+    """Get (lazily creating) the shared primary pool, or None if DATABASE_URL is not set."""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool(db_url, "primary")
+    return _pool
+
+
+def get_read_pool() -> Optional[ConnectionPool]:
+    """Get (lazily creating) the replica pool, or None if DATABASE_READ_URL is not set."""
+    global _read_pool
+    if _read_pool is not None:
+        return _read_pool
+
+    db_url = os.getenv("DATABASE_READ_URL")
+    if not db_url:
+        return None
+
+    with _pool_lock:
+        if _read_pool is None:
+            _read_pool = _new_pool(db_url, "replica")
+    return _read_pool
+
+
+@contextmanager
+def get_connection(read_only: bool = False, user_id: Optional[str] = None):
+    """Check out a pooled connection. Yields None if the database is not configured.
+
+    read_only=True may be served by the replica (see module docstring); pass
+    the user_id of per-user reads so they honour read-your-writes pinning.
+    A replica that can't hand out a connection falls back to the primary.
+    Under a deadline the connection's statements are bounded by the time left.
+    """
+    with _checkout(read_only, user_id) as conn:
+        if conn is None:
+            yield None
+            return
+        with bounded(conn):
+            yield conn
+
+
+@contextmanager
+def _checkout(read_only: bool, user_id: Optional[str]):
+    check()
+    if _use_replica(read_only, user_id):
+        conn = None
+        read_pool = get_read_pool()
+        try:
+            conn = read_pool.getconn(budget(read_pool.timeout))
+        except Exception as e:
+            print(f"[DBPool] Replica unavailable, reading from primary: {e}", file=sys.stderr)
+        if conn is not None:
+            with read_pool.lease(conn):
+                yield conn
+            return
+
+    pool = get_pool()
+    if pool is None:
+        yield None
+        return
+    try:
+        conn = pool.getconn(budget(pool.timeout))
+    except PoolTimeout:
+        check()  # out of time rather than out of connections
+        raise
+    with pool.lease(conn):
+        yield conn
+
+
+# =====
+# Async pool (psycopg 3) for tools running on the event loop
+# =====
+
+_async_pools = {}  # "primary" / "replica" -> AsyncConnectionPool
+_async_pool_lock = asyncio.Lock()
+
+
+async def get_async_pool(replica: bool = False):
+    """Get (lazily opening) a shared psycopg AsyncConnectionPool, or None if its URL is not set."""
+    name = "replica" if replica else "primary"
+    if name in _async_pools:
+        return _async_pools[name]
+
+    db_url = os.getenv("DATABASE_READ_URL" if replica else "DATABASE_URL")
+    if not db_url:
+        return None
+
+    async with _async_pool_lock:
+        if name not in _async_pools:
+            from psycopg_pool import AsyncConnectionPool
+
+            pool = AsyncConnectionPool(
+                db_url,
+                min_size=_env_int("DB_POOL_MIN_SIZE", 1),
+                max_size=_env_int("DB_POOL_MAX_SIZE", 10),
+                max_idle=_env_float("DB_POOL_MAX_IDLE", 300.0),
+                timeout=_env_float("DB_POOL_TIMEOUT", 10.0),
+                check=AsyncConnectionPool.check_connection,
+                open=False,
+            )
+            await pool.open()
+            _async_pools[name] = pool
+            print(f"[DBPool] Created async {name} pool (min={pool.min_size}, max={pool.max_size})", file=sys.stderr)
+    return _async_pools[name]
+
+
+@asynccontextmanager
+async def get_async_connection(read_only: bool = False, user_id: Optional[str] = None):
+    """Check out an async pooled connection. Yields None if the database is not configured.
+
+    Routed and deadline-bounded like get_connection(read_only, user_id).
+    """
+    async with _checkout_async(read_only, user_id) as conn:
+        if conn is None:
+            yield None
+            return
+        async with bounded_async(conn):
+            yield conn
+
+
+@asynccontextmanager
+async def _checkout_async(read_only: bool, user_id: Optional[str]):
+    check()
+    if _use_replica(read_only, user_id):
+        conn = None
+        try:
+            read_pool = await get_async_pool(replica=True)
+            conn = await read_pool.getconn(budget(read_pool.timeout))
+        except Exception as e:
+            print(f"[DBPool] Replica unavailable, reading from primary: {e}", file=sys.stderr)
+        if conn is not None:
+            try:
+                # Like pool.connection(): commit on success, roll back on error (pooled conns stay open)
+                async with conn:
+                    yield conn
+            finally:
+                await read_pool.putconn(conn)
+            return
+
+    pool = await get_async_pool()
+    if pool is None:
+        yield None
+        return
+    try:
+        conn = await pool.getconn(budget(pool.timeout))
+    except Exception:
+        check()  # out of time rather than out of connections
+        raise
+    try:
+        async with conn:
+            yield conn
+    finally:
+        await pool.putconn(conn)
+
+
+# =====
+# Direct (unpooled) connections
+# =====
+
+def direct_dsn(database_url: str) -> str:
+    """Neon's direct endpoint for a "-pooler" URL (session features need it)."""
+    parsed = urlparse(database_url)
+    if parsed.hostname and "-pooler" in parsed.hostname:
+        return urlunparse(parsed._replace(netloc=parsed.netloc.replace("-pooler", "", 1)))
+    return database_url
+
+
+@contextmanager
+def direct_connection(replica: bool = False):
+    """A dedicated connection to the direct endpoint, closed afterwards. Yields None if not configured.
+
+    replica=True connects to DATABASE_READ_URL when it is set.
+    """
+    db_url = (replica and os.getenv("DATABASE_READ_URL")) or os.getenv("DATABASE_URL")
+    if not db_url:
+        yield None
+        return
+    conn = psycopg2.connect(direct_dsn(db_url))
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats() -> dict:
+    """Stats for the shared pools (empty if not created yet)."""
+    stats = _pool.stats() if _pool is not None else {}
+    if _read_pool is not None:
+        stats = {**stats, "replica": _read_pool.stats()}
+    if "primary" in _async_pools:
+        stats = {**stats, "async": _async_pools["primary"].get_stats()}
+    if "replica" in _async_pools:
+        stats = {**stats, "async_replica": _async_pools["replica"].get_stats()}
+    return stats
+
+
+def close_pool():
+    """Close the shared sync pools (used on shutdown)."""
+    global _pool, _read_pool
+    with _pool_lock:
+        for pool in (_pool, _read_pool):
+            if pool is not None:
+                pool.close()
+        _pool = _read_pool = None
+
+
+async def close_async_pool():
+    """Close the shared async pools (used on shutdown)."""
+    for name in list(_async_pools):
+        await _async_pools.pop(name).close()
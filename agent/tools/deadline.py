@@ -0,0 +1,176 @@
+"""
+Deadlines for database work.
+
+A slow scan or a Neon cold start shouldn't hold a voice turn hostage. Agent
+requests and each tool call set a deadline (a contextvar, so it follows the
+call into sync helpers and async tasks), and every pooled connection checked
+out under it:
+
+- waits at most the remaining time for a pool slot / new connection,
+- runs with SET LOCAL statement_timeout = the remaining time,
+- is cancelled client-side (conn.cancel()) shortly after that, in case the
+  server never gets to enforce the timeout.
+
+Running out of time raises DeadlineExceeded; @timed_tool turns that into a
+{"timed_out": True, ...} result the model can apologise for or retry.
+Nested deadlines only ever shorten the time left.
+"""
+
+import os
+import sys
+import math
+import time
+import asyncio
+import functools
+import threading
+from contextvars import ContextVar
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional
+
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "25"))
+TOOL_DEADLINE_SECONDS = float(os.getenv("TOOL_DEADLINE_SECONDS", "8"))
+# Slack before the client cancels a statement the server should have timed out
+CANCEL_GRACE_SECONDS = 0.5
+MIN_STATEMENT_TIMEOUT_MS = 50
+
+SET_STATEMENT_TIMEOUT_SQL = "SELECT set_config('statement_timeout', %s, true)"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("db_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The current request or tool ran out of time for database work."""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Limit database work in this block (and anything it calls) to `seconds`."""
+    current = _deadline.get()
+    new = time.monotonic() + seconds
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (may be negative), or None without one."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def check():
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Deadline exceeded before the database call")
+
+
+def budget(default: float) -> float:
+    """default, capped by the time left (for pool checkout and HTTP timeouts)."""
+    left = remaining()
+    return default if left is None else max(0.0, min(default, left))
+
+
+def connect_timeout() -> Optional[int]:
+    """libpq connect_timeout (whole seconds, at least 1) for the time left, or None."""
+    left = remaining()
+    return None if left is None else max(1, math.ceil(left))
+
+
+def _statement_timeout_ms() -> Optional[int]:
+    left = remaining()
+    return None if left is None else max(MIN_STATEMENT_TIMEOUT_MS, int(left * 1000))
+
+
+def _is_query_canceled(error: Exception) -> bool:
+    # 57014 query_canceled: statement_timeout or conn.cancel()
+    return "57014" in (getattr(error, "pgcode", None), getattr(error, "sqlstate", None))
+
+
+@contextmanager
+def bounded(conn):
+    """Apply the current deadline to a psycopg2 connection for the block (no-op without one)."""
+    timeout_ms = _statement_timeout_ms()
+    if timeout_ms is None:
+        yield
+        return
+
+    check()
+    with conn.cursor() as cur:
+        cur.execute(SET_STATEMENT_TIMEOUT_SQL, (str(timeout_ms),))
+    timer = threading.Timer(timeout_ms / 1000 + CANCEL_GRACE_SECONDS, conn.cancel)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except Exception as e:
+        if _is_query_canceled(e):
+            raise DeadlineExceeded(f"Query cancelled after {timeout_ms}ms") from e
+        raise
+    finally:
+        timer.cancel()
+
+
+@asynccontextmanager
+async def bounded_async(conn):
+    """Apply the current deadline to a psycopg 3 async connection for the block."""
+    timeout_ms = _statement_timeout_ms()
+    if timeout_ms is None:
+        yield
+        return
+
+    check()
+    async with conn.cursor() as cur:
+        await cur.execute(SET_STATEMENT_TIMEOUT_SQL, (str(timeout_ms),))
+    loop = asyncio.get_running_loop()
+    # conn.cancel() blocks briefly on the cancel request - keep it off the event loop
+    handle = loop.call_later(timeout_ms / 1000 + CANCEL_GRACE_SECONDS,
+                             lambda: loop.run_in_executor(None, conn.cancel))
+    try:
+        yield
+    except Exception as e:
+        if _is_query_canceled(e):
+            raise DeadlineExceeded(f"Query cancelled after {timeout_ms}ms") from e
+        raise
+    finally:
+        handle.cancel()
+
+
+def timed_out_result(tool: str, error: Exception = None) -> dict:
+    """What a tool returns when its database work ran out of time."""
+    print(f"[Deadline] {tool} timed out: {error}", file=sys.stderr)
+    return {
+        "success": False,
+        "timed_out": True,
+        "message": "The jobs database is slow to respond right now, so this was stopped. "
+                   "Tell the user briefly and offer to try again in a moment.",
+    }
+
+
+def timed_tool(func=None, *, seconds: Optional[float] = None):
+    """Decorator for agent tools: run under a deadline, return timed_out_result() if it passes."""
+    def decorate(func):
+        limit = seconds or TOOL_DEADLINE_SECONDS
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    with deadline(limit):
+                        return await func(*args, **kwargs)
+                except DeadlineExceeded as e:
+                    return timed_out_result(func.__name__, e)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                with deadline(limit):
+                    return func(*args, **kwargs)
+            except DeadlineExceeded as e:
+                return timed_out_result(func.__name__, e)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
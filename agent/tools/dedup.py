@@ -0,0 +1,254 @@
+"""
+Near-duplicate detection for job postings (MinHash + LSH).
+
+Boards re-post the same role with slightly different text. Each job gets a
+MinHash signature over word shingles of title/company/description, stored on
+jobs.minhash, and its signature is split into LSH bands stored in
+job_lsh_buckets. Candidate duplicates are only ever jobs sharing a bucket, so
+clustering stays sub-linear; candidates are confirmed by estimated Jaccard
+similarity and merged into dedup_cluster_id (the smallest job id in the cluster).
+
+search_jobs(dedupe=True) then shows one active job per cluster, and
+duplicate_clusters_report() lists the clusters.
+
+Usage:
+    python -m tools.dedup            # migrate, sign new/changed jobs, print the report
+"""
+
+import sys
+import json
+import zlib
+import hashlib
+from typing import Optional, List, Dict, Tuple
+
+import numpy as np
+
+from .db_pool import get_connection
+from .job_index import tokenize
+
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS  # 8 rows per band: pairs above ~0.77 Jaccard almost always collide
+SHINGLE_SIZE = 3
+# Estimated Jaccard needed to call two postings the same job
+DEDUP_THRESHOLD = 0.8
+BACKFILL_BATCH = 500
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)  # fixed seed: signatures must be stable across processes
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+JOBS_DEDUP_DDL = """
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS minhash BIGINT[];
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS dedup_hash TEXT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS dedup_cluster_id TEXT;
+    CREATE INDEX IF NOT EXISTS idx_jobs_dedup_cluster ON jobs (dedup_cluster_id) WHERE is_active = true;
+
+    CREATE TABLE IF NOT EXISTS job_lsh_buckets (
+        band SMALLINT NOT NULL,
+        bucket BIGINT NOT NULL,
+        job_id TEXT NOT NULL,
+        PRIMARY KEY (band, bucket, job_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_job_lsh_buckets_job ON job_lsh_buckets (job_id);
+"""
+
+DEDUP_HASH_SQL = "md5(COALESCE(title, '') || '|' || COALESCE(company, '') || '|' || COALESCE(description, ''))"
+
+
+def _shingles(text: str) -> set:
+    tokens = tokenize(text)
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def compute_signature(title: Optional[str], company: Optional[str], description: Optional[str]) -> List[int]:
+    """MinHash signature (NUM_PERM ints) of a posting's word shingles."""
+    shingles = _shingles(f"{title or ''} {company or ''} {description or ''}")
+    if not shingles:
+        return [int(_MAX_HASH)] * NUM_PERM
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # Universal hashing (a*x + b) mod p, one row per permutation
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return [int(v) for v in permuted.min(axis=1)]
+
+
+def lsh_buckets(signature: List[int]) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs for a signature; bucket is a signed 63-bit hash of the band's rows."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "big") >> 1))
+    return buckets
+
+
+def estimate_jaccard(a: List[int], b: List[int]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _find(parent: Dict[str, str], x: str) -> str:
+    while parent.setdefault(x, x) != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _union(parent: Dict[str, str], a: str, b: str):
+    ra, rb = _find(parent, a), _find(parent, b)
+    if ra != rb:
+        # The smaller id becomes the cluster id
+        parent[max(ra, rb)] = min(ra, rb)
+
+
+def _index_batch(cur, rows) -> int:
+    """Store signatures/buckets for (id, title, company, description, dedup_hash) rows and re-cluster them.
+
+    Returns the number of rows signed (released cluster members are not counted).
+    """
+    from psycopg2.extras import execute_values
+
+    signatures = {}
+    for job_id, title, company, description, dedup_hash in rows:
+        signatures[str(job_id)] = (compute_signature(title, company, description), dedup_hash)
+    ids = list(signatures)
+
+    # An edited posting leaves its old cluster. That cluster's other members are
+    # released too and re-clustered below, since they may only have matched
+    # through it (and its id may be the cluster id).
+    cur.execute("""
+        UPDATE jobs SET dedup_cluster_id = NULL
+        WHERE dedup_cluster_id IN (
+            SELECT j.dedup_cluster_id
+            FROM jobs j JOIN unnest(%s::text[], %s::text[]) AS v(id, dedup_hash) ON v.id = j.id
+            WHERE j.dedup_cluster_id IS NOT NULL AND j.dedup_hash IS DISTINCT FROM v.dedup_hash
+        )
+        RETURNING id, minhash
+    """, (ids, [dedup_hash for _, dedup_hash in signatures.values()]))
+    minhashes = {job_id: signature for job_id, (signature, _) in signatures.items()}
+    for job_id, minhash in cur.fetchall():
+        if job_id not in minhashes and minhash:
+            minhashes[job_id] = list(minhash)
+
+    cur.execute("DELETE FROM job_lsh_buckets WHERE job_id = ANY(%s::text[])", (ids,))
+    execute_values(cur, "INSERT INTO job_lsh_buckets (band, bucket, job_id) VALUES %s ON CONFLICT DO NOTHING", [
+        (band, bucket, job_id)
+        for job_id, (signature, _) in signatures.items()
+        for band, bucket in lsh_buckets(signature)
+    ])
+    execute_values(cur, """
+        UPDATE jobs SET minhash = v.minhash, dedup_hash = v.dedup_hash
+        FROM (VALUES %s) AS v(id, minhash, dedup_hash)
+        WHERE jobs.id = v.id
+    """, [(job_id, signature, dedup_hash) for job_id, (signature, dedup_hash) in signatures.items()],
+        template="(%s, %s::bigint[], %s)")
+
+    # Candidates: anything sharing at least one bucket with this batch
+    cur.execute("""
+        SELECT DISTINCT a.job_id, b.job_id, j.minhash, j.dedup_cluster_id
+        FROM job_lsh_buckets a
+        JOIN job_lsh_buckets b ON b.band = a.band AND b.bucket = a.bucket AND b.job_id <> a.job_id
+        JOIN jobs j ON j.id = b.job_id
+        WHERE a.job_id = ANY(%s::text[])
+    """, (list(minhashes),))
+
+    parent: Dict[str, str] = {}
+    for job_id in minhashes:
+        _find(parent, job_id)
+    joined_clusters = set()
+    for job_id, other_id, other_signature, other_cluster in cur.fetchall():
+        if other_signature and estimate_jaccard(minhashes[job_id], other_signature) >= DEDUP_THRESHOLD:
+            _union(parent, job_id, other_id)
+            if other_cluster:
+                _union(parent, other_id, other_cluster)
+                joined_clusters.add(other_cluster)
+
+    execute_values(cur, """
+        UPDATE jobs SET dedup_cluster_id = v.cluster_id
+        FROM (VALUES %s) AS v(id, cluster_id)
+        WHERE jobs.id = v.id AND jobs.dedup_cluster_id IS DISTINCT FROM v.cluster_id
+    """, [(job_id, _find(parent, job_id)) for job_id in list(parent)])
+
+    # Existing clusters merged under a smaller id carry their other members along
+    renamed = [(old, _find(parent, old)) for old in joined_clusters if _find(parent, old) != old]
+    if renamed:
+        execute_values(cur, """
+            UPDATE jobs SET dedup_cluster_id = v.new_id
+            FROM (VALUES %s) AS v(old_id, new_id)
+            WHERE jobs.dedup_cluster_id = v.old_id
+        """, renamed)
+    return len(ids)
+
+
+def backfill_signatures(job_ids: Optional[List[str]] = None) -> int:
+    """Sign and cluster jobs whose text changed since they were last signed (or just job_ids). Returns jobs processed."""
+    processed = 0
+    with get_connection() as conn:
+        if not conn:
+            return 0
+
+        with conn.cursor() as cur:
+            if job_ids is not None:
+                cur.execute(f"""
+                    SELECT id, title, company, description, {DEDUP_HASH_SQL}
+                    FROM jobs WHERE id = ANY(%s::text[])
+                """, ([str(j) for j in job_ids],))
+            else:
+                cur.execute(f"""
+                    SELECT id, title, company, description, {DEDUP_HASH_SQL}
+                    FROM jobs WHERE is_active = true AND dedup_hash IS DISTINCT FROM {DEDUP_HASH_SQL}
+                """)
+            rows = cur.fetchall()
+
+            for start in range(0, len(rows), BACKFILL_BATCH):
+                processed += _index_batch(cur, rows[start:start + BACKFILL_BATCH])
+        conn.commit()
+
+    if processed:
+        from .job_search import notify_jobs_changed
+        notify_jobs_changed()
+        print(f"[Dedup] Signed {processed} jobs", file=sys.stderr)
+    return processed
+
+
+def duplicate_clusters_report(min_size: int = 2, limit: int = 50) -> List[dict]:
+    """Active duplicate clusters, largest first, with their member postings."""
+    try:
+        with get_connection() as conn:
+            if not conn:
+                return []
+
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT dedup_cluster_id, COUNT(*),
+                           json_agg(json_build_object('id', id, 'title', title, 'company', company,
+                                                      'url', external_url) ORDER BY id)
+                    FROM jobs
+                    WHERE is_active = true AND dedup_cluster_id IS NOT NULL
+                    GROUP BY dedup_cluster_id
+                    HAVING COUNT(*) >= %s
+                    ORDER BY COUNT(*) DESC, dedup_cluster_id
+                    LIMIT %s
+                """, (min_size, limit))
+                rows = cur.fetchall()
+
+        return [{"cluster_id": cluster_id, "size": size, "jobs": jobs} for cluster_id, size, jobs in rows]
+
+    except Exception as e:
+        print(f"[Dedup] Error building report: {e}", file=sys.stderr)
+        return []
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from .migrations import run_migrations, latest_version
+
+    if run_migrations() != latest_version():
+        sys.exit("[Dedup] Schema is not migrated")
+    backfill_signatures()
+    print(json.dumps(duplicate_clusters_report(), indent=2))
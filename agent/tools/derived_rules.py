@@ -0,0 +1,88 @@
+"""
+Rule tables behind the derived job columns.
+
+country_code/city_slug, the parsed salary_* columns and games/seniority/remote
+are filled by BEFORE INSERT/UPDATE triggers on jobs, like search_vector, so
+rows written outside the loader are derived the same way. The trigger
+functions read their rules (the gazetteer, currency symbols and FX rates,
+game aliases and seniority terms) from tables loaded from the Python data in
+this package.
+
+Each RuleSet knows how to reload its tables from that data (load_sql, also
+run by the migration that creates them) and how to re-derive existing rows
+with them (rederive). derived_rules records the version of each rule set
+the rows were last derived with; refresh_rules() does nothing while that is
+current, and reloads and re-derives once the data in code changes. The
+loader runs it after each load (via refresh_derived_columns), or by hand:
+
+    python -m tools.job_loader --refresh-derived
+"""
+
+import sys
+import json
+import hashlib
+from typing import Any, NamedTuple
+
+from .db_pool import get_connection
+
+DERIVED_RULES_DDL = """
+    CREATE TABLE IF NOT EXISTS derived_rules (
+        name TEXT PRIMARY KEY,
+        version TEXT NOT NULL,
+        updated_at TIMESTAMPTZ DEFAULT NOW()
+    );
+"""
+
+
+class RuleSet(NamedTuple):
+    name: str
+    # JSON-serialisable rules, passed to load as $rules$...$rules$::jsonb
+    data: Any
+    # SQL replacing the rule table(s) from {rules}
+    load: str
+    # UPDATE re-deriving jobs whose columns differ from what the rules give
+    rederive: str
+
+    @property
+    def json(self) -> str:
+        return json.dumps(self.data, sort_keys=True, ensure_ascii=False)
+
+    @property
+    def version(self) -> str:
+        return hashlib.md5(self.json.encode()).hexdigest()
+
+    def load_sql(self) -> str:
+        """load with the rules inlined, so it can run as (part of) a migration."""
+        return self.load.format(rules=f"$rules${self.json}$rules$::jsonb")
+
+
+def refresh_rules(rules: RuleSet) -> int:
+    """Reload rules and re-derive jobs if the data changed since the last refresh. Returns rows updated."""
+    with get_connection() as conn:
+        if not conn:
+            return 0
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT version FROM derived_rules WHERE name = %s", (rules.name,))
+            row = cur.fetchone()
+            if row and row[0] == rules.version:
+                conn.rollback()
+                return 0
+
+            # Row lock, so concurrent refreshes re-derive once
+            cur.execute("INSERT INTO derived_rules (name, version) VALUES (%s, '') ON CONFLICT (name) DO NOTHING",
+                        (rules.name,))
+            cur.execute("SELECT version FROM derived_rules WHERE name = %s FOR UPDATE", (rules.name,))
+            if cur.fetchone()[0] == rules.version:
+                conn.commit()
+                return 0
+
+            cur.execute(rules.load_sql())
+            cur.execute(rules.rederive)
+            updated = cur.rowcount
+            cur.execute("UPDATE derived_rules SET version = %s, updated_at = NOW() WHERE name = %s",
+                        (rules.version, rules.name))
+        conn.commit()
+
+    print(f"[DB] Loaded {rules.name} rules ({updated} jobs re-derived)", file=sys.stderr)
+    return updated
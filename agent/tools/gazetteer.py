@@ -0,0 +1,309 @@
+"""Location gazetteer for job search.
+
+Resolves free-text locations ("UK", "London", "Europe", "deutschland") to
+canonical ISO 3166-1 alpha-2 country codes and city ids, so jobs can carry
+normalized country_code / city_slug columns and location filters become
+indexed equality lookups instead of ILIKE scans.
+"""
+
+import re
+import unicodedata
+from typing import Optional, Tuple, Dict, NamedTuple
+
+# ISO code -> (canonical name, aliases)
+COUNTRIES = {
+    "us": ("United States", ["usa", "u.s.", "u.s.a.", "united states of america", "america"]),
+    "ca": ("Canada", []),
+    "mx": ("Mexico", ["méxico"]),
+    "br": ("Brazil", ["brasil"]),
+    "ar": ("Argentina", []),
+    "cl": ("Chile", []),
+    "co": ("Colombia", []),
+    "pe": ("Peru", []),
+    "gb": ("United Kingdom", ["uk", "u.k.", "great britain", "britain", "england", "scotland", "wales", "northern ireland"]),
+    "ie": ("Ireland", ["republic of ireland"]),
+    "fr": ("France", []),
+    "de": ("Germany", ["deutschland"]),
+    "nl": ("Netherlands", ["the netherlands", "holland"]),
+    "be": ("Belgium", []),
+    "lu": ("Luxembourg", []),
+    "ch": ("Switzerland", []),
+    "at": ("Austria", []),
+    "es": ("Spain", ["españa"]),
+    "pt": ("Portugal", []),
+    "it": ("Italy", ["italia"]),
+    "dk": ("Denmark", []),
+    "se": ("Sweden", []),
+    "no": ("Norway", []),
+    "fi": ("Finland", []),
+    "is": ("Iceland", []),
+    "pl": ("Poland", []),
+    "cz": ("Czech Republic", ["czechia"]),
+    "sk": ("Slovakia", []),
+    "hu": ("Hungary", []),
+    "ro": ("Romania", []),
+    "bg": ("Bulgaria", []),
+    "rs": ("Serbia", []),
+    "hr": ("Croatia", []),
+    "si": ("Slovenia", []),
+    "gr": ("Greece", []),
+    "ee": ("Estonia", []),
+    "lv": ("Latvia", []),
+    "lt": ("Lithuania", []),
+    "ua": ("Ukraine", []),
+    "ru": ("Russia", ["russian federation"]),
+    "tr": ("Turkey", ["türkiye", "turkiye"]),
+    "il": ("Israel", []),
+    "ae": ("United Arab Emirates", ["uae", "emirates"]),
+    "sa": ("Saudi Arabia", ["ksa"]),
+    "qa": ("Qatar", []),
+    "eg": ("Egypt", []),
+    "za": ("South Africa", []),
+    "ng": ("Nigeria", []),
+    "ke": ("Kenya", []),
+    "in": ("India", []),
+    "pk": ("Pakistan", []),
+    "cn": ("China", ["prc", "mainland china"]),
+    "hk": ("Hong Kong", []),
+    "tw": ("Taiwan", []),
+    "jp": ("Japan", []),
+    "kr": ("South Korea", ["korea", "republic of korea"]),
+    "sg": ("Singapore", []),
+    "my": ("Malaysia", []),
+    "th": ("Thailand", []),
+    "vn": ("Vietnam", ["viet nam"]),
+    "ph": ("Philippines", []),
+    "id": ("Indonesia", []),
+    "au": ("Australia", []),
+    "nz": ("New Zealand", []),
+}
+
+# (city name, ISO code, aliases); city ids are "<code>-<slug>"
+CITIES = [
+    ("Los Angeles", "us", ["la", "santa monica", "irvine"]),
+    ("San Francisco", "us", ["sf", "bay area", "san jose", "san mateo"]),
+    ("Seattle", "us", ["bellevue", "redmond"]),
+    ("New York", "us", ["nyc", "new york city", "brooklyn", "manhattan"]),
+    ("Austin", "us", []),
+    ("Dallas", "us", ["arlington"]),
+    ("Chicago", "us", []),
+    ("Boston", "us", []),
+    ("Atlanta", "us", []),
+    ("Miami", "us", []),
+    ("Las Vegas", "us", ["vegas"]),
+    ("Washington", "us", ["washington dc", "washington d.c."]),
+    ("Stamford", "us", []),
+    ("Toronto", "ca", []),
+    ("Vancouver", "ca", []),
+    ("Montreal", "ca", ["montréal"]),
+    ("Mexico City", "mx", ["cdmx"]),
+    ("São Paulo", "br", ["sao paulo"]),
+    ("Rio de Janeiro", "br", []),
+    ("Buenos Aires", "ar", []),
+    ("Santiago", "cl", []),
+    ("London", "gb", []),
+    ("Manchester", "gb", []),
+    ("Birmingham", "gb", []),
+    ("Leeds", "gb", []),
+    ("Brighton", "gb", []),
+    ("Guildford", "gb", []),
+    ("Leamington Spa", "gb", ["leamington", "royal leamington spa"]),
+    ("Edinburgh", "gb", []),
+    ("Glasgow", "gb", []),
+    ("Dublin", "ie", []),
+    ("Paris", "fr", []),
+    ("Lyon", "fr", []),
+    ("Berlin", "de", []),
+    ("Cologne", "de", ["köln", "koln"]),
+    ("Hamburg", "de", []),
+    ("Munich", "de", ["münchen", "munchen"]),
+    ("Frankfurt", "de", []),
+    ("Amsterdam", "nl", []),
+    ("Utrecht", "nl", []),
+    ("Rotterdam", "nl", []),
+    ("Brussels", "be", []),
+    ("Zurich", "ch", ["zürich"]),
+    ("Lausanne", "ch", []),
+    ("Geneva", "ch", []),
+    ("Vienna", "at", ["wien"]),
+    ("Madrid", "es", []),
+    ("Barcelona", "es", []),
+    ("Lisbon", "pt", ["lisboa"]),
+    ("Milan", "it", ["milano"]),
+    ("Rome", "it", ["roma"]),
+    ("Copenhagen", "dk", []),
+    ("Stockholm", "se", []),
+    ("Malmö", "se", ["malmo"]),
+    ("Oslo", "no", []),
+    ("Helsinki", "fi", []),
+    ("Warsaw", "pl", ["warszawa"]),
+    ("Katowice", "pl", []),
+    ("Krakow", "pl", ["kraków", "cracow"]),
+    ("Prague", "cz", ["praha"]),
+    ("Bratislava", "sk", []),
+    ("Budapest", "hu", []),
+    ("Bucharest", "ro", []),
+    ("Belgrade", "rs", []),
+    ("Kyiv", "ua", ["kiev"]),
+    ("Istanbul", "tr", []),
+    ("Tel Aviv", "il", []),
+    ("Dubai", "ae", []),
+    ("Abu Dhabi", "ae", []),
+    ("Riyadh", "sa", []),
+    ("Doha", "qa", []),
+    ("Cairo", "eg", []),
+    ("Cape Town", "za", []),
+    ("Johannesburg", "za", []),
+    ("Lagos", "ng", []),
+    ("Bangalore", "in", ["bengaluru"]),
+    ("Mumbai", "in", ["bombay"]),
+    ("Delhi", "in", ["new delhi"]),
+    ("Shanghai", "cn", []),
+    ("Beijing", "cn", []),
+    ("Shenzhen", "cn", []),
+    ("Taipei", "tw", []),
+    ("Tokyo", "jp", []),
+    ("Osaka", "jp", []),
+    ("Seoul", "kr", []),
+    ("Busan", "kr", []),
+    ("Kuala Lumpur", "my", ["kl"]),
+    ("Bangkok", "th", []),
+    ("Ho Chi Minh City", "vn", ["saigon", "hcmc"]),
+    ("Hanoi", "vn", []),
+    ("Manila", "ph", ["metro manila"]),
+    ("Jakarta", "id", []),
+    ("Sydney", "au", []),
+    ("Melbourne", "au", []),
+    ("Brisbane", "au", []),
+    ("Auckland", "nz", []),
+]
+
+# Region name -> ISO codes (aliases share the tuple)
+_EU = ("at", "be", "bg", "hr", "cz", "dk", "ee", "fi", "fr", "de", "gr", "hu", "ie", "it",
+       "lv", "lt", "lu", "nl", "pl", "pt", "ro", "sk", "si", "es", "se")
+_EUROPE = _EU + ("gb", "ch", "no", "is", "rs", "ua", "tr")
+_MENA = ("ae", "sa", "qa", "eg", "il", "tr")
+_APAC = ("cn", "hk", "tw", "jp", "kr", "sg", "my", "th", "vn", "ph", "id", "in", "au", "nz")
+_NORTH_AMERICA = ("us", "ca", "mx")
+_LATAM = ("mx", "br", "ar", "cl", "co", "pe")
+
+REGIONS = {
+    "europe": _EUROPE,
+    "eu": _EU,
+    "european union": _EU,
+    "emea": _EUROPE + _MENA + ("za", "ng", "ke"),
+    "nordics": ("dk", "se", "no", "fi", "is"),
+    "scandinavia": ("dk", "se", "no"),
+    "dach": ("de", "at", "ch"),
+    "benelux": ("be", "nl", "lu"),
+    "middle east": _MENA,
+    "mena": _MENA,
+    "apac": _APAC,
+    "asia": _APAC,
+    "sea": ("sg", "my", "th", "vn", "ph", "id"),
+    "southeast asia": ("sg", "my", "th", "vn", "ph", "id"),
+    "oceania": ("au", "nz"),
+    "anz": ("au", "nz"),
+    "north america": _NORTH_AMERICA,
+    "na": _NORTH_AMERICA,
+    "americas": _NORTH_AMERICA + _LATAM,
+    "latam": _LATAM,
+    "latin america": _LATAM,
+    "south america": ("br", "ar", "cl", "co", "pe"),
+}
+
+
+class Place(NamedTuple):
+    """A resolved location: the country codes it covers and, for cities, the city id.
+
+    `key` is canonical - resolve_location(place.key) returns the same place.
+    """
+    key: str
+    country_codes: Tuple[str, ...]
+    city_slug: Optional[str] = None
+
+
+# Shared with the SQL version of normalize_job_location (job_search.JOBS_LOCATION_DDL)
+NAME_SEPARATORS = r"[^\w.]+"
+LOCATION_SEPARATORS = r"[,/|()–-]+| or | and "
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(NAME_SEPARATORS, " ", (text or "").lower()).split()).strip(".")
+
+
+def _slug(name: str) -> str:
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+
+def _compile() -> Dict[str, Place]:
+    """Flatten countries, cities and regions into one normalized-name lookup table.
+
+    Countries win over regions and cities on collisions (e.g. "washington"
+    only ever means the city here; "id" is Indonesia, never an id).
+    """
+    table: Dict[str, Place] = {}
+
+    for name, codes in REGIONS.items():
+        place = Place(name, tuple(sorted(set(codes))))
+        table[_normalize(name)] = place
+
+    for name, code, aliases in CITIES:
+        city_slug = f"{code}-{_slug(name)}"
+        place = Place(city_slug, (code,), city_slug)
+        for alias in [name, city_slug] + aliases:
+            table[_normalize(alias)] = place
+
+    for code, (name, aliases) in COUNTRIES.items():
+        place = Place(_normalize(name), (code,))
+        for alias in [name, code] + aliases:
+            table[_normalize(alias)] = place
+
+    return table
+
+
+GAZETTEER = _compile()
+
+
+def resolve_location(text: Optional[str]) -> Optional[Place]:
+    """Resolve user input ("UK", "London", "Europe") to a Place, or None if unknown."""
+    if not text:
+        return None
+    return GAZETTEER.get(_normalize(text))
+
+
+def country_name(code: str) -> Optional[str]:
+    """Canonical country name for an ISO code."""
+    entry = COUNTRIES.get((code or "").lower())
+    return entry[0] if entry else None
+
+
+_LOCATION_SPLIT = re.compile(LOCATION_SEPARATORS, re.IGNORECASE)
+
+
+def normalize_job_location(location: Optional[str], country: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(country_code, city_slug) for a job's free-text location and country columns.
+
+    The country column wins when it resolves to a single country; otherwise the
+    first location part naming a city or a single country is used.
+    """
+    country_code = None
+    place = resolve_location(country)
+    if place and len(place.country_codes) == 1:
+        country_code = place.country_codes[0]
+
+    city_slug = None
+    parts = [location or ""] + _LOCATION_SPLIT.split(location or "")
+    for part in parts:
+        place = resolve_location(part)
+        if not place or len(place.country_codes) != 1:
+            continue
+        if place.city_slug and city_slug is None:
+            if country_code is None or place.country_codes[0] == country_code:
+                city_slug = place.city_slug
+                country_code = place.country_codes[0]
+        elif country_code is None:
+            country_code = place.country_codes[0]
+
+    return country_code, city_slug
@@ -0,0 +1,222 @@
+"""
+Archive of expired job postings.
+
+Every job query filters on is_active = true, but deactivated postings used
+to stay in jobs (and every index on it) forever. archive_inactive_jobs()
+moves jobs that have been inactive for ARCHIVE_AFTER_DAYS into jobs_archive
+in small batches - one DELETE ... RETURNING feeding an INSERT per batch, each
+its own transaction - so the hot table stays proportional to live inventory.
+
+Archived jobs are still readable: get_job_by_id() falls back to jobs_archive
+for ids the hot table doesn't have (old saved jobs), and saved-job lists join
+jobs_including_archived. A job that reappears in a feed is simply inserted
+into jobs again; the hot row wins over its archived copy.
+
+Runs are serialized by a session advisory lock on a direct connection: a run
+that finds another in progress (another worker, a cron'd CLI) skips. The API
+runs it from one background task per process, every
+JOB_ARCHIVE_INTERVAL_SECONDS (jittered, first run one interval after boot,
+0 disables), so long-lived workers archive and restarts don't.
+
+Usage:
+    python -m tools.job_archive [--days 30] [--batch-size 500] [--dry-run]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Optional, List
+
+from .db_pool import get_connection, direct_connection
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("JOB_ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("JOB_ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("JOB_ARCHIVE_INTERVAL_SECONDS", "21600"))
+# Arbitrary, but the same for every worker (and distinct from the migration lock)
+ARCHIVE_LOCK_KEY = 4_207_312
+# Pause between batches so a large first run doesn't starve live traffic
+ARCHIVE_BATCH_PAUSE_SECONDS = 0.05
+
+# Derived for search/dedup of live jobs only - not copied into the archive
+ARCHIVE_SKIP_COLUMNS = {"search_vector", "minhash"}
+
+# LIKE copies the columns jobs has when the archive is created; the mover only
+# copies columns both tables have, so columns added to jobs later are dropped
+# unless a migration adds them here too.
+JOBS_ARCHIVE_DDL = """
+    CREATE TABLE IF NOT EXISTS jobs_archive (LIKE jobs INCLUDING DEFAULTS);
+    ALTER TABLE jobs_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ DEFAULT NOW();
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_archive_id ON jobs_archive (id);
+
+    -- What the mover scans: small, since it only covers inactive rows still in jobs
+    CREATE INDEX IF NOT EXISTS idx_jobs_inactive_updated ON jobs (updated_at) WHERE is_active = false;
+
+    CREATE OR REPLACE VIEW jobs_including_archived AS
+        SELECT id, title, company, location, category, is_active FROM jobs
+        UNION ALL
+        SELECT a.id, a.title, a.company, a.location, a.category, false FROM jobs_archive a
+        WHERE NOT EXISTS (SELECT 1 FROM jobs j WHERE j.id = a.id);
+"""
+
+
+def _archive_columns(cur) -> List[str]:
+    """Columns present in both jobs and jobs_archive, in jobs order."""
+    cur.execute("""
+        SELECT j.column_name
+        FROM information_schema.columns j
+        JOIN information_schema.columns a
+          ON a.table_schema = j.table_schema AND a.table_name = 'jobs_archive'
+         AND a.column_name = j.column_name
+        WHERE j.table_schema = current_schema() AND j.table_name = 'jobs'
+        ORDER BY j.ordinal_position
+    """)
+    return [row[0] for row in cur.fetchall() if row[0] not in ARCHIVE_SKIP_COLUMNS]
+
+
+def count_archivable(older_than_days: int = ARCHIVE_AFTER_DAYS) -> int:
+    """Inactive jobs in the hot table old enough to archive."""
+    with get_connection() as conn:
+        if not conn:
+            return 0
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COUNT(*) FROM jobs
+                WHERE is_active = false AND updated_at < NOW() - make_interval(days => %s)
+            """, (older_than_days,))
+            count = cur.fetchone()[0]
+        conn.rollback()
+    return count
+
+
+def archive_inactive_jobs(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                          max_batches: Optional[int] = None) -> dict:
+    """Move jobs inactive for older_than_days from jobs to jobs_archive, batch by batch.
+
+    Returns {"archived", "batches", "seconds"}, plus "skipped": True when
+    another run holds the archive lock. A failed batch is rolled back and
+    stops the run; batches already committed stay archived.
+    """
+    started = time.monotonic()
+    archived = batches = 0
+    try:
+        with direct_connection() as conn:
+            if not conn:
+                return {"archived": 0, "batches": 0, "seconds": 0.0}
+
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s)", (ARCHIVE_LOCK_KEY,))
+                locked = cur.fetchone()[0]
+            conn.commit()
+            if not locked:
+                print("[Archive] Another archive run is in progress - skipping", file=sys.stderr)
+                return {"archived": 0, "batches": 0, "seconds": 0.0, "skipped": True}
+            # The lock is released when the connection closes
+
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('jobs_archive')")
+                if cur.fetchone()[0] is None:
+                    print("[Archive] No jobs_archive table - run migrations first", file=sys.stderr)
+                    conn.rollback()
+                    return {"archived": 0, "batches": 0, "seconds": 0.0}
+                columns = ", ".join(_archive_columns(cur))
+            conn.commit()
+
+            updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns.split(", ") if c != "id")
+            move_sql = f"""
+                WITH moved AS (
+                    DELETE FROM jobs
+                    WHERE id IN (
+                        SELECT id FROM jobs
+                        WHERE is_active = false AND updated_at < NOW() - make_interval(days => %s)
+                        ORDER BY updated_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING {columns}
+                ), archived AS (
+                    INSERT INTO jobs_archive ({columns}, archived_at)
+                    SELECT {columns}, NOW() FROM moved
+                    ON CONFLICT (id) DO UPDATE SET {updates}, archived_at = NOW()
+                    RETURNING id
+                )
+                SELECT array_agg(id) FROM archived
+            """
+
+            while max_batches is None or batches < max_batches:
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(move_sql, (older_than_days, batch_size))
+                        moved_ids = cur.fetchone()[0] or []
+                        if moved_ids:
+                            # Archived jobs can't be duplicates of live ones any more
+                            cur.execute("DELETE FROM job_lsh_buckets WHERE job_id = ANY(%s::text[])",
+                                        ([str(i) for i in moved_ids],))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+                if not moved_ids:
+                    break
+                archived += len(moved_ids)
+                batches += 1
+                if len(moved_ids) < batch_size:
+                    break
+                time.sleep(ARCHIVE_BATCH_PAUSE_SECONDS)
+
+    except Exception as e:
+        print(f"[Archive] Error after {archived} jobs: {e}", file=sys.stderr)
+
+    result = {"archived": archived, "batches": batches, "seconds": round(time.monotonic() - started, 2)}
+    if archived:
+        print(f"[Archive] Moved {archived} inactive jobs to jobs_archive in {batches} batches", file=sys.stderr)
+    return result
+
+
+async def archive_periodically(interval_seconds: int = ARCHIVE_INTERVAL_SECONDS):
+    """Run archive_inactive_jobs() every interval (+/-10% jitter) until cancelled; the first run waits too."""
+    while True:
+        await asyncio.sleep(interval_seconds * random.uniform(0.9, 1.1))
+        try:
+            await asyncio.to_thread(archive_inactive_jobs)
+        except Exception as e:
+            print(f"[Archive] Scheduled run failed: {e}", file=sys.stderr)
+
+
+def table_sizes() -> dict:
+    """Row estimates and total size (with indexes) of jobs and jobs_archive."""
+    with get_connection() as conn:
+        if not conn:
+            return {}
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT c.relname, c.reltuples::bigint, pg_size_pretty(pg_total_relation_size(c.oid))
+                FROM pg_class c
+                WHERE c.relname IN ('jobs', 'jobs_archive') AND c.relkind = 'r'
+                  AND c.relnamespace = current_schema()::regnamespace
+            """)
+            rows = cur.fetchall()
+        conn.rollback()
+    return {name: {"rows_estimate": rows_estimate, "total_size": size} for name, rows_estimate, size in rows}
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Move long-inactive jobs into jobs_archive")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archive jobs inactive for this long")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int)
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        print(json.dumps({"archivable": count_archivable(args.days), "tables": table_sizes()}, indent=2))
+    else:
+        result = archive_inactive_jobs(args.days, args.batch_size, args.max_batches)
+        print(json.dumps({**result, "tables": table_sizes()}, indent=2))
@@ -0,0 +1,268 @@
+"""
+Derived job facets: game titles, seniority and remote.
+
+Per-game and per-level pages ("Counter-Strike jobs", "entry-level UK jobs")
+would otherwise need an ILIKE scan over descriptions. A trigger tags every
+inserted or edited job from its text with:
+
+- games: slugs from the game lists in ESPORTS_COMPANIES (plus aliases),
+- seniority: intern / entry / mid / senior / lead / executive,
+- remote: true for remote roles,
+
+stored in indexed columns and filtered with search_jobs(game=, seniority=, remote=).
+The trigger runs the patterns compiled here, loaded into job_facet_rules
+(FACET_RULES).
+"""
+
+import re
+from typing import Optional, List, Dict, Tuple
+
+from .company_lookup import ESPORTS_COMPANIES
+from .derived_rules import DERIVED_RULES_DDL, RuleSet
+
+# Aliases for titles in ESPORTS_COMPANIES, keyed by their canonical name. Very
+# short or generic names ("ow", "league") are left out - too many false hits.
+GAME_ALIASES = {
+    "CS2": ["counter-strike", "counter strike", "cs:go", "csgo", "cs go", "cs 2"],
+    "League of Legends": ["lol esports", "lck", "lec", "lcs"],
+    "Dota 2": ["dota"],
+    "Valorant": ["vct"],
+    "Rainbow Six Siege": ["rainbow six", "r6", "r6s"],
+    "Call of Duty": ["cod", "warzone", "cdl"],
+    "Overwatch": ["overwatch 2", "owl"],
+    "Super Smash Bros": ["smash bros", "ssbu"],
+    "Arena of Valor": ["aov", "lien quan", "honor of kings"],
+    "Teamfight Tactics": ["tft"],
+    "Legends of Runeterra": ["runeterra"],
+}
+
+# Popular titles no company profile lists yet
+EXTRA_GAMES = {
+    "Fortnite": [],
+    "Apex Legends": ["apex"],
+    "PUBG": ["pubg mobile", "battlegrounds"],
+    "Mobile Legends": ["mlbb", "mobile legends: bang bang"],
+    "EA Sports FC": ["ea fc", "fifa", "fc 24", "fc 25"],
+    "Street Fighter": ["sf6"],
+    "Tekken": [],
+    "StarCraft II": ["starcraft", "sc2"],
+    "Hearthstone": [],
+    "Halo": [],
+}
+
+SENIORITY_LEVELS = ["intern", "entry", "mid", "senior", "lead", "executive"]
+
+# Checked top to bottom against the title, then the description phrases
+SENIORITY_TITLE_TERMS = [
+    ("intern", ["intern", "internship", "placement", "work experience"]),
+    ("executive", ["head of", "director", "vp", "vice president", "chief", "ceo", "cto", "cmo", "coo", "cfo", "founder"]),
+    ("lead", ["lead", "principal", "team lead"]),
+    ("senior", ["senior", "sr", "snr", "experienced"]),
+    ("entry", ["junior", "jr", "graduate", "trainee", "entry level", "entry-level", "apprentice", "assistant", "associate"]),
+    ("mid", ["mid level", "mid-level", "intermediate"]),
+]
+# "Lead" as in sales leads, not a role - removed from titles before matching
+NON_SENIORITY_PHRASES = ["lead generation", "lead gen", "lead-gen", "lead qualification", "lead nurturing"]
+SENIORITY_DESCRIPTION_TERMS = [
+    ("entry", ["entry level", "entry-level", "no experience required", "graduate role", "0-1 years", "0-2 years"]),
+    ("senior", ["5+ years", "7+ years", "senior level"]),
+]
+SENIORITY_ALIASES = {
+    "internship": "intern", "junior": "entry", "entry level": "entry", "entry-level": "entry",
+    "graduate": "entry", "mid level": "mid", "mid-level": "mid", "intermediate": "mid",
+    "sr": "senior", "principal": "lead", "director": "executive", "head": "executive",
+}
+
+# Short names only trusted in a search box, never in posting text
+QUERY_GAME_ALIASES = {
+    "lol": "league-of-legends", "league": "league-of-legends", "cs": "cs2", "valo": "valorant",
+    "ow": "overwatch", "rl": "rocket-league", "smash": "super-smash-bros", "mlbb": "mobile-legends",
+}
+
+REMOTE_TERMS = ["remote", "work from home", "wfh", "fully distributed", "anywhere"]
+
+
+def _game_name(raw: str) -> Optional[str]:
+    """Canonical title from a company profile entry, or None for non-game entries."""
+    name = re.sub(r"\s*\(.*?\)", "", raw).strip()
+    if not name or name.lower().startswith(("sponsor", "agency")):
+        return None
+    return name
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def _compile_games() -> Dict[str, Tuple[str, List[str]]]:
+    """slug -> (name, search phrases) from ESPORTS_COMPANIES + GAME_ALIASES + EXTRA_GAMES."""
+    names = {}
+    for data in ESPORTS_COMPANIES.values():
+        for raw in data["games"]:
+            name = _game_name(raw)
+            if name:
+                names.setdefault(name, [])
+    for name, aliases in {**GAME_ALIASES, **EXTRA_GAMES}.items():
+        names.setdefault(name, []).extend(aliases)
+    return {_slug(name): (name, [name.lower()] + [a.lower() for a in aliases]) for name, aliases in names.items()}
+
+
+GAMES = _compile_games()
+
+
+def _phrase_pattern(phrases: List[str]) -> re.Pattern:
+    alternatives = sorted((re.escape(p) for p in phrases), key=len, reverse=True)
+    return re.compile(r"(?<![a-z0-9])(" + "|".join(alternatives) + r")(?![a-z0-9])", re.I)
+
+
+_GAME_PATTERNS = {slug: _phrase_pattern(phrases) for slug, (_, phrases) in GAMES.items()}
+_SENIORITY_TITLE_PATTERNS = [(level, _phrase_pattern(terms)) for level, terms in SENIORITY_TITLE_TERMS]
+_SENIORITY_DESCRIPTION_PATTERNS = [(level, _phrase_pattern(terms)) for level, terms in SENIORITY_DESCRIPTION_TERMS]
+_REMOTE_PATTERN = _phrase_pattern(REMOTE_TERMS)
+_NON_SENIORITY_PATTERN = _phrase_pattern(NON_SENIORITY_PHRASES)
+
+
+def extract_games(*texts: Optional[str]) -> List[str]:
+    """Game slugs mentioned in any of texts, in GAMES order."""
+    text = " ".join(t for t in texts if t)
+    return [slug for slug, pattern in _GAME_PATTERNS.items() if pattern.search(text)]
+
+
+def extract_seniority(title: Optional[str], description: Optional[str] = None) -> Optional[str]:
+    """Seniority level from the title, else from telling description phrases; None if unclear."""
+    title = _NON_SENIORITY_PATTERN.sub(" ", title or "")
+    for level, pattern in _SENIORITY_TITLE_PATTERNS:
+        if pattern.search(title):
+            return level
+    for level, pattern in _SENIORITY_DESCRIPTION_PATTERNS:
+        if pattern.search(description or ""):
+            return level
+    return None
+
+
+def resolve_game(text: Optional[str]) -> Optional[str]:
+    """Game slug for user input ("counter strike", "LoL esports", "cs2"), or None."""
+    if not text:
+        return None
+    slug = _slug(text)
+    if slug in GAMES:
+        return slug
+    if slug in QUERY_GAME_ALIASES:
+        return QUERY_GAME_ALIASES[slug]
+    games = extract_games(text)
+    return games[0] if games else None
+
+
+def resolve_seniority(text: Optional[str]) -> Optional[str]:
+    """Seniority level for user input ("junior", "Entry-level"), or None."""
+    if not text:
+        return None
+    value = " ".join(text.lower().split())
+    if value in SENIORITY_LEVELS:
+        return value
+    return SENIORITY_ALIASES.get(value) or extract_seniority(value)
+
+
+# =====
+# Facet columns
+# =====
+# job_facets() is extract_games/extract_seniority (and the remote check) in
+# SQL over job_facet_rules. Games are found with one combined pattern - the
+# matched phrases map back to slugs - which keeps the regexes a row compiles
+# within Postgres' small regex cache.
+JOBS_FACETS_DDL = DERIVED_RULES_DDL + """
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS games TEXT[];
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS seniority TEXT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS remote BOOLEAN;
+    CREATE INDEX IF NOT EXISTS idx_jobs_games ON jobs USING GIN (games) WHERE is_active = true;
+    CREATE INDEX IF NOT EXISTS idx_jobs_seniority ON jobs (seniority) WHERE is_active = true;
+    CREATE INDEX IF NOT EXISTS idx_jobs_remote ON jobs (remote) WHERE is_active = true AND remote = true;
+
+    CREATE TABLE IF NOT EXISTS job_facet_rules (
+        kind TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        value TEXT,
+        pattern TEXT NOT NULL,
+        PRIMARY KEY (kind, position)
+    );
+
+    CREATE OR REPLACE FUNCTION job_facets(title TEXT, description TEXT, skills TEXT[], location TEXT, job_type TEXT,
+                                          OUT games TEXT[], OUT seniority TEXT, OUT remote BOOLEAN) AS $$
+    DECLARE
+        rule RECORD;
+        role TEXT := regexp_replace(coalesce(title, ''),
+            (SELECT r.pattern FROM job_facet_rules r WHERE r.kind = 'not_seniority'), ' ', 'gi');
+    BEGIN
+        games := ARRAY(
+            SELECT r.value FROM job_facet_rules r
+            WHERE r.kind = 'game_phrase' AND r.pattern IN (
+                SELECT lower(m[1]) FROM regexp_matches(concat_ws(' ', title, array_to_string(skills, ' '), description),
+                    (SELECT g.pattern FROM job_facet_rules g WHERE g.kind = 'games'), 'gi') AS m)
+            GROUP BY r.value
+            ORDER BY min(r.position));
+
+        FOR rule IN SELECT r.value, r.pattern FROM job_facet_rules r
+                    WHERE r.kind = 'seniority_title' ORDER BY r.position LOOP
+            IF role ~* rule.pattern THEN
+                seniority := rule.value;
+                EXIT;
+            END IF;
+        END LOOP;
+        IF seniority IS NULL THEN
+            FOR rule IN SELECT r.value, r.pattern FROM job_facet_rules r
+                        WHERE r.kind = 'seniority_description' ORDER BY r.position LOOP
+                IF description ~* rule.pattern THEN
+                    seniority := rule.value;
+                    EXIT;
+                END IF;
+            END LOOP;
+        END IF;
+
+        remote := coalesce(concat_ws(' ', title, location, job_type) ~*
+                           (SELECT r.pattern FROM job_facet_rules r WHERE r.kind = 'remote'), false);
+    END
+    $$ LANGUAGE plpgsql STABLE;
+
+    CREATE OR REPLACE FUNCTION jobs_facets_update() RETURNS trigger AS $$
+    BEGIN
+        SELECT * INTO NEW.games, NEW.seniority, NEW.remote
+        FROM job_facets(NEW.title, NEW.description, NEW.skills, NEW.location, NEW.type);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS jobs_facets_trigger ON jobs;
+    CREATE TRIGGER jobs_facets_trigger
+        BEFORE INSERT OR UPDATE OF title, description, skills, location, type ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_facets_update();
+"""
+
+
+def _facet_rules() -> List[list]:
+    """[kind, position, value, pattern] rows for job_facet_rules."""
+    phrases = [(slug, phrase) for slug, (_, slug_phrases) in GAMES.items() for phrase in slug_phrases]
+    rules = [["game_phrase", i, slug, phrase] for i, (slug, phrase) in enumerate(phrases)]
+    rules.append(["games", 0, None, _phrase_pattern([phrase for _, phrase in phrases]).pattern])
+    rules += [["seniority_title", i, level, pattern.pattern]
+              for i, (level, pattern) in enumerate(_SENIORITY_TITLE_PATTERNS)]
+    rules += [["seniority_description", i, level, pattern.pattern]
+              for i, (level, pattern) in enumerate(_SENIORITY_DESCRIPTION_PATTERNS)]
+    rules.append(["remote", 0, None, _REMOTE_PATTERN.pattern])
+    rules.append(["not_seniority", 0, None, _NON_SENIORITY_PATTERN.pattern])
+    return rules
+
+
+FACET_RULES = RuleSet(
+    name="facets",
+    data=_facet_rules(),
+    load="""
+        DELETE FROM job_facet_rules;
+        INSERT INTO job_facet_rules (kind, position, value, pattern)
+        SELECT r->>0, (r->>1)::integer, r->>2, r->>3 FROM jsonb_array_elements({rules}) AS r;
+    """,
+    rederive="""
+        UPDATE jobs SET games = f.games, seniority = f.seniority, remote = f.remote
+        FROM jobs j CROSS JOIN LATERAL job_facets(j.title, j.description, j.skills, j.location, j.type) f
+        WHERE jobs.id = j.id AND (jobs.games, jobs.seniority, jobs.remote) IS DISTINCT FROM (f.games, f.seniority, f.remote)
+    """,
+)
@@ -0,0 +1,463 @@
+"""
+In-process inverted index over active jobs.
+
+The jobs table is small and read-heavy, so search_jobs can be served from
+memory: token postings over title/company/skills/description plus
+category/country/type postings, intersected per search. The snapshot is
+refreshed incrementally from a GREATEST(updated_at, posted_date) watermark
+rather than rebuilt, and the SQL path (search_jobs_sync) stays the fallback
+and the reference for verify_index_equivalence().
+
+Every writer must move updated_at forward for the incremental refresh to see
+its change. JOB_INDEX_DDL's trigger does that for any UPDATE of an indexed
+column (including deactivation) that doesn't set updated_at itself. Hard
+DELETEs and transactions that commit long after they started are caught by a
+full reload every JOB_INDEX_FULL_REFRESH_SECONDS.
+
+Enable with JOB_INDEX_ENABLED=true.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import bisect
+import threading
+from datetime import timedelta
+from typing import Optional, List, Dict, Set
+
+from .db_pool import get_connection
+from .gazetteer import resolve_location, normalize_job_location
+from .job_search import (
+    JOB_COLUMNS, JobSearchResult, _row_to_job, search_jobs_sync,
+    notify_jobs_changed
+)
+
+JOB_INDEX_ENABLED = os.getenv("JOB_INDEX_ENABLED", "false").lower() == "true"
+JOB_INDEX_REFRESH_SECONDS = float(os.getenv("JOB_INDEX_REFRESH_SECONDS", "60"))
+JOB_INDEX_FULL_REFRESH_SECONDS = float(os.getenv("JOB_INDEX_FULL_REFRESH_SECONDS", "3600"))
+# Fraction of index-served searches shadowed against SQL and logged on mismatch
+JOB_INDEX_VERIFY_RATE = float(os.getenv("JOB_INDEX_VERIFY_RATE", "0"))
+# Result sets are compared unranked, with a limit high enough that ties don't matter
+VERIFY_LIMIT = 500
+
+WATERMARK_SQL = "GREATEST(updated_at, posted_date)"
+# Incremental refreshes re-read this far behind the watermark: updated_at is
+# the writer's transaction start, which can precede rows committed earlier
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+_TRACKED = [c.strip() for c in JOB_COLUMNS.split(",")] + ["posted_date", "is_active"]
+
+JOB_INDEX_DDL = f"""
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+    CREATE OR REPLACE FUNCTION jobs_touch_updated_at() RETURNS trigger AS $$
+    BEGIN
+        -- Writers that set updated_at themselves (the loader) keep their value
+        IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at
+           AND ROW({", ".join("NEW." + c for c in _TRACKED)})
+               IS DISTINCT FROM ROW({", ".join("OLD." + c for c in _TRACKED)}) THEN
+            NEW.updated_at := NOW();
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS jobs_touch_updated_at_trigger ON jobs;
+    CREATE TRIGGER jobs_touch_updated_at_trigger
+        BEFORE UPDATE ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_touch_updated_at();
+"""
+
+# Same field priority as SEARCH_RANK_WEIGHTS on the SQL side
+FIELD_WEIGHTS = {"title": 1.0, "company": 0.6, "skills": 0.3, "description": 0.1}
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "the", "to", "with", "job", "jobs",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so 'coaching'/'coaches' meet 'coach'."""
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOP_WORDS]
+
+
+class JobIndex:
+    """Inverted index snapshot of active jobs with incremental refresh."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self.docs: Dict[str, JobSearchResult] = {}
+        self.posted: Dict[str, float] = {}
+        self.doc_terms: Dict[str, Dict[str, Set[str]]] = {}
+        self.terms: Dict[str, Set[str]] = {}
+        self.facets: Dict[str, Dict[str, Set[str]]] = {"category": {}, "country": {}, "type": {}}
+        # Gazetteer postings: ISO country code or city slug -> job ids
+        self.places: Dict[str, Set[str]] = {}
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+        self.watermark = None
+        self.last_refresh = 0.0
+        self.last_full_refresh = 0.0
+        self.ready = False
+
+    # -- maintenance --
+
+    def _remove(self, job_id: str):
+        job = self.docs.pop(job_id, None)
+        if job is None:
+            return
+        self.posted.pop(job_id, None)
+        for tokens in self.doc_terms.pop(job_id, {}).values():
+            for token in tokens:
+                postings = self.terms.get(token)
+                if postings is not None:
+                    postings.discard(job_id)
+                    if not postings:
+                        del self.terms[token]
+                        self._vocab_dirty = True
+        for field, value in (("category", job.category), ("country", job.country), ("type", job.type)):
+            postings = self.facets[field].get((value or "").lower())
+            if postings is not None:
+                postings.discard(job_id)
+                if not postings:
+                    del self.facets[field][(value or "").lower()]
+        for place in normalize_job_location(job.location, job.country):
+            postings = self.places.get(place)
+            if postings is not None:
+                postings.discard(job_id)
+                if not postings:
+                    del self.places[place]
+
+    def _add(self, job: JobSearchResult, posted_ts: float):
+        fields = {
+            "title": set(tokenize(job.title)),
+            "company": set(tokenize(job.company)),
+            "skills": set(tokenize(" ".join(job.skills))),
+            "description": set(tokenize(job.description)),
+        }
+        self.docs[job.id] = job
+        self.posted[job.id] = posted_ts
+        self.doc_terms[job.id] = fields
+        for tokens in fields.values():
+            for token in tokens:
+                if token not in self.terms:
+                    self.terms[token] = set()
+                    self._vocab_dirty = True
+                self.terms[token].add(job.id)
+        for field, value in (("category", job.category), ("country", job.country), ("type", job.type)):
+            self.facets[field].setdefault((value or "").lower(), set()).add(job.id)
+        for place in normalize_job_location(job.location, job.country):
+            if place:
+                self.places.setdefault(place, set()).add(job.id)
+
+    def apply_rows(self, rows) -> int:
+        """Apply (JOB_COLUMNS..., posted_ts, watermark, is_active) rows. Returns rows that changed."""
+        changed = 0
+        with self._lock:
+            for row in rows:
+                job = _row_to_job(row)
+                posted_ts, watermark, is_active = row[-3], row[-2], row[-1]
+                previous = self.docs.get(job.id)
+                if not (is_active and previous == job and self.posted.get(job.id) == (posted_ts or 0.0)):
+                    changed += 1
+                    self._remove(job.id)
+                    if is_active:
+                        self._add(job, posted_ts or 0.0)
+                if watermark is not None and (self.watermark is None or watermark > self.watermark):
+                    self.watermark = watermark
+        return changed
+
+    def _drop_missing(self, active_ids: Set[str]) -> int:
+        """Remove jobs a full reload no longer returned (deleted or archived)."""
+        with self._lock:
+            missing = [job_id for job_id in self.docs if job_id not in active_ids]
+            for job_id in missing:
+                self._remove(job_id)
+        return len(missing)
+
+    def refresh(self, full: bool = False) -> int:
+        """Pull rows changed since the watermark, or reload every active row. Returns rows changed.
+
+        The first refresh, and any after JOB_INDEX_FULL_REFRESH_SECONDS, is a full reload.
+        """
+        with self._refresh_lock:
+            full = (full or self.watermark is None
+                    or time.monotonic() - self.last_full_refresh >= JOB_INDEX_FULL_REFRESH_SECONDS)
+            select = f"""
+                SELECT {JOB_COLUMNS},
+                       COALESCE(EXTRACT(EPOCH FROM posted_date), 0)::float8,
+                       {WATERMARK_SQL},
+                       is_active
+                FROM jobs
+            """
+            with get_connection(read_only=True) as conn:
+                if not conn:
+                    return 0
+                with conn.cursor() as cur:
+                    if full:
+                        cur.execute(select + " WHERE is_active = true")
+                    else:
+                        # Unchanged rows in the overlap are no-ops in apply_rows
+                        cur.execute(select + f" WHERE {WATERMARK_SQL} >= %s",
+                                    (self.watermark - WATERMARK_OVERLAP,))
+                    rows = cur.fetchall()
+
+            first_load = not self.ready
+            changed = self.apply_rows(rows)
+            if full:
+                changed += self._drop_missing({str(row[0]) for row in rows})
+                self.last_full_refresh = time.monotonic()
+            self.last_refresh = time.monotonic()
+            self.ready = True
+            if changed and not first_load:
+                notify_jobs_changed()
+            print(f"[JobIndex] Refreshed {changed} changed rows ({len(self.docs)} active jobs)", file=sys.stderr)
+            return changed
+
+    def maybe_refresh(self):
+        """Refresh in the background once the snapshot is older than JOB_INDEX_REFRESH_SECONDS."""
+        if time.monotonic() - self.last_refresh < JOB_INDEX_REFRESH_SECONDS:
+            return
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self._safe_refresh, daemon=True).start()
+
+    def _safe_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"[JobIndex] Refresh error: {e}", file=sys.stderr)
+
+    # -- search --
+
+    def _expand(self, token: str) -> Set[str]:
+        """Postings for every vocabulary term starting with token (prefix match)."""
+        if self._vocab_dirty:
+            self._vocab = sorted(self.terms)
+            self._vocab_dirty = False
+        ids = set()
+        i = bisect.bisect_left(self._vocab, token)
+        while i < len(self._vocab) and self._vocab[i].startswith(token):
+            ids |= self.terms[self._vocab[i]]
+            i += 1
+        return ids
+
+    def _location_ids(self, location: str) -> Set[str]:
+        """Same semantics as the SQL location filter (see job_search._location_condition)."""
+        place = resolve_location(location)
+        if place is None:
+            return self._facet_substring("country", location)
+        if place.city_slug:
+            return self.places.get(place.city_slug, set())
+        ids = set()
+        for code in place.country_codes:
+            ids |= self.places.get(code, set())
+        return ids
+
+    def _facet_substring(self, field: str, needle: str) -> Set[str]:
+        needle = needle.lower()
+        ids = set()
+        for value, postings in self.facets[field].items():
+            if needle in value:
+                ids |= postings
+        return ids
+
+    def search_page(
+        self,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        country: Optional[str] = None,
+        job_type: Optional[str] = None,
+        limit: int = 5,
+        sort: str = "relevance",
+        after: Optional[list] = None,
+        include_facets: bool = False,
+    ) -> tuple:
+        """One page of results ordered by (score, posted, id) descending.
+
+        Returns (jobs, last_key, has_more, facets); pass last_key back as `after`
+        for the next page. facets is None unless include_facets is set.
+        """
+        with self._lock:
+            candidates: Optional[Set[str]] = None
+
+            def narrow(ids: Set[str]):
+                nonlocal candidates
+                candidates = set(ids) if candidates is None else candidates & ids
+
+            if category:
+                narrow(self.facets["category"].get(category.lower(), set()))
+            if country:
+                narrow(self._location_ids(country))
+            if job_type:
+                narrow(self._facet_substring("type", job_type))
+
+            query_tokens = tokenize(query) if query else []
+            # Smallest postings first keeps the intersections cheap
+            for token_ids in sorted((self._expand(t) for t in query_tokens), key=len):
+                narrow(token_ids)
+                if not candidates:
+                    break
+
+            if candidates is None:
+                candidates = set(self.docs)
+
+            facets = self._facet_counts(candidates) if include_facets else None
+
+            if sort == "relevance" and query_tokens:
+                def sort_key(job_id):
+                    fields = self.doc_terms[job_id]
+                    total = 0.0
+                    for token in query_tokens:
+                        total += max(
+                            (w for f, w in FIELD_WEIGHTS.items()
+                             if any(t.startswith(token) for t in fields[f])),
+                            default=0.0
+                        )
+                    return (total, self.posted[job_id], job_id)
+            else:
+                def sort_key(job_id):
+                    return (self.posted[job_id], job_id)
+
+            keyed = [(sort_key(job_id), job_id) for job_id in candidates]
+            if after is not None:
+                after = tuple(after)
+                keyed = [item for item in keyed if item[0] < after]
+            keyed.sort(reverse=True)
+
+            page = keyed[:limit]
+            last_key = list(page[-1][0]) if page else None
+            return [self.docs[job_id] for _, job_id in page], last_key, len(keyed) > limit, facets
+
+    def _facet_counts(self, ids: Set[str]) -> Dict[str, Dict[str, int]]:
+        """Same shape as the SQL facets: {facet: {value: count}}, most common first."""
+        facets = {}
+        for field in ("category", "country", "type"):
+            counts: Dict[str, int] = {}
+            for job_id in ids:
+                value = getattr(self.docs[job_id], field)
+                if value:
+                    counts[value] = counts.get(value, 0) + 1
+            facets[field] = dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+        return facets
+
+    def search(self, limit: int = 5, **kwargs) -> List[JobSearchResult]:
+        jobs, _, _, _ = self.search_page(limit=limit, **kwargs)
+        return jobs
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "jobs": len(self.docs),
+                "terms": len(self.terms),
+                "watermark": str(self.watermark) if self.watermark is not None else None,
+                "age_seconds": round(time.monotonic() - self.last_refresh, 1) if self.ready else None,
+            }
+
+
+# =====
+# Process-wide snapshot
+# =====
+
+_index: Optional[JobIndex] = None
+_index_lock = threading.Lock()
+
+
+def _build_index() -> JobIndex:
+    index = JobIndex()
+    try:
+        index.refresh()
+    except Exception as e:
+        print(f"[JobIndex] Initial build error: {e}", file=sys.stderr)
+    return index
+
+
+def get_job_index(block: bool = True) -> Optional[JobIndex]:
+    """The shared index if JOB_INDEX_ENABLED, built on first use.
+
+    With block=False (event-loop callers) the first build runs on a background
+    thread and None is returned until it is ready.
+    """
+    global _index
+    if not JOB_INDEX_ENABLED:
+        return None
+    if _index is None:
+        if not block:
+            if _index_lock.acquire(blocking=False):
+                def build():
+                    global _index
+                    try:
+                        if _index is None:
+                            _index = _build_index()
+                    finally:
+                        _index_lock.release()
+                threading.Thread(target=build, daemon=True).start()
+            return None
+        with _index_lock:
+            if _index is None:
+                _index = _build_index()
+    else:
+        _index.maybe_refresh()
+    return _index if _index.ready else None
+
+
+def _compare(index: JobIndex, kwargs: dict) -> Optional[dict]:
+    check = {**kwargs, "limit": VERIFY_LIMIT}
+    index_ids = {j.id for j in index.search(**check)}
+    sql_ids = {j.id for j in search_jobs_sync(**check)}
+    if index_ids == sql_ids:
+        return None
+    return {
+        "search": kwargs,
+        "index_only": sorted(index_ids - sql_ids),
+        "sql_only": sorted(sql_ids - index_ids),
+    }
+
+
+def verify_index_equivalence(searches: List[dict]) -> dict:
+    """Run each search (query/category/country/job_type kwargs) through both paths and report differences."""
+    index = get_job_index()
+    if index is None:
+        return {"verified": False, "error": "Job index not enabled or not ready"}
+
+    mismatches = []
+    for kwargs in searches:
+        mismatch = _compare(index, kwargs)
+        if mismatch:
+            mismatches.append(mismatch)
+    return {
+        "verified": True,
+        "checked": len(searches),
+        "matching": len(searches) - len(mismatches),
+        "mismatches": mismatches,
+    }
+
+
+def maybe_shadow_verify(index: JobIndex, kwargs: dict):
+    """Sample index-served searches and compare them against SQL in the background."""
+    if JOB_INDEX_VERIFY_RATE <= 0 or random.random() >= JOB_INDEX_VERIFY_RATE:
+        return
+
+    def run():
+        try:
+            mismatch = _compare(index, kwargs)
+            if mismatch:
+                print(f"[JobIndex] Mismatch vs SQL: {mismatch}", file=sys.stderr)
+        except Exception as e:
+            print(f"[JobIndex] Shadow verify error: {e}", file=sys.stderr)
+
+    threading.Thread(target=run, daemon=True).start()
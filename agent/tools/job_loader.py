@@ -0,0 +1,310 @@
+"""
+Bulk job ingestion.
+
+Streams a CSV or JSONL feed through COPY into a temporary staging table,
+hashing each job's content on the way, then in the same transaction:
+
+- inserts new jobs and updates only those whose content hash changed
+  (unchanged rows are not rewritten, so they don't bloat the table or
+  invalidate caches),
+- deactivates active jobs missing from the feed (optionally only those
+  from the same `source`).
+
+The feed is never held in memory, so 1M-row feeds load in bounded memory.
+Derived columns (locations, salaries, duplicate clusters, game/seniority facets) are refreshed
+afterwards and caches are notified only when something changed.
+
+Usage:
+    python -m tools.job_loader feed.jsonl [--format csv] [--source board-name]
+    python -m tools.job_loader --refresh-derived   # only recompute derived columns
+"""
+
+import io
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+from typing import Optional, Iterator, Iterable
+
+from .db_pool import get_connection
+
+# Feed fields loaded into jobs, in COPY order (skills is text[])
+FEED_COLUMNS = [
+    "id", "title", "company", "location", "country", "type", "salary",
+    "description", "skills", "category", "external_url", "posted_date",
+]
+# Alternative field names accepted in feeds
+FIELD_ALIASES = {"url": "external_url", "job_type": "type", "posted_at": "posted_date", "date_posted": "posted_date"}
+
+JOBS_LOADER_DDL = """
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS content_hash TEXT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS source TEXT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+"""
+
+STAGING_DDL = """
+    CREATE TEMP TABLE jobs_staging (
+        id TEXT,
+        title TEXT,
+        company TEXT,
+        location TEXT,
+        country TEXT,
+        type TEXT,
+        salary TEXT,
+        description TEXT,
+        skills TEXT[],
+        category TEXT,
+        external_url TEXT,
+        posted_date TIMESTAMPTZ,
+        content_hash TEXT
+    ) ON COMMIT DROP
+"""
+
+LOG_EVERY_ROWS = 100_000
+
+
+class FeedError(Exception):
+    """The feed is unusable (e.g. empty, or rows without an id)."""
+
+
+# =====
+# Feed parsing
+# =====
+
+def _read_records(stream: Iterable[str], format: str) -> Iterator[dict]:
+    if format == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _normalize_record(record: dict) -> dict:
+    job = {}
+    for key, value in record.items():
+        key = FIELD_ALIASES.get(key, key)
+        if key in FEED_COLUMNS:
+            job[key] = value if value != "" else None
+
+    skills = job.get("skills")
+    if isinstance(skills, str):
+        try:
+            skills = json.loads(skills)
+        except ValueError:
+            skills = [s.strip() for s in skills.replace(";", ",").split(",")]
+    job["skills"] = [str(s).strip() for s in skills or [] if str(s).strip()]
+
+    if not job.get("id"):
+        raise FeedError(f"Feed row without an id: {str(record)[:200]}")
+    job["id"] = str(job["id"])
+    return job
+
+
+def content_hash(job: dict) -> str:
+    """Stable hash of everything the loader writes for a job."""
+    payload = json.dumps([job.get(c) for c in FEED_COLUMNS], default=str, separators=(",", ":"))
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def _copy_value(value) -> str:
+    """One field in COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, list):
+        elements = ('"' + str(e).replace("\\", "\\\\").replace('"', '\\"') + '"' for e in value)
+        value = "{" + ",".join(elements) + "}"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class _CopyStream(io.RawIOBase):
+    """File-like view over an iterator of COPY lines, for cursor.copy_expert.
+
+    psycopg2 turns an exception raised while reading into a failed COPY, so
+    the original is kept in `error` for the caller to re-raise.
+    """
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = b""
+        self.error: Optional[Exception] = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self._buffer) < len(b):
+            try:
+                line = next(self._lines, None)
+            except Exception as e:
+                self.error = e
+                raise
+            if line is None:
+                break
+            self._buffer += line.encode()
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+# =====
+# Load
+# =====
+
+def load_jobs(stream: Iterable[str], format: str = "jsonl", source: Optional[str] = None,
+              deactivate_missing: bool = True) -> dict:
+    """Load a CSV/JSONL feed (any iterable of lines, e.g. an open file) into jobs.
+
+    Returns counts (read/inserted/updated/unchanged/deactivated) and rows/s.
+    With `source`, loaded jobs are tagged with it and only that source's jobs
+    are deactivated when missing. Everything happens in one transaction.
+    """
+    if format not in ("csv", "jsonl"):
+        raise ValueError("format must be csv or jsonl")
+
+    started = time.monotonic()
+    stats = {"read": 0}
+
+    def lines() -> Iterator[str]:
+        for record in _read_records(stream, format):
+            job = _normalize_record(record)
+            stats["read"] += 1
+            if stats["read"] % LOG_EVERY_ROWS == 0:
+                elapsed = time.monotonic() - started
+                print(f"[Loader] Staged {stats['read']} rows ({stats['read'] / elapsed:.0f} rows/s)", file=sys.stderr)
+            yield "\t".join(_copy_value(job.get(c)) for c in FEED_COLUMNS) + "\t" + content_hash(job) + "\n"
+
+    columns = ", ".join(FEED_COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in FEED_COLUMNS if c != "id")
+
+    with get_connection() as conn:
+        if not conn:
+            raise FeedError("DATABASE_URL is not configured")
+
+        with conn.cursor() as cur:
+            # content_hash/source/updated_at come from migrations (JOBS_LOADER_DDL)
+            cur.execute(STAGING_DDL)
+            copy_stream = _CopyStream(lines())
+            try:
+                cur.copy_expert(
+                    f"COPY jobs_staging ({columns}, content_hash) FROM STDIN",
+                    copy_stream, size=65536
+                )
+            except Exception:
+                if copy_stream.error is not None:
+                    raise copy_stream.error
+                raise
+            copy_seconds = time.monotonic() - started
+            if stats["read"] == 0:
+                # Never deactivate the whole table because of an empty feed
+                raise FeedError("Feed is empty")
+
+            cur.execute("CREATE INDEX ON jobs_staging (id)")
+            cur.execute("ANALYZE jobs_staging")
+
+            # DISTINCT ON: a feed listing a job twice upserts it once
+            cur.execute(f"""
+                WITH upserted AS (
+                    INSERT INTO jobs ({columns}, content_hash, source, is_active, updated_at)
+                    SELECT DISTINCT ON (id) {columns}, content_hash, %s, true, NOW()
+                    FROM jobs_staging
+                    ORDER BY id
+                    ON CONFLICT (id) DO UPDATE
+                    SET {updates}, content_hash = EXCLUDED.content_hash,
+                        source = COALESCE(EXCLUDED.source, jobs.source),
+                        is_active = true, updated_at = NOW()
+                    WHERE jobs.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                       OR jobs.is_active IS DISTINCT FROM true
+                    RETURNING (xmax = 0) AS inserted
+                )
+                SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+                FROM upserted
+            """, (source,))
+            inserted, updated = cur.fetchone()
+
+            deactivated = 0
+            if deactivate_missing:
+                scope = "AND source = %s" if source else ""
+                cur.execute(f"""
+                    UPDATE jobs SET is_active = false, updated_at = NOW()
+                    WHERE is_active = true {scope}
+                      AND NOT EXISTS (SELECT 1 FROM jobs_staging s WHERE s.id = jobs.id)
+                """, (source,) if source else None)
+                deactivated = cur.rowcount
+        conn.commit()
+
+    elapsed = time.monotonic() - started
+    result = {
+        "read": stats["read"],
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": stats["read"] - inserted - updated,
+        "deactivated": deactivated,
+        "seconds": round(elapsed, 2),
+        "copy_seconds": round(copy_seconds, 2),
+        "rows_per_second": round(stats["read"] / elapsed) if elapsed else None,
+    }
+    print(f"[Loader] {result}", file=sys.stderr)
+
+    if inserted or updated or deactivated:
+        refresh_derived_columns()
+    return result
+
+
+def refresh_derived_columns():
+    """Catch derived job columns up after rule changes, sign new/edited jobs for dedup and notify caches.
+
+    Triggers keep locations, salaries and facets current as rows are written;
+    refresh_rules() only re-derives existing rows once their rules in code
+    change (see tools/derived_rules.py).
+    """
+    from .job_search import LOCATION_RULES, notify_jobs_changed
+    from .salary import SALARY_RULES
+    from .job_facets import FACET_RULES
+    from .derived_rules import refresh_rules
+    from .dedup import backfill_signatures
+
+    for rules in (LOCATION_RULES, SALARY_RULES, FACET_RULES):
+        try:
+            refresh_rules(rules)
+        except Exception as e:
+            print(f"[Loader] Error refreshing {rules.name}: {e}", file=sys.stderr)
+    try:
+        backfill_signatures()
+    except Exception as e:
+        print(f"[Loader] Error refreshing dedup signatures: {e}", file=sys.stderr)
+    notify_jobs_changed()
+
+
+def load_jobs_file(path: str, format: Optional[str] = None, source: Optional[str] = None,
+                   deactivate_missing: bool = True) -> dict:
+    """load_jobs() for a file path; format defaults from the extension."""
+    format = format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="" if format == "csv" else None, encoding="utf-8") as f:
+        return load_jobs(f, format, source, deactivate_missing)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Load a CSV/JSONL jobs feed into Neon")
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--source", help="Tag jobs with this source and only deactivate its missing jobs")
+    parser.add_argument("--keep-missing", action="store_true", help="Don't deactivate jobs missing from the feed")
+    parser.add_argument("--refresh-derived", action="store_true",
+                        help="Recompute derived columns (locations, salaries, duplicates, facets) without loading")
+    args = parser.parse_args()
+
+    if args.refresh_derived:
+        refresh_derived_columns()
+    elif args.path:
+        print(json.dumps(load_jobs_file(args.path, args.format, args.source, not args.keep_missing), indent=2))
+    else:
+        parser.error("a feed path or --refresh-derived is required")
@@ -0,0 +1,201 @@
+"""
+Schema migrations.
+
+Every worker used to run all the CREATE TABLE / ALTER TABLE / CREATE INDEX
+IF NOT EXISTS statements on boot: extra round trips, a possible Neon wake-up
+and catalog locks on every cold start. Instead the schema is a numbered list
+of MIGRATIONS, and schema_migrations records the ones applied.
+
+run_migrations() at startup:
+- reads MAX(version) from schema_migrations; when it is current that single
+  query is all it does,
+- otherwise takes a session advisory lock (so one of N booting workers
+  migrates while the rest wait), re-reads the version and applies what's
+  missing in order, each migration in its own transaction with its row.
+
+Startup does nothing else. Migrations that add derived columns (locations,
+salaries, facets) also install the triggers and rules that fill them, so
+rows written from then on are derived; rows that already existed, and the
+dedup signatures, are filled by refresh_derived_columns(). That runs after
+each load, and as an explicit step after deploying migrations:
+`python -m tools.migrations --refresh-derived`.
+
+The existing DDL is idempotent, so databases created by the old ensure_*
+calls migrate cleanly from version 0. Advisory locks need a session, so the
+locked part connects to the direct endpoint when DATABASE_URL is a Neon
+"-pooler" host.
+
+To change the schema, append a migration - never edit an applied one.
+
+Usage:
+    python -m tools.migrations [--refresh-derived]   # apply pending migrations, print the version
+"""
+
+import sys
+import time
+import argparse
+from typing import Optional, Callable, Union, NamedTuple
+
+from psycopg2 import errors
+
+from .db_pool import get_connection, direct_connection
+from .user_context import PROFILE_ITEMS_DDL
+from .job_search import JOBS_SEARCH_DDL, JOBS_SEARCH_BACKFILL, JOBS_TRIGRAM_DDL, JOBS_LOCATION_DDL, LOCATION_RULES
+from .dedup import JOBS_DEDUP_DDL
+from .salary import JOBS_SALARY_DDL, SALARY_RULES
+from .job_loader import JOBS_LOADER_DDL, refresh_derived_columns
+from .job_facets import JOBS_FACETS_DDL, FACET_RULES
+from .db_indexes import ensure_indexes
+from .job_archive import JOBS_ARCHIVE_DDL
+from .job_index import JOB_INDEX_DDL
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    # SQL run in the migration's transaction, or a callable returning True on
+    # success for steps that can't run in one (e.g. CREATE INDEX CONCURRENTLY)
+    apply: Union[str, Callable[[], bool]]
+
+
+MIGRATIONS = [
+    Migration(1, "profile_items", PROFILE_ITEMS_DDL),
+    Migration(2, "jobs_search_vector", JOBS_SEARCH_DDL + ";\n" + JOBS_SEARCH_BACKFILL),
+    Migration(3, "jobs_trigram", JOBS_TRIGRAM_DDL),
+    Migration(4, "jobs_locations", JOBS_LOCATION_DDL + LOCATION_RULES.load_sql()),
+    Migration(5, "jobs_dedup", JOBS_DEDUP_DDL),
+    Migration(6, "jobs_salaries", JOBS_SALARY_DDL + SALARY_RULES.load_sql()),
+    Migration(7, "jobs_loader", JOBS_LOADER_DDL),
+    Migration(8, "jobs_facets", JOBS_FACETS_DDL + FACET_RULES.load_sql()),
+    # Changing the index set (db_indexes.INDEXES) needs a new migration calling ensure_indexes again
+    Migration(9, "hot_query_indexes", ensure_indexes),
+    Migration(10, "jobs_updated_at_trigger", JOB_INDEX_DDL),
+    Migration(11, "jobs_archive", JOBS_ARCHIVE_DDL),
+]
+
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ DEFAULT NOW()
+    )
+"""
+
+# Arbitrary, but the same for every worker
+MIGRATION_LOCK_KEY = 4_207_311
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+
+
+class MigrationError(Exception):
+    """A migration failed; later ones were not attempted."""
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version
+
+
+def _schema_version(conn) -> int:
+    """Highest applied version (0 before the first migration)."""
+    with conn.cursor() as cur:
+        try:
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+            version = cur.fetchone()[0]
+        except errors.UndefinedTable:
+            version = 0
+    conn.rollback()
+    return version
+
+
+def _acquire_lock(conn):
+    """Wait for the migration lock by polling.
+
+    A session blocked in pg_advisory_lock() holds a snapshot for as long as it
+    waits, and CREATE INDEX CONCURRENTLY in the migrating worker waits for
+    every older snapshot - the two would deadlock. Polling with
+    pg_try_advisory_lock() holds nothing between attempts.
+    """
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+            locked = cur.fetchone()[0]
+        conn.commit()
+        if locked:
+            return
+        time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+
+def _apply_pending(conn) -> int:
+    """Apply migrations newer than the recorded version. Caller holds the advisory lock."""
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_MIGRATIONS_DDL)
+    conn.commit()
+
+    # Re-read: another worker may have migrated while we waited for the lock
+    current = _schema_version(conn)
+    applied = 0
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        try:
+            if callable(migration.apply):
+                if not migration.apply():
+                    raise MigrationError(f"{migration.name} reported failure")
+            else:
+                with conn.cursor() as cur:
+                    cur.execute(migration.apply)
+            with conn.cursor() as cur:
+                cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                            (migration.version, migration.name))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise MigrationError(f"Migration {migration.version} ({migration.name}) failed: {e}") from e
+        applied += 1
+        print(f"[Migrations] Applied {migration.version} {migration.name}", file=sys.stderr)
+    return applied
+
+
+def run_migrations() -> Optional[int]:
+    """Bring the schema up to date; returns the schema version (None if not configured or on error)."""
+    target = latest_version()
+    try:
+        with get_connection() as conn:
+            if not conn:
+                return None
+            current = _schema_version(conn)
+        if current >= target:
+            print(f"[Migrations] Schema current (version {current})", file=sys.stderr)
+            return current
+
+        with direct_connection() as conn:
+            _acquire_lock(conn)
+            try:
+                applied = _apply_pending(conn)
+            finally:
+                conn.rollback()
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+                conn.commit()
+
+        print(f"[Migrations] Schema at version {target} ({applied} applied)", file=sys.stderr)
+        return target
+    except Exception as e:
+        print(f"[Migrations] Error: {e}", file=sys.stderr)
+        return None
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--refresh-derived", action="store_true",
+                        help="Then fill derived columns of existing jobs (after deploying new rules)")
+    args = parser.parse_args()
+
+    version = run_migrations()
+    print(f"schema version: {version}")
+    if version != latest_version():
+        sys.exit(1)
+    if args.refresh_derived:
+        refresh_derived_columns()
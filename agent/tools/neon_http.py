@@ -0,0 +1,181 @@
+"""
+Neon serverless HTTP transport.
+
+Short reads can go over Neon's HTTP /sql endpoint instead of a TCP
+connection. One long-lived HTTP/2 keep-alive client is shared per process,
+several statements can be sent in a single transaction request, and 5xx
+responses / timeouts are retried with jittered backoff. Failures raise
+NeonHTTPError subclasses rather than returning empty results. Under a
+request deadline (see deadline.py) each attempt's timeout is capped by the
+time left, and DeadlineExceeded is raised instead of retrying past it.
+"""
+
+import os
+import sys
+import random
+import asyncio
+from typing import Optional, List, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from .deadline import DeadlineExceeded, budget, remaining
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class NeonHTTPError(Exception):
+    """Base error for the Neon HTTP transport."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, code: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+class NeonNotConfiguredError(NeonHTTPError):
+    """DATABASE_URL is missing or has no host."""
+
+
+class NeonQueryError(NeonHTTPError):
+    """Postgres rejected the statement (4xx) - not retried."""
+
+
+class NeonUnavailableError(NeonHTTPError):
+    """5xx or transport failure that outlasted the retries."""
+
+
+class NeonTimeoutError(NeonHTTPError):
+    """The request timed out on every attempt."""
+
+
+class NeonHTTPClient:
+    """Pooled, retrying client for Neon's /sql endpoint."""
+
+    def __init__(self, database_url: str, timeout: float = 10.0,
+                 max_retries: int = 2, backoff: float = 0.1):
+        host = urlparse(database_url).hostname if database_url else None
+        if not host:
+            raise NeonNotConfiguredError("DATABASE_URL is not configured")
+        self.database_url = database_url
+        self.endpoint = f"https://{host}/sql"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60.0),
+                headers={
+                    "Content-Type": "application/json",
+                    "Neon-Connection-String": self.database_url,
+                    "Neon-Array-Mode": "false",
+                },
+            )
+        return self._client
+
+    async def _post(self, payload: dict, headers: dict, idempotent: bool,
+                    timeout: Optional[float] = None) -> dict:
+        last_error: Optional[NeonHTTPError] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Full jitter: sleep U(0, backoff * 2^attempt)
+                await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+            left = remaining()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(f"Neon HTTP deadline exceeded ({last_error or 'before the first attempt'})")
+            try:
+                response = await self._http().post(
+                    self.endpoint, json=payload, headers=headers,
+                    timeout=budget(timeout if timeout is not None else self.timeout)
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                # Request never left - always safe to retry
+                last_error = NeonUnavailableError(f"Connect failed: {e}")
+                continue
+            except httpx.TimeoutException as e:
+                last_error = NeonTimeoutError(f"Timed out: {e}")
+                if idempotent:
+                    continue
+                raise last_error
+            except httpx.TransportError as e:
+                last_error = NeonUnavailableError(f"Transport error: {e}")
+                if idempotent:
+                    continue
+                raise last_error
+
+            if response.status_code == 200:
+                return response.json()
+
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"message": response.text}
+            message = body.get("message") or f"HTTP {response.status_code}"
+
+            if response.status_code >= 500:
+                last_error = NeonUnavailableError(message, response.status_code, body.get("code"))
+                if idempotent:
+                    continue
+                raise last_error
+            raise NeonQueryError(message, response.status_code, body.get("code"))
+
+        print(f"[NeonHTTP] Giving up after {self.max_retries + 1} attempts: {last_error}", file=sys.stderr)
+        raise last_error
+
+    async def query(self, sql: str, params: Optional[list] = None, idempotent: bool = True,
+                    timeout: Optional[float] = None) -> List[dict]:
+        """Run one statement ($1-style params) and return its rows as dicts.
+
+        Set idempotent=False for writes: then only connection failures are retried.
+        """
+        data = await self._post({"query": sql, "params": params or []}, {}, idempotent, timeout)
+        return data.get("rows", [])
+
+    async def batch(self, statements: List[Tuple[str, Optional[list]]], read_only: bool = True,
+                    isolation_level: str = "ReadCommitted",
+                    timeout: Optional[float] = None) -> List[List[dict]]:
+        """Run several statements in one HTTP request / one transaction. Returns rows per statement."""
+        payload = {"queries": [{"query": sql, "params": params or []} for sql, params in statements]}
+        headers = {
+            "Neon-Batch-Isolation-Level": isolation_level,
+            "Neon-Batch-Read-Only": "true" if read_only else "false",
+        }
+        data = await self._post(payload, headers, idempotent=read_only, timeout=timeout)
+        return [result.get("rows", []) for result in data.get("results", [])]
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_client: Optional[NeonHTTPClient] = None
+
+
+def get_neon_client() -> NeonHTTPClient:
+    """Shared client for DATABASE_URL (raises NeonNotConfiguredError if unset)."""
+    global _client
+    if _client is None:
+        _client = NeonHTTPClient(
+            os.getenv("DATABASE_URL", ""),
+            timeout=float(os.getenv("NEON_HTTP_TIMEOUT", "10")),
+            max_retries=int(os.getenv("NEON_HTTP_MAX_RETRIES", "2")),
+        )
+    return _client
+
+
+async def close_neon_client():
+    """Close the shared client (used on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,222 @@
+"""
+Prepared statements for the hot psycopg2 queries.
+
+psycopg2 sends every query as plain text, so Postgres parses and plans the
+same few shapes - job search (one per WHERE/sort combination actually used),
+job lookups, profile items and job interests - on every call. execute()
+instead PREPAREs each distinct SQL shape once per pooled connection, named by
+a hash of the SQL, and runs it with EXECUTE afterwards.
+
+- %s placeholders become $1..$n (%% becomes %); values are still adapted by psycopg2
+- each connection keeps at most PREPARED_MAX_PER_CONNECTION statements
+  (least recently used are DEALLOCATEd)
+- disabled for Neon "-pooler" hosts: PgBouncer in transaction mode may run
+  EXECUTE on a server connection that never saw the PREPARE
+- DB_PREPARED_STATEMENTS=false turns it off entirely
+
+The async (psycopg 3) paths don't need this - psycopg 3 prepares repeated
+queries itself.
+
+Usage:
+    python -m tools.prepared [--iterations 50]   # planning-time benchmark
+
+The benchmark reports EXPLAIN's median Planning Time and the client round
+trip per shape. A prepared statement still gets custom plans for its first
+five executions, then a cached generic plan when that isn't worse, so the
+saving grows with reuse on a pooled connection.
+"""
+
+import os
+import re
+import time
+import json
+import hashlib
+import weakref
+import argparse
+import statistics
+from collections import OrderedDict
+from typing import Optional, List, Dict
+
+PREPARED_ENABLED = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() not in ("0", "false", "no")
+PREPARED_MAX_PER_CONNECTION = int(os.getenv("DB_PREPARED_MAX_PER_CONNECTION", "100"))
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+# connection -> OrderedDict(name -> None) of statements prepared on it, or None if it can't prepare
+_connections = weakref.WeakKeyDictionary()
+
+_stats = {"prepared": 0, "executed": 0, "deallocated": 0, "unprepared": 0}
+_shapes: Dict[str, str] = {}  # statement name -> SQL, for every shape seen in this process
+
+
+def statement_name(sql: str) -> str:
+    """Stable statement name for a SQL shape."""
+    return "ps_" + hashlib.md5(" ".join(sql.split()).encode()).hexdigest()[:16]
+
+
+def to_server_params(sql: str) -> tuple:
+    """(sql with $1..$n placeholders, n) for a psycopg2 %s query."""
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(0) == "%%":
+            return "%"
+        count += 1
+        return f"${count}"
+
+    return _PLACEHOLDER.sub(replace, sql), count
+
+
+def _uses_pooler(conn) -> bool:
+    try:
+        return "-pooler" in (conn.info.host or "")
+    except Exception:
+        return True
+
+
+def _statements(conn) -> Optional[OrderedDict]:
+    try:
+        if conn not in _connections:
+            _connections[conn] = None if (not PREPARED_ENABLED or _uses_pooler(conn)) else OrderedDict()
+        return _connections[conn]
+    except TypeError:
+        # Not weak-referenceable - just don't prepare on it
+        return None
+
+
+def execute(cur, sql: str, params: Optional[list] = None):
+    """cur.execute(sql, params), through a per-connection prepared statement when possible."""
+    statements = _statements(cur.connection)
+    if statements is None:
+        _stats["unprepared"] += 1
+        cur.execute(sql, params)
+        return
+
+    name = statement_name(sql)
+    if name in statements:
+        statements.move_to_end(name)
+    else:
+        server_sql, count = to_server_params(sql)
+        if count != len(params or []):
+            raise ValueError(f"Expected {count} parameters, got {len(params or [])}")
+        while len(statements) >= PREPARED_MAX_PER_CONNECTION:
+            oldest, _ = statements.popitem(last=False)
+            cur.execute(f"DEALLOCATE {oldest}")
+            _stats["deallocated"] += 1
+        cur.execute(f"PREPARE {name} AS {server_sql}")
+        statements[name] = None
+        _shapes.setdefault(name, sql)
+        _stats["prepared"] += 1
+
+    _stats["executed"] += 1
+    try:
+        if params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
+    except Exception as e:
+        if getattr(e, "pgcode", None) == "26000":
+            # invalid_sql_statement_name: the session lost it (DISCARD ALL) - re-prepare next time
+            statements.pop(name, None)
+        raise
+
+
+def forget(conn):
+    """Drop what we know about conn's prepared statements (e.g. after DISCARD ALL)."""
+    _connections.pop(conn, None)
+
+
+def prepared_stats() -> dict:
+    """Counters plus the number of distinct SQL shapes prepared so far."""
+    return {**_stats, "shapes": len(_shapes), "enabled": PREPARED_ENABLED}
+
+
+# =====
+# Benchmark
+# =====
+
+def _planning_ms(cur, sql: str) -> float:
+    cur.execute(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {sql}")
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Planning Time"]
+
+
+def benchmark(iterations: int = 50) -> List[dict]:
+    """Median planning and round-trip time per representative shape, plain vs prepared."""
+    from .db_pool import get_connection
+    from .job_search import _build_search_query, JOB_COLUMNS, GET_JOBS_BY_IDS_SQL
+    from .user_context import PROFILE_ITEMS_SQL, JOB_INTERESTS_SQL
+
+    search_cases = [
+        ("search: category", dict(category="marketing")),
+        ("search: text", dict(query="community manager")),
+        ("search: text + country + type", dict(query="coach", country="uk", job_type="full")),
+        ("search: recent + facets", dict(sort="recent", include_facets=True)),
+    ]
+    cases = []
+    for label, kwargs in search_cases:
+        sql, params = _build_search_query(limit=6, columns=JOB_COLUMNS, **kwargs)
+        cases.append((label, sql, params))
+
+    with get_connection() as conn:
+        if not conn:
+            raise RuntimeError("DATABASE_URL is not configured")
+        with conn.cursor() as cur:
+            cur.execute("SELECT user_id FROM user_job_interests LIMIT 1")
+            row = cur.fetchone()
+            cur.execute("SELECT id FROM jobs WHERE is_active = true LIMIT 1")
+            job_row = cur.fetchone()
+        user_id = row[0] if row else "benchmark-user"
+        cases.append(("job by id", GET_JOBS_BY_IDS_SQL, [[str(job_row[0]) if job_row else "0"]]))
+        cases.append(("profile items", PROFILE_ITEMS_SQL, [user_id]))
+        cases.append(("job interests", JOB_INTERESTS_SQL, [user_id, 10]))
+
+        results = []
+        with conn.cursor() as cur:
+            for label, sql, params in cases:
+                plain_plan, prepared_plan, plain_rt, prepared_rt = [], [], [], []
+                name = statement_name(sql)
+                server_sql, _ = to_server_params(sql)
+                cur.execute(f"PREPARE {name} AS {server_sql}")
+                execute_sql = cur.mogrify(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params).decode()
+                plain_sql = cur.mogrify(sql, params).decode()
+
+                for _ in range(iterations):
+                    plain_plan.append(_planning_ms(cur, plain_sql))
+                    prepared_plan.append(_planning_ms(cur, execute_sql))
+
+                    started = time.perf_counter()
+                    cur.execute(plain_sql)
+                    cur.fetchall()
+                    plain_rt.append((time.perf_counter() - started) * 1000)
+
+                    started = time.perf_counter()
+                    cur.execute(execute_sql)
+                    cur.fetchall()
+                    prepared_rt.append((time.perf_counter() - started) * 1000)
+
+                cur.execute(f"DEALLOCATE {name}")
+                results.append({
+                    "shape": label,
+                    "plain_planning_ms": round(statistics.median(plain_plan), 3),
+                    "prepared_planning_ms": round(statistics.median(prepared_plan), 3),
+                    "plain_roundtrip_ms": round(statistics.median(plain_rt), 2),
+                    "prepared_roundtrip_ms": round(statistics.median(prepared_rt), 2),
+                })
+        conn.rollback()
+    return results
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Compare planning time of plain vs prepared hot queries")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    for result in benchmark(args.iterations):
+        print(json.dumps(result))
@@ -0,0 +1,298 @@
+"""Salary parsing for job postings.
+
+Turns free-text salaries ("£30k-£40k per year", "$25/hr", "€3.500 pro Monat",
+"Up to 80,000 USD") into currency, period and annual min/max, plus an
+approximate annual USD range for filtering and sorting across currencies.
+
+The parser is the SQL function parse_salary() (JOBS_SALARY_DDL), run by a
+trigger on every insert/update of jobs to fill the salary_* columns. Its
+currency symbols, FX rates and period cues are tables loaded from the data
+below (SALARY_RULES).
+"""
+
+import os
+import sys
+import json
+from typing import Optional
+
+from .derived_rules import DERIVED_RULES_DDL, RuleSet
+
+# Approximate USD value of one unit of each currency. Good enough for
+# "over $80k"-style filters; override with SALARY_FX_RATES='{"GBP": 1.3}'.
+USD_RATES = {
+    "USD": 1.0, "GBP": 1.27, "EUR": 1.08, "CHF": 1.13, "CAD": 0.74, "AUD": 0.66, "NZD": 0.61,
+    "SGD": 0.74, "HKD": 0.128, "JPY": 0.0067, "CNY": 0.14, "KRW": 0.00074, "TWD": 0.031,
+    "INR": 0.012, "BRL": 0.19, "MXN": 0.055, "ARS": 0.0011, "SEK": 0.095, "NOK": 0.094,
+    "DKK": 0.145, "PLN": 0.25, "CZK": 0.043, "HUF": 0.0028, "RON": 0.22, "TRY": 0.031,
+    "AED": 0.27, "SAR": 0.27, "ZAR": 0.054, "PHP": 0.018, "MYR": 0.22, "THB": 0.028,
+    "IDR": 0.000063, "VND": 0.00004,
+}
+try:
+    USD_RATES.update(json.loads(os.getenv("SALARY_FX_RATES", "{}")))
+except ValueError:
+    print("[Salary] Ignoring invalid SALARY_FX_RATES", file=sys.stderr)
+
+# Matched as whole symbols, longest first, so "US$" is never read as "S$"
+CURRENCY_SYMBOLS = [
+    ("US$", "USD"), ("R$", "BRL"), ("C$", "CAD"), ("CA$", "CAD"), ("A$", "AUD"), ("AU$", "AUD"),
+    ("NZ$", "NZD"), ("S$", "SGD"), ("HK$", "HKD"), ("NT$", "TWD"), ("£", "GBP"), ("€", "EUR"),
+    ("₩", "KRW"), ("₹", "INR"), ("¥", "JPY"), ("₱", "PHP"), ("₫", "VND"), ("zł", "PLN"), ("$", "USD"),
+]
+
+COUNTRY_CURRENCY = {
+    "us": "USD", "gb": "GBP", "ie": "EUR", "fr": "EUR", "de": "EUR", "nl": "EUR", "be": "EUR",
+    "es": "EUR", "pt": "EUR", "it": "EUR", "at": "EUR", "fi": "EUR", "gr": "EUR", "lu": "EUR",
+    "ee": "EUR", "lv": "EUR", "lt": "EUR", "sk": "EUR", "si": "EUR", "hr": "EUR",
+    "ch": "CHF", "se": "SEK", "no": "NOK", "dk": "DKK", "pl": "PLN", "cz": "CZK", "hu": "HUF",
+    "ro": "RON", "tr": "TRY", "ca": "CAD", "mx": "MXN", "br": "BRL", "ar": "ARS",
+    "au": "AUD", "nz": "NZD", "sg": "SGD", "hk": "HKD", "jp": "JPY", "cn": "CNY", "kr": "KRW",
+    "tw": "TWD", "in": "INR", "ae": "AED", "sa": "SAR", "za": "ZAR", "ph": "PHP", "my": "MYR",
+    "th": "THB", "id": "IDR", "vn": "VND",
+}
+
+# Units per year
+PERIOD_MULTIPLIERS = {"hour": 2080, "day": 260, "week": 52, "month": 12, "year": 1}
+
+# Postgres regexes (\y is a word boundary), matched case-insensitively
+PERIOD_CUES = {
+    "hour": r"\y(per hour|an hour|hourly|p/?h|ph)\y|/\s*h(ou)?r?\y",
+    "day": r"\y(per day|a day|daily|day rate|p/?d|per diem)\y|/\s*day\y",
+    "week": r"\y(per week|a week|weekly|p/?w)\y|/\s*w(ee)?k\y",
+    "month": r"\y(per month|a month|monthly|pcm|p/?m|pro monat)\y|/\s*mo(nth)?\y",
+    "year": r"\y(per year|a year|per annum|annual(ly)?|yearly|p/?a|pa|ote)\y|/\s*y(ea)?r\y",
+}
+
+
+def to_usd(amount: Optional[float], currency: Optional[str]) -> Optional[int]:
+    """Approximate USD value of amount (None if the currency is unknown)."""
+    if amount is None or not currency or currency.upper() not in USD_RATES:
+        return None
+    return int(round(amount * USD_RATES[currency.upper()]))
+
+
+# =====
+# Normalized salary columns
+# =====
+# parse_salary(salary, country_code) in SQL:
+# - amounts are numbers with an optional k/m suffix; percentages ("10% bonus")
+#   and bare years ("(2024)") are not amounts unless a currency or period cue
+#   is next to them,
+# - the amount next to a currency marker is the salary (else the first one),
+#   and an amount joined to it by "-"/"to"/"and" makes it a range,
+# - the period cue nearest those amounts sets the period ("per annum" beats a
+#   later "37.5 hours per week"), else it is guessed from the magnitude,
+# - text with neither a currency marker nor a period cue ("Competitive + 25
+#   days holiday") isn't a salary, and the job's country only fills in the
+#   currency of one that is.
+_AMOUNT_TOKEN = r"([^0-9]*)([0-9]+(?:[.,][0-9]+|[ \u00a0\u202f][0-9]{3}(?![0-9]))*)(\s*(?:k|m|mil|million|thousand)(?![[:alpha:]]))?(\s*%)?"
+
+JOBS_SALARY_DDL = DERIVED_RULES_DDL + r"""
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS salary_currency TEXT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS salary_period TEXT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS salary_min_annual BIGINT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS salary_max_annual BIGINT;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS salary_min_usd INTEGER;
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS salary_max_usd INTEGER;
+    CREATE INDEX IF NOT EXISTS idx_jobs_salary_usd
+        ON jobs ((COALESCE(salary_max_usd, salary_min_usd)) DESC) WHERE is_active = true;
+    CREATE INDEX IF NOT EXISTS idx_jobs_salary_min_usd
+        ON jobs ((COALESCE(salary_min_usd, salary_max_usd))) WHERE is_active = true;
+
+    CREATE TABLE IF NOT EXISTS salary_currencies (code TEXT PRIMARY KEY, usd_rate DOUBLE PRECISION NOT NULL);
+    CREATE TABLE IF NOT EXISTS salary_symbols (symbol TEXT PRIMARY KEY, code TEXT NOT NULL, pattern TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS salary_country_currencies (country TEXT PRIMARY KEY, code TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS salary_periods (name TEXT PRIMARY KEY, cue TEXT NOT NULL, per_year INTEGER NOT NULL);
+
+    -- "45,000" / "3.500" / "30 000" / "1,234.50" / "37.5" with a k/m suffix; NULL when malformed ("1.2.3")
+    CREATE OR REPLACE FUNCTION salary_amount(digits TEXT, suffix TEXT) RETURNS DOUBLE PRECISION AS $$
+        SELECT CASE
+            WHEN digits ~ '^[0-9]{1,3}(\s[0-9]{3})+$' THEN regexp_replace(digits, '\s', '', 'g')::float8
+            WHEN digits ~ '^[0-9]{1,3}(,[0-9]{3})+(\.[0-9]+)?$' THEN replace(digits, ',', '')::float8
+            WHEN digits ~ '^[0-9]{1,3}(\.[0-9]{3})+(,[0-9]+)?$' THEN replace(replace(digits, '.', ''), ',', '.')::float8
+            WHEN digits ~ '^[0-9]+([.,][0-9]+)?$' THEN replace(digits, ',', '.')::float8
+        END * CASE WHEN suffix IN ('k', 'thousand') THEN 1000 WHEN suffix IN ('m', 'mil', 'million') THEN 1000000 ELSE 1 END
+    $$ LANGUAGE sql IMMUTABLE;
+""" + f"""
+    CREATE OR REPLACE FUNCTION parse_salary(salary TEXT, country_code TEXT,
+            OUT currency TEXT, OUT period TEXT, OUT annual_min BIGINT, OUT annual_max BIGINT,
+            OUT annual_min_usd INTEGER, OUT annual_max_usd INTEGER) AS $$
+    DECLARE
+        marker TEXT := '(?:(?<![[:alpha:]])(?:' ||
+            (SELECT string_agg(s.pattern, '|' ORDER BY length(s.symbol) DESC, s.symbol) FROM salary_symbols s) ||
+            ')|\\m(?:' || (SELECT string_agg(c.code, '|' ORDER BY c.code) FROM salary_currencies c) || '|RMB)\\M)';
+        cues TEXT := (SELECT string_agg('(?:' || p.cue || ')', '|') FROM salary_periods p);
+        -- Between the two ends of a range
+        joined TEXT := '^\\s*(?:' || marker || ')?\\s*(?:-|–|—|to|and)\\s*(?:' || marker || ')?\\s*$';
+        token TEXT[];
+        gaps TEXT[] := ARRAY[]::TEXT[];
+        afters TEXT[] := ARRAY[]::TEXT[];
+        amounts FLOAT8[] := ARRAY[]::FLOAT8[];
+        years BOOLEAN[] := ARRAY[]::BOOLEAN[];
+        starts INTEGER[] := ARRAY[]::INTEGER[];
+        ends INTEGER[] := ARRAY[]::INTEGER[];
+        pos INTEGER := 0;
+        n INTEGER;
+        pick INTEGER;
+        last INTEGER;
+        low FLOAT8;
+        high FLOAT8;
+        found TEXT;
+        rule RECORD;
+        cue_pos INTEGER;
+        distance INTEGER;
+        best INTEGER;
+        rate FLOAT8;
+    BEGIN
+        IF salary IS NULL OR salary !~ '[0-9]' THEN
+            RETURN;
+        END IF;
+
+        FOR token IN SELECT regexp_matches(salary, '{_AMOUNT_TOKEN}', 'gi') LOOP
+            pos := pos + length(token[1]);
+            starts := starts || pos;
+            pos := pos + length(token[2]) + coalesce(length(token[3]), 0) + coalesce(length(token[4]), 0);
+            ends := ends || pos;
+            gaps := gaps || token[1];
+            -- Percentages are never amounts
+            amounts := amounts || CASE WHEN token[4] IS NULL
+                THEN salary_amount(token[2], lower(regexp_replace(token[3], '\\s', '', 'g'))) END;
+            years := years || (token[3] IS NULL AND token[2] ~ '^(19|20)[0-9][0-9]$');
+        END LOOP;
+        n := cardinality(amounts);
+
+        FOR i IN 1 .. n LOOP
+            afters := afters || CASE WHEN i < n THEN gaps[i + 1] ELSE substr(salary, pos + 1) END;
+            -- A bare year is only an amount with a currency or period cue next to it
+            IF amounts[i] < 1 OR amounts[i] >= 1e10 OR years[i] AND gaps[i] !~* (marker || '\\s*$')
+                    AND afters[i] !~* ('^\\s*(?:' || marker || '|' || cues || ')') THEN
+                amounts[i] := NULL;
+            END IF;
+        END LOOP;
+
+        -- The amount next to a currency marker, else the first one
+        FOR i IN 1 .. n LOOP
+            CONTINUE WHEN amounts[i] IS NULL;
+            IF gaps[i] ~* (marker || '\\s*$') OR afters[i] ~* ('^\\s*' || marker) THEN
+                pick := i;
+                EXIT;
+            END IF;
+            pick := coalesce(pick, i);
+        END LOOP;
+        IF pick IS NULL THEN
+            RETURN;
+        END IF;
+        -- "30 000 - 40 000 EUR": the marker is on the end of the range
+        IF pick > 1 AND amounts[pick - 1] IS NOT NULL AND gaps[pick] ~* joined THEN
+            pick := pick - 1;
+        END IF;
+
+        low := amounts[pick];
+        high := low;
+        last := pick;
+        IF pick < n AND amounts[pick + 1] IS NOT NULL AND gaps[pick + 1] ~* joined THEN
+            last := pick + 1;
+            high := amounts[last];
+            -- "50-60k": the suffix on the second number applies to both
+            IF high >= 1000 AND low < 1000 AND high / 1000 >= low THEN
+                low := low * 1000;
+            END IF;
+            IF low > high THEN
+                SELECT high, low INTO low, high;
+            END IF;
+        ELSIF gaps[pick] ~* '\\m(up to|to|max(imum)?|under)\\M' THEN
+            low := NULL;
+        ELSIF gaps[pick] ~* '\\m(from|min(imum)?|starting|over)\\M' OR afters[pick] ~ '^\\s*\\+' THEN
+            high := NULL;
+        END IF;
+
+        found := (regexp_match(salary, marker, 'i'))[1];
+        IF found IS NOT NULL THEN
+            SELECT s.code INTO currency FROM salary_symbols s WHERE lower(s.symbol) = lower(found);
+            currency := coalesce(currency, CASE upper(found) WHEN 'RMB' THEN 'CNY' ELSE upper(found) END);
+            -- ¥ is the yuan too
+            IF found = '¥' AND country_code = 'cn' THEN
+                currency := 'CNY';
+            END IF;
+        END IF;
+
+        -- The cue nearest the amounts; an annual one wins ties
+        FOR rule IN SELECT p.name, p.cue FROM salary_periods p ORDER BY p.per_year LOOP
+            CONTINUE WHEN salary !~* rule.cue;
+            cue_pos := length(regexp_replace(salary, '(?:' || rule.cue || ').*$', '', 'i'));
+            distance := CASE WHEN cue_pos >= ends[last] THEN cue_pos - ends[last]
+                             ELSE greatest(starts[pick] - cue_pos, 0) END;
+            IF best IS NULL OR distance < best THEN
+                best := distance;
+                period := rule.name;
+            END IF;
+        END LOOP;
+
+        -- Numbers without a currency or period ("Competitive + 25 days holiday") aren't a salary
+        IF found IS NULL AND period IS NULL THEN
+            RETURN;
+        END IF;
+        currency := coalesce(currency, (SELECT c.code FROM salary_country_currencies c WHERE c.country = country_code));
+        -- No cue - guess from magnitude (hourly < 200 < daily < 1,500 < monthly < 15,000)
+        IF period IS NULL THEN
+            period := CASE WHEN coalesce(high, low) < 200 THEN 'hour' WHEN coalesce(high, low) < 1500 THEN 'day'
+                           WHEN coalesce(high, low) < 15000 THEN 'month' ELSE 'year' END;
+        END IF;
+
+        SELECT round(low * p.per_year), round(high * p.per_year) INTO annual_min, annual_max
+        FROM salary_periods p WHERE p.name = period;
+        SELECT c.usd_rate INTO rate FROM salary_currencies c WHERE c.code = currency;
+        annual_min_usd := CASE WHEN annual_min * rate < 2147483647 THEN round(annual_min * rate) END;
+        annual_max_usd := CASE WHEN annual_max * rate < 2147483647 THEN round(annual_max * rate) END;
+    END
+    $$ LANGUAGE plpgsql STABLE;
+
+    CREATE OR REPLACE FUNCTION jobs_salary_update() RETURNS trigger AS $$
+    BEGIN
+        SELECT * INTO NEW.salary_currency, NEW.salary_period, NEW.salary_min_annual, NEW.salary_max_annual,
+                      NEW.salary_min_usd, NEW.salary_max_usd
+        FROM parse_salary(NEW.salary, NEW.country_code);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    -- After jobs_location_trigger (triggers fire in name order), so NEW.country_code is current
+    DROP TRIGGER IF EXISTS jobs_salary_trigger ON jobs;
+    CREATE TRIGGER jobs_salary_trigger
+        BEFORE INSERT OR UPDATE OF salary, location, country, country_code ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_salary_update();
+"""
+
+
+def _regex_literal(text: str) -> str:
+    return "".join("\\" + ch if ch in "\\^$.|?*+()[]{}" else ch for ch in text)
+
+
+SALARY_RULES = RuleSet(
+    name="salaries",
+    data={
+        "rates": USD_RATES,
+        "symbols": [[symbol, code, _regex_literal(symbol)] for symbol, code in CURRENCY_SYMBOLS],
+        "countries": COUNTRY_CURRENCY,
+        "periods": [[name, PERIOD_CUES[name], per_year] for name, per_year in PERIOD_MULTIPLIERS.items()],
+    },
+    load="""
+        DELETE FROM salary_currencies;
+        INSERT INTO salary_currencies SELECT key, value::float8 FROM jsonb_each_text({rules}->'rates');
+        DELETE FROM salary_symbols;
+        INSERT INTO salary_symbols SELECT r->>0, r->>1, r->>2 FROM jsonb_array_elements({rules}->'symbols') AS r;
+        DELETE FROM salary_country_currencies;
+        INSERT INTO salary_country_currencies SELECT key, value FROM jsonb_each_text({rules}->'countries');
+        DELETE FROM salary_periods;
+        INSERT INTO salary_periods SELECT r->>0, r->>1, (r->>2)::integer FROM jsonb_array_elements({rules}->'periods') AS r;
+    """,
+    rederive="""
+        UPDATE jobs SET salary_currency = p.currency, salary_period = p.period,
+                        salary_min_annual = p.annual_min, salary_max_annual = p.annual_max,
+                        salary_min_usd = p.annual_min_usd, salary_max_usd = p.annual_max_usd
+        FROM jobs j CROSS JOIN LATERAL parse_salary(j.salary, j.country_code) p
+        WHERE jobs.id = j.id
+          AND (jobs.salary_currency, jobs.salary_period, jobs.salary_min_annual, jobs.salary_max_annual,
+               jobs.salary_min_usd, jobs.salary_max_usd)
+              IS DISTINCT FROM (p.currency, p.period, p.annual_min, p.annual_max, p.annual_min_usd, p.annual_max_usd)
+    """,
+)
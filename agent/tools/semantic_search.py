@@ -0,0 +1,332 @@
+"""
+Local semantic job search.
+
+Keyword search can't connect "shoutcaster" to "broadcast talent", so this
+module keeps one fixed-size vector per active job in a contiguous float32
+matrix and answers queries with a single matrix-vector product plus
+argpartition top-k. Everything runs in-process on CPU with no network.
+
+Vectors are hashed TF-IDF over words, bigrams and esports concepts (see
+ESPORTS_CONCEPTS - the part that bridges synonyms). If SEMANTIC_MODEL_PATH
+points at a local sentence-transformers model and the package is installed,
+its embeddings are used instead.
+
+category/country/job_type filters are applied as boolean masks over the
+matrix with the same semantics as the SQL filters.
+"""
+
+import os
+import sys
+import math
+import time
+import zlib
+import asyncio
+import threading
+from collections import Counter
+from typing import Optional, List, Dict, Tuple
+
+import numpy as np
+
+from .gazetteer import resolve_location, normalize_job_location
+from .job_index import tokenize
+from .job_search import JobSearchResult, iter_active_jobs, on_jobs_changed, _project
+
+SEMANTIC_DIM = int(os.getenv("SEMANTIC_DIM", "256"))
+SEMANTIC_REFRESH_SECONDS = float(os.getenv("SEMANTIC_REFRESH_SECONDS", "300"))
+SEMANTIC_MODEL_PATH = os.getenv("SEMANTIC_MODEL_PATH", "")
+# Cosine below this is noise for hashed TF-IDF
+DEFAULT_MIN_SCORE = 0.1
+
+# Synonym groups: every phrase in a group also emits the group's concept feature
+ESPORTS_CONCEPTS = {
+    "broadcast_talent": [
+        "shoutcaster", "caster", "commentator", "color commentator", "play by play",
+        "broadcast talent", "host", "presenter", "desk analyst", "on air talent", "interviewer",
+    ],
+    "broadcast_production": [
+        "broadcast", "production", "producer", "observer", "replay operator", "video director",
+        "technical director", "live production", "vmix", "obs", "camera operator", "graphics operator",
+    ],
+    "community": [
+        "community manager", "community lead", "community", "social media manager", "social media",
+        "discord", "moderator", "engagement", "fan community",
+    ],
+    "content": [
+        "content creator", "content", "video editor", "editor", "youtube", "tiktok", "twitch",
+        "streamer", "creator", "copywriter", "writer",
+    ],
+    "coaching": [
+        "coach", "head coach", "assistant coach", "performance coach", "analyst", "performance analyst",
+        "strategic coach", "player development",
+    ],
+    "player": ["pro player", "player", "professional player", "roster", "substitute", "academy player"],
+    "partnerships": [
+        "partnerships", "sponsorship", "sponsor", "brand partnerships", "business development",
+        "account manager", "sales", "commercial",
+    ],
+    "marketing": ["marketing", "brand manager", "growth", "campaign", "pr", "public relations", "communications"],
+    "events": [
+        "event manager", "events", "tournament", "tournament operations", "tournament admin", "league operations",
+        "referee", "admin", "logistics",
+    ],
+    "operations": ["operations", "general manager", "team manager", "manager", "coordinator", "project manager"],
+    "engineering": [
+        "software engineer", "developer", "engineer", "backend", "frontend", "full stack", "devops",
+        "data engineer", "programmer",
+    ],
+    "data": ["data analyst", "data scientist", "analytics", "statistics", "insights", "business intelligence"],
+    "design": ["graphic designer", "designer", "motion graphics", "art director", "ux", "ui", "illustrator"],
+    "game_dev": ["game designer", "level designer", "gameplay", "game developer", "qa", "tester", "game tester"],
+    "health": ["sports psychologist", "psychologist", "physiotherapist", "nutritionist", "wellbeing", "mental performance"],
+}
+
+FIELD_WEIGHTS = {"title": 3.0, "skills": 2.0, "category": 1.5, "company": 1.0, "description": 1.0}
+CONCEPT_WEIGHT = 2.0
+MAX_PHRASE_LEN = 3
+
+
+def _compile_concepts() -> Dict[Tuple[str, ...], str]:
+    phrases = {}
+    for concept, group in ESPORTS_CONCEPTS.items():
+        for phrase in group:
+            tokens = tuple(tokenize(phrase))
+            if tokens:
+                phrases[tokens] = concept
+    return phrases
+
+
+_CONCEPT_PHRASES = _compile_concepts()
+
+
+def _features(text: str) -> List[str]:
+    """Word, bigram and concept features for one piece of text."""
+    tokens = tokenize(text)
+    features = [f"w:{t}" for t in tokens]
+    features += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for n in range(1, MAX_PHRASE_LEN + 1):
+        for i in range(len(tokens) - n + 1):
+            concept = _CONCEPT_PHRASES.get(tuple(tokens[i:i + n]))
+            if concept:
+                features.append(f"c:{concept}")
+    return features
+
+
+def _job_features(job: JobSearchResult) -> Dict[str, float]:
+    """Field-weighted term frequencies for a job."""
+    weights: Dict[str, float] = {}
+    fields = {
+        "title": job.title, "skills": " ".join(job.skills), "category": job.category,
+        "company": job.company, "description": job.description,
+    }
+    for field, text in fields.items():
+        for feature, count in Counter(_features(text)).items():
+            weight = FIELD_WEIGHTS[field] * (1.0 + math.log(count))
+            if feature.startswith("c:"):
+                weight *= CONCEPT_WEIGHT
+            weights[feature] = weights.get(feature, 0.0) + weight
+    return weights
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    """Signed feature hashing: (dimension, +1/-1)."""
+    h = zlib.crc32(feature.encode())
+    return h % SEMANTIC_DIM, (1.0 if h & 0x80000000 else -1.0)
+
+
+def _hash_vector(weights: Dict[str, float], idf: Dict[str, float], default_idf: float) -> np.ndarray:
+    vector = np.zeros(SEMANTIC_DIM, dtype=np.float32)
+    for feature, weight in weights.items():
+        dim, sign = _bucket(feature)
+        vector[dim] += sign * weight * idf.get(feature, default_idf)
+    return vector
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SemanticIndex:
+    """Immutable snapshot: unit-length job vectors plus filter metadata, row-aligned."""
+
+    def __init__(self, jobs: List[JobSearchResult]):
+        started = time.monotonic()
+        self.jobs = jobs
+        self.built_at = time.monotonic()
+        self.categories = np.array([(j.category or "").lower() for j in jobs], dtype=object)
+        self.countries = np.array([(j.country or "").lower() for j in jobs], dtype=object)
+        self.types = np.array([(j.type or "").lower() for j in jobs], dtype=object)
+        places = [normalize_job_location(j.location, j.country) for j in jobs]
+        self.country_codes = np.array([code or "" for code, _ in places], dtype=object)
+        self.city_slugs = np.array([city or "" for _, city in places], dtype=object)
+
+        self.model = _load_model()
+        if self.model is not None:
+            texts = [f"{j.title}. {j.category}. {', '.join(j.skills)}. {j.description[:1000]}" for j in jobs]
+            matrix = self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+            self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        else:
+            doc_weights = [_job_features(j) for j in jobs]
+            df = Counter(feature for weights in doc_weights for feature in weights)
+            n = len(jobs)
+            self.idf = {f: math.log((n + 1) / (count + 1)) + 1.0 for f, count in df.items()}
+            self.default_idf = math.log(n + 1) + 1.0
+            matrix = np.zeros((n, SEMANTIC_DIM), dtype=np.float32)
+            for row, weights in enumerate(doc_weights):
+                matrix[row] = _hash_vector(weights, self.idf, self.default_idf)
+            self.matrix = np.ascontiguousarray(_normalize_rows(matrix))
+
+        print(f"[Semantic] Indexed {len(jobs)} jobs ({self.matrix.shape[1]} dims, "
+              f"{'model' if self.model is not None else 'hashed tf-idf'}) "
+              f"in {time.monotonic() - started:.2f}s", file=sys.stderr)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        if self.model is not None:
+            vector = self.model.encode([query], normalize_embeddings=True, convert_to_numpy=True)[0]
+            return vector.astype(np.float32)
+        weights = {f: 1.0 + math.log(c) for f, c in Counter(_features(query)).items()}
+        for feature in weights:
+            if feature.startswith("c:"):
+                weights[feature] *= CONCEPT_WEIGHT
+        vector = _hash_vector(weights, self.idf, self.default_idf)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _mask(self, category: Optional[str], country: Optional[str], job_type: Optional[str]) -> Optional[np.ndarray]:
+        """Row mask matching the SQL filters (see job_search._build_search_query)."""
+        mask = None
+
+        def both(m):
+            return m if mask is None else mask & m
+
+        if category:
+            mask = both(self.categories == category.lower())
+        if country:
+            place = resolve_location(country)
+            if place is None:
+                needle = country.lower()
+                mask = both(np.fromiter((needle in c for c in self.countries), bool, len(self.jobs)))
+            elif place.city_slug:
+                mask = both(self.city_slugs == place.city_slug)
+            else:
+                mask = both(np.isin(self.country_codes, place.country_codes))
+        if job_type:
+            needle = job_type.lower()
+            mask = both(np.fromiter((needle in t for t in self.types), bool, len(self.jobs)))
+        return mask
+
+    def search(self, query: str, category: Optional[str] = None, country: Optional[str] = None,
+               job_type: Optional[str] = None, limit: int = 5,
+               min_score: float = DEFAULT_MIN_SCORE) -> List[Tuple[JobSearchResult, float]]:
+        """Top `limit` (job, cosine) pairs for query among jobs passing the filters."""
+        if not self.jobs or limit <= 0:
+            return []
+        scores = self.matrix @ self.embed_query(query)
+        mask = self._mask(category, country, job_type)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.jobs[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+
+def _load_model():
+    """Local sentence-transformers model from SEMANTIC_MODEL_PATH, or None for hashed TF-IDF."""
+    if not SEMANTIC_MODEL_PATH:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(SEMANTIC_MODEL_PATH, device="cpu", local_files_only=True)
+    except Exception as e:
+        print(f"[Semantic] Model unavailable, using hashed tf-idf: {e}", file=sys.stderr)
+        return None
+
+
+# =====
+# Shared snapshot
+# =====
+
+_index: Optional[SemanticIndex] = None
+_index_lock = threading.Lock()
+_rebuilding = False
+
+
+def _rebuild():
+    global _index, _rebuilding
+    try:
+        _index = SemanticIndex(list(iter_active_jobs()))
+    except Exception as e:
+        print(f"[Semantic] Rebuild error: {e}", file=sys.stderr)
+    finally:
+        _rebuilding = False
+
+
+def get_semantic_index() -> Optional[SemanticIndex]:
+    """The shared snapshot, built on first use and rebuilt in the background once stale."""
+    global _index, _rebuilding
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = SemanticIndex(list(iter_active_jobs()))
+                except Exception as e:
+                    print(f"[Semantic] Build error: {e}", file=sys.stderr)
+                    return None
+        return _index
+
+    if time.monotonic() - _index.built_at > SEMANTIC_REFRESH_SECONDS:
+        with _index_lock:
+            if not _rebuilding:
+                _rebuilding = True
+                threading.Thread(target=_rebuild, daemon=True).start()
+    return _index
+
+
+def invalidate_semantic_index():
+    """Rebuild the snapshot (in the background) on next use."""
+    if _index is not None:
+        _index.built_at = float("-inf")
+
+
+on_jobs_changed(invalidate_semantic_index)
+
+
+def semantic_search_jobs(
+    query: str,
+    category: Optional[str] = None,
+    country: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = 5,
+    projection: str = "full",
+    min_score: float = DEFAULT_MIN_SCORE
+) -> list:
+    """Jobs most similar in meaning to query (e.g. "shoutcaster" -> broadcast talent roles)."""
+    if not query:
+        return []
+    try:
+        index = get_semantic_index()
+        if index is None:
+            return []
+        hits = index.search(query, category, country, job_type, limit, min_score)
+        return [_project(job, projection) for job, _ in hits]
+    except Exception as e:
+        print(f"[Semantic] Search error: {e}", file=sys.stderr)
+        return []
+
+
+async def semantic_search_jobs_async(
+    query: str,
+    category: Optional[str] = None,
+    country: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = 5,
+    projection: str = "full",
+    min_score: float = DEFAULT_MIN_SCORE
+) -> list:
+    """semantic_search_jobs on a worker thread (the first call builds the matrix)."""
+    return await asyncio.to_thread(
+        semantic_search_jobs, query, category, country, job_type, limit, projection, min_score
+    )
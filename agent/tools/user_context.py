@@ -11,9 +11,12 @@ import os
 import sys
 import json
 from typing import Optional, List
-import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from .db_pool import get_connection, mark_user_write
+from . import prepared
+from .deadline import DeadlineExceeded
+
 # Zep Cloud client
 try:
     from zep_cloud.client import Zep
@@ -23,12 +26,14 @@ except ImportError:
     print("[UserContext] Zep not available", file=sys.stderr)
 
 
-def get_db_connection():
-    """Get database connection from environment."""
-    db_url = os.getenv("DATABASE_URL")
-    if not db_url:
-        return None
-    return psycopg2.connect(db_url)
+def get_db_connection(read_only: bool = False, user_id: str = None):
+    """Check out a pooled database connection (yields None if not configured).
+
+    Use as a context manager - the connection goes back to the shared pool on exit.
+    Reads pass read_only=True and the user_id so they can use the replica
+    without missing that user's own recent writes (see db_pool).
+    """
+    return get_connection(read_only=read_only, user_id=user_id)
 
 
 def get_zep_client() -> Optional["Zep"]:
@@ -48,20 +53,18 @@ def get_zep_client() -> Optional["Zep"]:
 def get_user_profile(user_id: str) -> dict:
     """Get user profile from Neon database."""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return {"found": False, "error": "Database not configured"}
-
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT id, email, name, skills, experience_years,
-                       preferred_categories, preferred_locations, bio
-                FROM user_profiles
-                WHERE id = %s
-            """, (user_id,))
-            row = cur.fetchone()
+        with get_db_connection(read_only=True, user_id=user_id) as conn:
+            if not conn:
+                return {"found": False, "error": "Database not configured"}
 
-        conn.close()
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT id, email, name, skills, experience_years,
+                           preferred_categories, preferred_locations, bio
+                    FROM user_profiles
+                    WHERE id = %s
+                """, (user_id,))
+                row = cur.fetchone()
 
         if row:
             return {
@@ -69,6 +72,8 @@ def get_user_profile(user_id: str) -> dict:
                 "profile": dict(row)
             }
         return {"found": False, "message": "Profile not found"}
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[UserContext] DB error: {e}", file=sys.stderr)
         return {"found": False, "error": str(e)}
@@ -80,62 +85,67 @@ def save_user_profile(user_id: str, email: str = None, name: str = None,
                      preferred_locations: List[str] = None, bio: str = None) -> dict:
     """Create or update user profile in Neon database."""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return {"success": False, "error": "Database not configured"}
-
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO user_profiles (id, email, name, skills, experience_years,
-                                          preferred_categories, preferred_locations, bio, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (id) DO UPDATE SET
-                    email = COALESCE(EXCLUDED.email, user_profiles.email),
-                    name = COALESCE(EXCLUDED.name, user_profiles.name),
-                    skills = COALESCE(EXCLUDED.skills, user_profiles.skills),
-                    experience_years = COALESCE(EXCLUDED.experience_years, user_profiles.experience_years),
-                    preferred_categories = COALESCE(EXCLUDED.preferred_categories, user_profiles.preferred_categories),
-                    preferred_locations = COALESCE(EXCLUDED.preferred_locations, user_profiles.preferred_locations),
-                    bio = COALESCE(EXCLUDED.bio, user_profiles.bio),
-                    updated_at = NOW()
-            """, (user_id, email, name, skills, experience_years,
-                  preferred_categories, preferred_locations, bio))
-
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            if not conn:
+                return {"success": False, "error": "Database not configured"}
+
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO user_profiles (id, email, name, skills, experience_years,
+                                              preferred_categories, preferred_locations, bio, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (id) DO UPDATE SET
+                        email = COALESCE(EXCLUDED.email, user_profiles.email),
+                        name = COALESCE(EXCLUDED.name, user_profiles.name),
+                        skills = COALESCE(EXCLUDED.skills, user_profiles.skills),
+                        experience_years = COALESCE(EXCLUDED.experience_years, user_profiles.experience_years),
+                        preferred_categories = COALESCE(EXCLUDED.preferred_categories, user_profiles.preferred_categories),
+                        preferred_locations = COALESCE(EXCLUDED.preferred_locations, user_profiles.preferred_locations),
+                        bio = COALESCE(EXCLUDED.bio, user_profiles.bio),
+                        updated_at = NOW()
+                """, (user_id, email, name, skills, experience_years,
+                      preferred_categories, preferred_locations, bio))
+
+            conn.commit()
+            mark_user_write(user_id)
 
         return {"success": True, "message": "Profile saved"}
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[UserContext] DB error saving profile: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
 
 
+JOB_INTERESTS_SQL = """
+    SELECT ji.job_id, ji.interest_type, ji.created_at,
+           j.title, j.company, j.location, j.category
+    FROM user_job_interests ji
+    JOIN jobs_including_archived j ON j.id = ji.job_id
+    WHERE ji.user_id = %s
+    ORDER BY ji.created_at DESC
+    LIMIT %s
+"""
+
+
 def get_user_job_interests(user_id: str, limit: int = 10) -> dict:
     """Get jobs the user has shown interest in."""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return {"found": False, "error": "Database not configured"}
-
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT ji.job_id, ji.interest_type, ji.created_at,
-                       j.title, j.company, j.location, j.category
-                FROM user_job_interests ji
-                JOIN jobs j ON j.id = ji.job_id
-                WHERE ji.user_id = %s
-                ORDER BY ji.created_at DESC
-                LIMIT %s
-            """, (user_id, limit))
-            rows = cur.fetchall()
-
-        conn.close()
+        with get_db_connection(read_only=True, user_id=user_id) as conn:
+            if not conn:
+                return {"found": False, "error": "Database not configured"}
+
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                prepared.execute(cur, JOB_INTERESTS_SQL, [user_id, limit])
+                rows = cur.fetchall()
 
         return {
             "found": True,
             "interests": [dict(row) for row in rows],
             "count": len(rows)
         }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[UserContext] DB error: {e}", file=sys.stderr)
         return {"found": False, "error": str(e)}
@@ -144,23 +154,25 @@ def get_user_job_interests(user_id: str, limit: int = 10) -> dict:
 def save_job_interest(user_id: str, job_id: str, interest_type: str = "viewed") -> dict:
     """Save user's interest in a job."""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return {"success": False, "error": "Database not configured"}
-
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO user_job_interests (user_id, job_id, interest_type)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (user_id, job_id) DO UPDATE SET
-                    interest_type = EXCLUDED.interest_type,
-                    created_at = NOW()
-            """, (user_id, job_id, interest_type))
-
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            if not conn:
+                return {"success": False, "error": "Database not configured"}
+
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO user_job_interests (user_id, job_id, interest_type)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (user_id, job_id) DO UPDATE SET
+                        interest_type = EXCLUDED.interest_type,
+                        created_at = NOW()
+                """, (user_id, job_id, interest_type))
+
+            conn.commit()
+            mark_user_write(user_id)
 
         return {"success": True, "message": f"Saved {interest_type} interest"}
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[UserContext] DB error saving interest: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
@@ -250,63 +262,51 @@ def search_user_memories(user_id: str, query: str, limit: int = 3) -> dict:
 # Profile Items (Skills, Role, Location, etc.)
 # =====
 
-def ensure_profile_items_table():
-    """Create user_profile_items table if it doesn't exist."""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return False
-
-        with conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS user_profile_items (
-                    id SERIAL PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    item_type TEXT NOT NULL,
-                    value TEXT NOT NULL,
-                    metadata JSONB DEFAULT '{}',
-                    confirmed BOOLEAN DEFAULT false,
-                    created_at TIMESTAMPTZ DEFAULT NOW(),
-                    updated_at TIMESTAMPTZ DEFAULT NOW(),
-                    UNIQUE(user_id, item_type, value)
-                );
-                CREATE INDEX IF NOT EXISTS idx_profile_items_user ON user_profile_items(user_id);
-                CREATE INDEX IF NOT EXISTS idx_profile_items_type ON user_profile_items(item_type);
-            """)
-        conn.commit()
-        conn.close()
-        print("[UserContext] Profile items table ready", file=sys.stderr)
-        return True
-    except Exception as e:
-        print(f"[UserContext] Table creation error: {e}", file=sys.stderr)
-        return False
+PROFILE_ITEMS_DDL = """
+    CREATE TABLE IF NOT EXISTS user_profile_items (
+        id SERIAL PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        item_type TEXT NOT NULL,
+        value TEXT NOT NULL,
+        metadata JSONB DEFAULT '{}',
+        confirmed BOOLEAN DEFAULT false,
+        created_at TIMESTAMPTZ DEFAULT NOW(),
+        updated_at TIMESTAMPTZ DEFAULT NOW(),
+        UNIQUE(user_id, item_type, value)
+    );
+    CREATE INDEX IF NOT EXISTS idx_profile_items_user ON user_profile_items(user_id);
+    CREATE INDEX IF NOT EXISTS idx_profile_items_type ON user_profile_items(item_type);
+"""
+
+
+PROFILE_ITEMS_SQL = """
+    SELECT item_type, value, metadata, confirmed, created_at
+    FROM user_profile_items
+    WHERE user_id = %s
+    ORDER BY item_type, created_at DESC
+"""
+
+PROFILE_ITEMS_BY_TYPE_SQL = """
+    SELECT item_type, value, metadata, confirmed, created_at
+    FROM user_profile_items
+    WHERE user_id = %s AND item_type = %s
+    ORDER BY created_at DESC
+"""
 
 
 def get_profile_items(user_id: str, item_type: str = None) -> dict:
     """Get user profile items, optionally filtered by type."""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return {"found": False, "error": "Database not configured"}
+        with get_db_connection(read_only=True, user_id=user_id) as conn:
+            if not conn:
+                return {"found": False, "error": "Database not configured"}
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            if item_type:
-                cur.execute("""
-                    SELECT item_type, value, metadata, confirmed, created_at
-                    FROM user_profile_items
-                    WHERE user_id = %s AND item_type = %s
-                    ORDER BY created_at DESC
-                """, (user_id, item_type))
-            else:
-                cur.execute("""
-                    SELECT item_type, value, metadata, confirmed, created_at
-                    FROM user_profile_items
-                    WHERE user_id = %s
-                    ORDER BY item_type, created_at DESC
-                """, (user_id,))
-            rows = cur.fetchall()
-
-        conn.close()
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                if item_type:
+                    prepared.execute(cur, PROFILE_ITEMS_BY_TYPE_SQL, [user_id, item_type])
+                else:
+                    prepared.execute(cur, PROFILE_ITEMS_SQL, [user_id])
+                rows = cur.fetchall()
 
         # Group by type
         items_by_type = {}
@@ -326,6 +326,8 @@ def get_profile_items(user_id: str, item_type: str = None) -> dict:
             "items": items_by_type,
             "total": len(rows)
         }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[UserContext] Error getting profile items: {e}", file=sys.stderr)
         return {"found": False, "error": str(e)}
@@ -346,34 +348,34 @@ def save_profile_item(user_id: str, item_type: str, value: str,
         replace_existing: If True, delete existing items of this type first (for single-value fields)
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return {"success": False, "error": "Database not configured"}
-
-        # Single-value fields should replace existing
-        single_value_types = ['location', 'role', 'salary_min', 'salary_max', 'experience_years']
-        should_replace = replace_existing or item_type in single_value_types
-
-        with conn.cursor() as cur:
-            # Delete existing if this is a single-value field
-            if should_replace:
+        with get_db_connection() as conn:
+            if not conn:
+                return {"success": False, "error": "Database not configured"}
+
+            # Single-value fields should replace existing
+            single_value_types = ['location', 'role', 'salary_min', 'salary_max', 'experience_years']
+            should_replace = replace_existing or item_type in single_value_types
+
+            with conn.cursor() as cur:
+                # Delete existing if this is a single-value field
+                if should_replace:
+                    cur.execute("""
+                        DELETE FROM user_profile_items
+                        WHERE user_id = %s AND item_type = %s
+                    """, (user_id, item_type))
+
+                # Insert new item
                 cur.execute("""
-                    DELETE FROM user_profile_items
-                    WHERE user_id = %s AND item_type = %s
-                """, (user_id, item_type))
-
-            # Insert new item
-            cur.execute("""
-                INSERT INTO user_profile_items (user_id, item_type, value, metadata, confirmed, updated_at)
-                VALUES (%s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (user_id, item_type, value) DO UPDATE SET
-                    metadata = COALESCE(EXCLUDED.metadata, user_profile_items.metadata),
-                    confirmed = EXCLUDED.confirmed,
-                    updated_at = NOW()
-            """, (user_id, item_type, value, json.dumps(metadata or {}), confirmed))
-
-        conn.commit()
-        conn.close()
+                    INSERT INTO user_profile_items (user_id, item_type, value, metadata, confirmed, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (user_id, item_type, value) DO UPDATE SET
+                        metadata = COALESCE(EXCLUDED.metadata, user_profile_items.metadata),
+                        confirmed = EXCLUDED.confirmed,
+                        updated_at = NOW()
+                """, (user_id, item_type, value, json.dumps(metadata or {}), confirmed))
+
+            conn.commit()
+            mark_user_write(user_id)
 
         return {
             "success": True,
@@ -382,6 +384,8 @@ def save_profile_item(user_id: str, item_type: str, value: str,
             "confirmed": confirmed,
             "replaced": should_replace
         }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[UserContext] Error saving profile item: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
@@ -390,21 +394,23 @@ def save_profile_item(user_id: str, item_type: str, value: str,
 def delete_profile_item(user_id: str, item_type: str, value: str) -> dict:
     """Delete a profile item."""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return {"success": False, "error": "Database not configured"}
+        with get_db_connection() as conn:
+            if not conn:
+                return {"success": False, "error": "Database not configured"}
 
-        with conn.cursor() as cur:
-            cur.execute("""
-                DELETE FROM user_profile_items
-                WHERE user_id = %s AND item_type = %s AND value = %s
-            """, (user_id, item_type, value))
-            deleted = cur.rowcount
+            with conn.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM user_profile_items
+                    WHERE user_id = %s AND item_type = %s AND value = %s
+                """, (user_id, item_type, value))
+                deleted = cur.rowcount
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+            mark_user_write(user_id)
 
         return {"success": True, "deleted": deleted > 0}
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[UserContext] Error deleting profile item: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}